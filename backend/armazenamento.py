@@ -0,0 +1,420 @@
+"""
+Interface comum dos bancos de dados do monitor
+SQLite (database.py) é o padrão; PostgreSQL (database_postgres.py) é opcional
+"""
+
+import base64
+import calendar
+import functools
+import hashlib
+import json
+from abc import ABC, abstractmethod
+from datetime import datetime, timezone
+from typing import Callable, Dict, Iterable, Iterator, List, Optional
+
+
+def _sincronizado(metodo):
+    """Serializa o uso da conexão quando o banco é compartilhado entre threads"""
+    @functools.wraps(metodo)
+    def wrapper(self, *args, **kwargs):
+        with self._lock:
+            return metodo(self, *args, **kwargs)
+    return wrapper
+
+
+def _para_epoch(valor: Optional[str]) -> Optional[int]:
+    """
+    Converte uma data/hora ISO da API em segundos desde 1970
+    
+    Datas sem fuso (o formato usual do PNCP) são tratadas como UTC, o que
+    preserva a ordem e os limites de dia do calendário original.
+    
+    Args:
+        valor: Data ("AAAA-MM-DD") ou data/hora ISO, com ou sem fuso
+        
+    Returns:
+        Epoch em segundos ou None se vazio/inválido
+    """
+    if not valor:
+        return None
+        
+    try:
+        data = datetime.fromisoformat(str(valor).strip().replace("Z", "+00:00"))
+    except ValueError:
+        return None
+        
+    if data.tzinfo is None:
+        return calendar.timegm(data.timetuple())
+    return int(data.astimezone(timezone.utc).timestamp())
+
+
+def _hash_conteudo(contratacao: Dict) -> str:
+    """
+    Calcula o hash do conteúdo de uma contratação
+    
+    As chaves são ordenadas: o mesmo conteúdo gera o mesmo hash mesmo que
+    a API mude a ordem dos campos.
+    
+    Args:
+        contratacao: Dados da contratação
+        
+    Returns:
+        Hash hexadecimal (BLAKE2b, 16 bytes)
+    """
+    texto = json.dumps(contratacao, sort_keys=True, ensure_ascii=False, separators=(",", ":"))
+    return hashlib.blake2b(texto.encode('utf-8'), digest_size=16).hexdigest()
+
+
+def abrir_armazenamento(destino: str, **opcoes) -> "Armazenamento":
+    """
+    Abre o banco indicado por `destino`
+    
+    Args:
+        destino: URL "postgresql://..." ou caminho de um arquivo SQLite
+        **opcoes: Opções do banco SQLite (ex.: modo_wal); ignoradas no PostgreSQL
+        
+    Returns:
+        Banco de dados aberto
+    """
+    if destino.startswith(("postgresql://", "postgres://")):
+        # Importado sob demanda: depende do psycopg
+        from database_postgres import DatabasePostgres
+        return DatabasePostgres(destino)
+        
+    from database import Database
+    return Database(destino, **opcoes)
+
+
+class Armazenamento(ABC):
+    """Operações de gravação e consulta usadas pelos monitores"""
+    
+    # Colunas de _linha_contratacao, na ordem de SQL_INSERIR_CONTRATACAO
+    COLUNAS_LINHA = (
+        'numero_compra', 'ano_compra', 'sequencial_compra',
+        'codigo_ibge', 'cnpj_orgao', 'objeto',
+        'valor_estimado', 'valor_homologado',
+        'modalidade_codigo', 'modalidade_nome',
+        'data_publicacao', 'situacao', 'orgao_nome',
+        'link_pncp', 'data_publicacao_ts'
+    )
+    
+    # Marcador de parâmetro do driver (sqlite3: ?, psycopg: %s)
+    MARCADOR = "?"
+    
+    # Dimensões das séries: agrupamento -> colunas (chave, nome)
+    DIMENSOES_SERIE = {
+        'modalidade': ('modalidade_codigo', 'modalidade_nome'),
+        'orgao': ('cnpj_orgao', 'orgao_nome'),
+        'municipio': ('codigo_ibge', None),
+    }
+    
+    # Busca textual (pesquisar) disponível neste banco
+    busca_disponivel = True
+    
+    @abstractmethod
+    def salvar_contratacoes(self, contratacoes: List[Dict]) -> int:
+        """Salva contratações novas ou alteradas e retorna quantas são novas"""
+        
+    @abstractmethod
+    def buscar_contratacoes(
+        self,
+        limite: int = 100,
+        offset: int = 0,
+        modalidade: Optional[int] = None,
+        data_inicio: Optional[str] = None,
+        data_fim: Optional[str] = None
+    ) -> List[Dict]:
+        """Busca contratações com filtros, das mais recentes para as mais antigas"""
+        
+    @abstractmethod
+    def buscar_contratacoes_cursor(
+        self,
+        limite: int = 100,
+        cursor_pagina: Optional[str] = None,
+        modalidade: Optional[int] = None,
+        data_inicio: Optional[str] = None,
+        data_fim: Optional[str] = None
+    ) -> Dict:
+        """Busca com paginação por cursor: {'contratacoes', 'proximo_cursor'}"""
+        
+    @abstractmethod
+    def contar_contratacoes(
+        self,
+        modalidade: Optional[int] = None,
+        data_inicio: Optional[str] = None,
+        data_fim: Optional[str] = None
+    ) -> int:
+        """Conta o total de contratações com filtros"""
+        
+    @abstractmethod
+    def pesquisar(
+        self,
+        termo: str,
+        limite: int = 20,
+        offset: int = 0,
+        modalidade: Optional[int] = None
+    ) -> List[Dict]:
+        """Pesquisa por palavras do objeto ou do órgão ('relevancia': menor = melhor)"""
+        
+    @abstractmethod
+    def obter_contratacao(self, contratacao_id: int) -> Optional[Dict]:
+        """Obtém as colunas de resumo de uma contratação"""
+        
+    @abstractmethod
+    def obter_versoes(self, contratacao_id: int) -> List[Dict]:
+        """Obtém o histórico de alterações de uma contratação"""
+        
+    @abstractmethod
+    def iter_contratacoes_alteradas(
+        self,
+        geracao_inicial: int,
+        geracao_final: Optional[int] = None,
+        tamanho_lote: int = 1000,
+        dados_completos: bool = True
+    ) -> Iterator[List[Dict]]:
+        """Percorre em lotes as contratações gravadas depois de uma geração"""
+        
+    @abstractmethod
+    def obter_serie_temporal(
+        self,
+        granularidade: str = "mes",
+        data_inicio: Optional[str] = None,
+        data_fim: Optional[str] = None,
+        modalidade: Optional[int] = None,
+        cnpj_orgao: Optional[str] = None,
+        codigo_ibge: Optional[str] = None,
+        agrupar_por: Optional[str] = None
+    ) -> List[Dict]:
+        """Obtém quantidade e valor estimado por período de publicação"""
+        
+    @abstractmethod
+    def obter_totais_por_orgao(
+        self,
+        data_inicio: Optional[str] = None,
+        data_fim: Optional[str] = None,
+        modalidade: Optional[int] = None,
+        codigo_ibge: Optional[str] = None,
+        limite: int = 20
+    ) -> List[Dict]:
+        """Obtém os órgãos com maior valor estimado no período"""
+        
+    @abstractmethod
+    def obter_estatisticas(self) -> Dict:
+        """Obtém total, valor estimado e contagem por modalidade"""
+        
+    @abstractmethod
+    def obter_dados_completos(self, contratacao_ids: Iterable[int]) -> Dict[int, Dict]:
+        """Obtém o JSON original da API das contratações informadas"""
+        
+    @abstractmethod
+    def obter_geracao(self) -> int:
+        """Retorna a geração atual dos dados (muda a cada gravação)"""
+        
+    @abstractmethod
+    def buscar_contratacoes_nao_notificadas(self, limite: Optional[int] = None) -> List[Dict]:
+        """Busca contratações que ainda não foram notificadas"""
+        
+    @abstractmethod
+    def reservar_notificacoes(self, limite: int = 500, validade_reserva: int = 15 * 60) -> tuple:
+        """Reserva um lote pendente de notificação: (token, contratações)"""
+        
+    @abstractmethod
+    def marcar_lote_notificado(self, token: str) -> int:
+        """Marca como notificadas as contratações de uma reserva"""
+        
+    @abstractmethod
+    def liberar_reserva_notificacoes(self, token: str) -> int:
+        """Devolve as contratações de uma reserva à fila"""
+        
+    @abstractmethod
+    def marcar_como_notificado(self, contratacao_id: int):
+        """Marca uma contratação como notificada"""
+        
+    @abstractmethod
+    def obter_marcas_sincronizacao(self, codigo_ibge: str) -> Dict[int, str]:
+        """Obtém a última publicação ingerida por modalidade"""
+        
+    @abstractmethod
+    def atualizar_marca_sincronizacao(
+        self,
+        codigo_ibge: str,
+        modalidade_codigo: int,
+        ultima_publicacao: str
+    ):
+        """Avança a marca d'água de uma modalidade (nunca retrocede)"""
+        
+    @abstractmethod
+    def registrar_execucao(
+        self,
+        encontradas: int,
+        novas: int,
+        sucesso: bool,
+        mensagem: str = "",
+        codigo_ibge: Optional[str] = None
+    ):
+        """Registra uma execução do monitoramento"""
+        
+    @abstractmethod
+    def fechar(self):
+        """Fecha as conexões com o banco de dados"""
+        
+    def salvar_contratacao(self, contratacao: Dict) -> bool:
+        """
+        Salva uma contratação no banco de dados
+        
+        Args:
+            contratacao: Dados da contratação
+            
+        Returns:
+            True se foi uma nova contratação, False se já existia
+            (mesmo que alterada)
+        """
+        return self.salvar_contratacoes([contratacao]) == 1
+        
+    def salvar_contratacoes_stream(
+        self,
+        paginas: Iterable[List[Dict]],
+        tamanho_lote: int = 500,
+        ao_salvar_lote: Optional[Callable[[], None]] = None
+    ) -> int:
+        """
+        Salva contratações à medida que as páginas chegam, em lotes limitados
+        
+        O consumo das páginas (rede) acontece fora do lock do banco; apenas
+        a gravação de cada lote é serializada.
+        
+        Args:
+            paginas: Iterável de listas de contratações (ex.: iter_contratacoes)
+            tamanho_lote: Quantidade de registros acumulados por gravação
+            ao_salvar_lote: Chamado após o commit de cada lote
+            
+        Returns:
+            Número de novas contratações salvas
+        """
+        novas = 0
+        lote = []
+        
+        for pagina in paginas:
+            lote.extend(pagina)
+            if len(lote) >= tamanho_lote:
+                novas += self.salvar_contratacoes(lote)
+                lote = []
+                if ao_salvar_lote:
+                    ao_salvar_lote()
+                    
+        if lote:
+            novas += self.salvar_contratacoes(lote)
+            if ao_salvar_lote:
+                ao_salvar_lote()
+                
+        return novas
+        
+    def _linha_contratacao(self, contratacao: Dict) -> tuple:
+        """Converte uma contratação da API nos valores de COLUNAS_LINHA"""
+        orgao = contratacao.get('orgaoEntidade') or {}
+        
+        return (
+            contratacao.get('numeroCompra'),
+            contratacao.get('anoCompra'),
+            contratacao.get('sequencialCompra'),
+            self._extrair_codigo_ibge(contratacao),
+            orgao.get('cnpj', ''),
+            contratacao.get('objetoCompra'),
+            contratacao.get('valorTotalEstimado'),
+            contratacao.get('valorTotalHomologado'),
+            contratacao.get('_modalidade_codigo'),
+            contratacao.get('_modalidade_nome'),
+            contratacao.get('dataPublicacaoPncp'),
+            contratacao.get('situacaoCompra'),
+            orgao.get('razaoSocial'),
+            self._gerar_link_pncp(contratacao),
+            _para_epoch(contratacao.get('dataPublicacaoPncp'))
+        )
+        
+    def _extrair_codigo_ibge(self, contratacao: Dict) -> Optional[str]:
+        """Extrai o código IBGE do município da contratação"""
+        codigo = contratacao.get('codigoMunicipioIbge')
+        if codigo:
+            return codigo
+        unidade = contratacao.get('unidadeOrgao') or {}
+        return unidade.get('codigoIbge')
+        
+    def _gerar_link_pncp(self, contratacao: Dict) -> str:
+        """Gera o link para a contratação no portal PNCP"""
+        cnpj = (contratacao.get('orgaoEntidade') or {}).get('cnpj', '')
+        ano = contratacao.get('anoCompra', '')
+        sequencial = contratacao.get('sequencialCompra', '')
+        
+        if cnpj and ano and sequencial:
+            return f"https://pncp.gov.br/app/editais/{cnpj}/{ano}/{sequencial}"
+        return "N/A"
+        
+    @classmethod
+    def _filtros(
+        cls,
+        modalidade: Optional[int] = None,
+        data_inicio: Optional[str] = None,
+        data_fim: Optional[str] = None
+    ) -> tuple:
+        """
+        Monta a cláusula WHERE dos filtros de listagem
+        
+        As datas são comparadas como epoch (índices de data_publicacao_ts).
+        Uma data final sem horário inclui o dia inteiro.
+        
+        Returns:
+            Tupla (condição SQL, parâmetros)
+        """
+        condicoes = ["1=1"]
+        params = []
+        
+        if modalidade is not None:
+            condicoes.append(f"modalidade_codigo = {cls.MARCADOR}")
+            params.append(modalidade)
+            
+        if data_inicio:
+            inicio = _para_epoch(data_inicio)
+            if inicio is None:
+                raise ValueError(f"Data inicial inválida: {data_inicio}")
+            condicoes.append(f"data_publicacao_ts >= {cls.MARCADOR}")
+            params.append(inicio)
+            
+        if data_fim:
+            fim = _para_epoch(data_fim)
+            if fim is None:
+                raise ValueError(f"Data final inválida: {data_fim}")
+            if len(str(data_fim).strip()) == 10:
+                fim += 24 * 3600 - 1
+            condicoes.append(f"data_publicacao_ts <= {cls.MARCADOR}")
+            params.append(fim)
+            
+        return " AND ".join(condicoes), params
+        
+    @staticmethod
+    def _codificar_cursor(data_publicacao_ts: Optional[int], contratacao_id: int) -> str:
+        """Gera um cursor opaco a partir da chave do último registro"""
+        chave = json.dumps([data_publicacao_ts, contratacao_id])
+        return base64.urlsafe_b64encode(chave.encode('utf-8')).decode('ascii')
+        
+    @staticmethod
+    def _decodificar_cursor(cursor_pagina: str) -> List:
+        """
+        Recupera a chave (data_publicacao_ts, id) de um cursor
+        
+        Raises:
+            ValueError: Se o cursor for inválido
+        """
+        try:
+            chave = json.loads(base64.urlsafe_b64decode(cursor_pagina.encode('ascii')))
+            data_publicacao_ts, contratacao_id = chave
+            return [data_publicacao_ts, int(contratacao_id)]
+        except (ValueError, TypeError) as e:
+            raise ValueError(f"Cursor de paginação inválido: {cursor_pagina}") from e
+            
+    def __enter__(self):
+        """Suporte para context manager"""
+        return self
+        
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        """Suporte para context manager"""
+        self.fechar()
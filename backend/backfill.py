@@ -0,0 +1,332 @@
+"""
+Carga histórica retomável de contratações do PNCP
+Divide o período em unidades (mês x modalidade x página) controladas no banco
+"""
+
+import argparse
+import logging
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+from datetime import date, datetime, timedelta
+from pathlib import Path
+from typing import Dict, List, Optional
+
+# Adicionar diretório atual ao path
+sys.path.insert(0, str(Path(__file__).parent))
+
+from pncp_api import PNCPClient, criar_sessao
+from cache_http import CacheHTTP
+from database import Database
+
+logger = logging.getLogger(__name__)
+
+
+def listar_meses(inicio: date, fim: date) -> List[str]:
+    """
+    Lista os meses (AAAA-MM) entre duas datas, inclusive
+    
+    Args:
+        inicio: Data inicial
+        fim: Data final
+        
+    Returns:
+        Lista de meses no formato AAAA-MM
+    """
+    meses = []
+    ano, mes = inicio.year, inicio.month
+    
+    while (ano, mes) <= (fim.year, fim.month):
+        meses.append(f"{ano:04d}-{mes:02d}")
+        ano, mes = (ano + 1, 1) if mes == 12 else (ano, mes + 1)
+        
+    return meses
+
+
+def periodo_do_mes(ano_mes: str) -> tuple:
+    """
+    Retorna o primeiro e o último dia de um mês
+    
+    Args:
+        ano_mes: Mês no formato AAAA-MM
+        
+    Returns:
+        Tupla (data inicial, data final) como datetime
+    """
+    inicio = datetime.strptime(ano_mes, "%Y-%m")
+    proximo = (inicio + timedelta(days=32)).replace(day=1)
+    return inicio, proximo - timedelta(days=1)
+
+
+class Backfill:
+    """Executa a carga histórica de um município de forma retomável"""
+    
+    def __init__(
+        self,
+        codigo_ibge: str,
+        db_path: str = "pncp_monitor.db",
+        max_workers: int = 4,
+        max_tentativas: int = 3,
+        tamanho_pagina: int = 50,
+        cache_path: Optional[str] = None,
+        espera_tentativa: float = 5.0
+    ):
+        """
+        Inicializa a carga histórica
+        
+        Args:
+            codigo_ibge: Código IBGE do município
+            db_path: Caminho para o banco de dados
+            max_workers: Unidades executadas em paralelo
+            max_tentativas: Falhas toleradas por unidade antes de desistir
+            tamanho_pagina: Quantidade de registros por página
+            cache_path: Arquivo do cache HTTP (None = sem cache)
+            espera_tentativa: Espera antes de repetir uma unidade com falha
+                (segundos, dobrada a cada nova falha)
+        """
+        self.codigo_ibge = codigo_ibge
+        self.max_workers = max_workers
+        self.max_tentativas = max_tentativas
+        self.tamanho_pagina = tamanho_pagina
+        self.espera_tentativa = espera_tentativa
+        
+        self.client = PNCPClient(
+            session=criar_sessao(tamanho_pool=max_workers),
+            cache=CacheHTTP(cache_path) if cache_path else None
+        )
+        self.db = Database(db_path, modo_wal=True)
+        
+    def planejar(
+        self,
+        inicio: date,
+        fim: date,
+        modalidades: Optional[List[int]] = None
+    ) -> int:
+        """
+        Cria as unidades da primeira página de cada mês x modalidade
+        
+        As páginas seguintes são criadas quando a primeira página informa
+        o total de páginas. Unidades já existentes são preservadas.
+        
+        Args:
+            inicio: Data inicial da carga
+            fim: Data final da carga
+            modalidades: Lista de códigos de modalidade (None = todas)
+            
+        Returns:
+            Número de unidades novas
+        """
+        if modalidades is None:
+            modalidades = list(self.client.MODALIDADES.keys())
+            
+        unidades = [
+            (codigo_modalidade, ano_mes, 1)
+            for ano_mes in listar_meses(inicio, fim)
+            for codigo_modalidade in modalidades
+        ]
+        novas = self.db.criar_unidades_backfill(self.codigo_ibge, unidades)
+        logger.info(f"Planejamento: {novas} unidades novas de {len(unidades)}")
+        return novas
+        
+    def executar(self) -> Dict[str, int]:
+        """
+        Executa as unidades pendentes até não restar nenhuma
+        
+        Uma unidade com falha é repetida na mesma execução, com espera
+        crescente, até somar `max_tentativas` falhas; depois fica como
+        'erro' e é ignorada.
+        
+        Pode ser interrompida a qualquer momento (Ctrl-C); a próxima
+        execução continua das unidades não concluídas.
+        
+        Returns:
+            Resumo de unidades por status
+        """
+        encontradas = 0
+        novas = 0
+        
+        executor = ThreadPoolExecutor(max_workers=self.max_workers)
+        futuros = {}
+        # Unidades com falha aguardando nova tentativa: [(instante, unidade)]
+        espera = []
+        
+        reiniciadas = self.db.reiniciar_unidades_backfill(self.codigo_ibge)
+        if reiniciadas:
+            logger.info(f"Retomando {reiniciadas} unidades interrompidas")
+            
+        try:
+            for unidade in self.db.buscar_unidades_backfill_pendentes(
+                self.codigo_ibge, self.max_tentativas
+            ):
+                futuros[self._submeter(executor, unidade)] = unidade
+                
+            while futuros or espera:
+                agora = time.monotonic()
+                for item in [item for item in espera if item[0] <= agora]:
+                    espera.remove(item)
+                    futuros[self._submeter(executor, item[1])] = item[1]
+                    
+                proxima = min((instante for instante, _ in espera), default=None)
+                if not futuros:
+                    time.sleep(proxima - agora)
+                    continue
+                    
+                concluidos, _ = wait(
+                    futuros,
+                    timeout=None if proxima is None else max(0, proxima - agora),
+                    return_when=FIRST_COMPLETED
+                )
+                
+                for futuro in concluidos:
+                    unidade = futuros.pop(futuro)
+                    
+                    try:
+                        resultado = futuro.result()
+                    except Exception as e:
+                        unidade['tentativas'] += 1
+                        logger.error(
+                            f"Unidade {unidade['ano_mes']} modalidade "
+                            f"{unidade['modalidade_codigo']} página "
+                            f"{unidade['pagina']} falhou "
+                            f"({unidade['tentativas']}/{self.max_tentativas}): {e}"
+                        )
+                        self.db.atualizar_unidade_backfill(
+                            unidade['id'], 'erro', erro=str(e)
+                        )
+                        
+                        if unidade['tentativas'] < self.max_tentativas:
+                            atraso = self.espera_tentativa * 2 ** (unidade['tentativas'] - 1)
+                            espera.append((time.monotonic() + atraso, unidade))
+                        continue
+                        
+                    contratacoes = resultado['contratacoes']
+                    encontradas += len(contratacoes)
+                    novas += self.db.salvar_contratacoes(contratacoes)
+                    
+                    # Só marca como concluída depois de gravar os registros
+                    self.db.atualizar_unidade_backfill(
+                        unidade['id'], 'concluida', registros=len(contratacoes)
+                    )
+                    
+                    if unidade['pagina'] == 1 and resultado['total_paginas'] > 1:
+                        for nova in self._planejar_paginas(
+                            unidade, resultado['total_paginas']
+                        ):
+                            futuros[self._submeter(executor, nova)] = nova
+                            
+        except KeyboardInterrupt:
+            logger.warning("Carga interrompida; execute novamente para continuar")
+            executor.shutdown(wait=False, cancel_futures=True)
+            raise
+            
+        finally:
+            executor.shutdown(wait=True)
+            self.db.registrar_execucao(
+                encontradas=encontradas,
+                novas=novas,
+                sucesso=not futuros and not espera,
+                mensagem="Carga histórica",
+                codigo_ibge=self.codigo_ibge
+            )
+            
+        resumo = self.db.resumo_backfill(self.codigo_ibge)
+        logger.info(f"Carga histórica: {encontradas} encontradas, {novas} novas, {resumo}")
+        return resumo
+        
+    def _planejar_paginas(self, unidade: Dict, total_paginas: int) -> List[Dict]:
+        """Cria as unidades das páginas 2..N e retorna as que estão pendentes"""
+        self.db.criar_unidades_backfill(self.codigo_ibge, [
+            (unidade['modalidade_codigo'], unidade['ano_mes'], pagina)
+            for pagina in range(2, total_paginas + 1)
+        ])
+        
+        return [
+            pendente
+            for pendente in self.db.buscar_unidades_backfill_pendentes(
+                self.codigo_ibge,
+                self.max_tentativas,
+                modalidade=unidade['modalidade_codigo'],
+                ano_mes=unidade['ano_mes']
+            )
+            if pendente['pagina'] > 1
+        ]
+        
+    def _submeter(self, executor: ThreadPoolExecutor, unidade: Dict):
+        """Marca a unidade como em andamento e agenda sua execução"""
+        self.db.atualizar_unidade_backfill(unidade['id'], 'em_andamento')
+        
+        data_inicial, data_final = periodo_do_mes(unidade['ano_mes'])
+        return executor.submit(
+            self.client.buscar_pagina,
+            codigo_ibge=self.codigo_ibge,
+            data_inicial=data_inicial,
+            data_final=data_final,
+            codigo_modalidade=unidade['modalidade_codigo'],
+            pagina=unidade['pagina'],
+            tamanho_pagina=self.tamanho_pagina
+        )
+        
+    def fechar(self):
+        """Fecha conexões e libera recursos"""
+        self.client.session.close()
+        if self.client.cache is not None:
+            self.client.cache.fechar()
+        self.db.fechar()
+
+
+def main():
+    """Função principal para execução via linha de comando"""
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+        handlers=[
+            logging.FileHandler('pncp_backfill.log'),
+            logging.StreamHandler()
+        ]
+    )
+    
+    parser = argparse.ArgumentParser(
+        description="Carga histórica retomável de contratações do PNCP"
+    )
+    parser.add_argument("codigo_ibge", help="Código IBGE do município")
+    parser.add_argument("--inicio", required=True, help="Mês inicial (AAAA-MM)")
+    parser.add_argument("--fim", help="Mês final (AAAA-MM, padrão: mês atual)")
+    parser.add_argument("--modalidades", type=int, nargs="*", help="Códigos de modalidade")
+    parser.add_argument("--paralelo", type=int, default=4, help="Unidades em paralelo")
+    parser.add_argument("--db", default="pncp_monitor.db", help="Banco de dados")
+    parser.add_argument("--cache", help="Arquivo do cache HTTP (opcional)")
+    args = parser.parse_args()
+    
+    inicio = datetime.strptime(args.inicio, "%Y-%m").date()
+    fim = datetime.strptime(args.fim, "%Y-%m").date() if args.fim else date.today()
+    
+    backfill = Backfill(
+        codigo_ibge=args.codigo_ibge,
+        db_path=args.db,
+        max_workers=args.paralelo,
+        cache_path=args.cache
+    )
+    
+    try:
+        backfill.planejar(inicio, fim, args.modalidades)
+        resumo = backfill.executar()
+        
+        print("\n" + "=" * 80)
+        print("CARGA HISTÓRICA")
+        print("=" * 80)
+        for status, quantidade in sorted(resumo.items()):
+            print(f"  {status}: {quantidade}")
+        print("=" * 80)
+        
+        if resumo.get('erro') or resumo.get('pendente'):
+            sys.exit(1)
+            
+    except KeyboardInterrupt:
+        sys.exit(130)
+        
+    finally:
+        backfill.fechar()
+
+
+if __name__ == "__main__":
+    main()
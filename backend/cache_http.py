@@ -0,0 +1,284 @@
+"""
+Cache persistente de respostas HTTP da API do PNCP
+Armazena respostas em SQLite com TTL, limite de tamanho (LRU) e revalidação
+"""
+
+import hashlib
+import logging
+import sqlite3
+import threading
+import time
+import zlib
+from datetime import date, timedelta
+from typing import Dict, Optional
+from urllib.parse import urlencode
+
+logger = logging.getLogger(__name__)
+
+
+class CacheHTTP:
+    """Cache de respostas HTTP em disco"""
+    
+    # Status cujo corpo pode ser reaproveitado
+    STATUS_CACHEAVEIS = (200, 204)
+    
+    # Acessos (ordem LRU) acumulados em memória antes de irem ao disco
+    LOTE_ACESSOS = 256
+    INTERVALO_ACESSOS = 30.0
+    
+    def __init__(
+        self,
+        caminho: str = "pncp_cache.db",
+        tamanho_maximo_mb: float = 200,
+        ttl_janela_fechada: int = 7 * 24 * 3600,
+        ttl_janela_recente: int = 3600,
+        ttl_janela_aberta: int = 10 * 60,
+        ttl_padrao: int = 24 * 3600,
+        horizonte_alteracoes_dias: int = 90
+    ):
+        """
+        Inicializa o cache
+        
+        Args:
+            caminho: Arquivo SQLite do cache
+            tamanho_maximo_mb: Tamanho máximo dos corpos armazenados
+            ttl_janela_fechada: TTL (s) de períodos encerrados antes do horizonte
+            ttl_janela_recente: TTL (s) de períodos encerrados dentro do horizonte
+            ttl_janela_aberta: TTL (s) de consultas que incluem o dia atual
+            ttl_padrao: TTL (s) de requisições sem período (ex.: detalhes)
+            horizonte_alteracoes_dias: Dias em que contratações publicadas
+                ainda costumam mudar (situação, valores, cancelamentos)
+        """
+        self.caminho = caminho
+        self.tamanho_maximo = int(tamanho_maximo_mb * 1024 * 1024)
+        self.ttl_janela_fechada = ttl_janela_fechada
+        self.ttl_janela_recente = ttl_janela_recente
+        self.ttl_janela_aberta = ttl_janela_aberta
+        self.ttl_padrao = ttl_padrao
+        self.horizonte_alteracoes_dias = horizonte_alteracoes_dias
+        
+        self._lock = threading.Lock()
+        self._acessos: Dict[str, float] = {}
+        self._ultima_gravacao_acessos = time.monotonic()
+        self.conn = sqlite3.connect(caminho, check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        self._criar_tabela()
+        
+        cursor = self.conn.cursor()
+        cursor.execute("SELECT COALESCE(SUM(tamanho), 0) AS total FROM respostas")
+        self._tamanho_total = cursor.fetchone()['total']
+        
+    def _criar_tabela(self):
+        """Cria a tabela de respostas"""
+        cursor = self.conn.cursor()
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS respostas (
+                chave TEXT PRIMARY KEY,
+                url TEXT,
+                status_code INTEGER,
+                corpo BLOB,
+                etag TEXT,
+                last_modified TEXT,
+                expira_em REAL,
+                ultimo_acesso REAL,
+                tamanho INTEGER
+            )
+        """)
+        cursor.execute("""
+            CREATE INDEX IF NOT EXISTS idx_respostas_acesso
+            ON respostas(ultimo_acesso)
+        """)
+        self.conn.commit()
+        
+    @staticmethod
+    def gerar_chave(url: str, params: Optional[Dict] = None) -> str:
+        """
+        Gera a chave do cache a partir da URL e dos parâmetros
+        
+        Args:
+            url: URL da requisição
+            params: Parâmetros de consulta
+            
+        Returns:
+            Hash hexadecimal da requisição
+        """
+        consulta = urlencode(sorted((params or {}).items()))
+        return hashlib.sha256(f"{url}?{consulta}".encode('utf-8')).hexdigest()
+        
+    def calcular_ttl(self, params: Optional[Dict] = None) -> int:
+        """
+        Define o TTL conforme o período consultado
+        
+        Períodos abertos expiram rapidamente. Encerrados há pouco (dentro
+        do horizonte de alterações) ainda mudam e expiram em horas, para que
+        a revalidação traga as alterações; só os mais antigos ficam dias.
+        
+        Args:
+            params: Parâmetros de consulta
+            
+        Returns:
+            TTL em segundos
+        """
+        data_final = (params or {}).get('dataFinal')
+        if not data_final:
+            return self.ttl_padrao
+            
+        hoje = date.today()
+        if str(data_final) >= hoje.strftime("%Y%m%d"):
+            return self.ttl_janela_aberta
+            
+        horizonte = hoje - timedelta(days=self.horizonte_alteracoes_dias)
+        if str(data_final) >= horizonte.strftime("%Y%m%d"):
+            return self.ttl_janela_recente
+        return self.ttl_janela_fechada
+        
+    def obter(self, chave: str) -> Optional[Dict]:
+        """
+        Busca uma resposta armazenada (mesmo expirada, para revalidação)
+        
+        Args:
+            chave: Chave da requisição
+            
+        Returns:
+            Dicionário com status_code, corpo, etag, last_modified e
+            'expirada', ou None se não houver entrada
+        """
+        agora = time.time()
+        
+        with self._lock:
+            cursor = self.conn.cursor()
+            cursor.execute("""
+                SELECT status_code, corpo, etag, last_modified, expira_em
+                FROM respostas WHERE chave = ?
+            """, (chave,))
+            row = cursor.fetchone()
+            
+            if row is None:
+                return None
+                
+            # O acesso vai ao disco em lote: um acerto não grava nada
+            self._acessos[chave] = agora
+            if (len(self._acessos) >= self.LOTE_ACESSOS
+                    or time.monotonic() - self._ultima_gravacao_acessos >= self.INTERVALO_ACESSOS):
+                self._gravar_acessos(cursor)
+                self.conn.commit()
+            
+        return {
+            'status_code': row['status_code'],
+            'corpo': zlib.decompress(row['corpo']) if row['corpo'] else b'',
+            'etag': row['etag'],
+            'last_modified': row['last_modified'],
+            'expirada': row['expira_em'] <= agora
+        }
+        
+    def salvar(
+        self,
+        chave: str,
+        url: str,
+        status_code: int,
+        corpo: bytes,
+        ttl: int,
+        etag: Optional[str] = None,
+        last_modified: Optional[str] = None
+    ):
+        """
+        Armazena uma resposta e aplica o limite de tamanho
+        
+        Args:
+            chave: Chave da requisição
+            url: URL da requisição (informativo)
+            status_code: Status HTTP da resposta
+            corpo: Corpo da resposta
+            ttl: Tempo de vida em segundos
+            etag: Cabeçalho ETag da resposta
+            last_modified: Cabeçalho Last-Modified da resposta
+        """
+        comprimido = zlib.compress(corpo) if corpo else b''
+        agora = time.time()
+        
+        with self._lock:
+            cursor = self.conn.cursor()
+            cursor.execute(
+                "SELECT tamanho FROM respostas WHERE chave = ?", (chave,)
+            )
+            anterior = cursor.fetchone()
+            if anterior:
+                self._tamanho_total -= anterior['tamanho']
+            self._acessos.pop(chave, None)
+                
+            cursor.execute("""
+                INSERT OR REPLACE INTO respostas (
+                    chave, url, status_code, corpo, etag, last_modified,
+                    expira_em, ultimo_acesso, tamanho
+                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+            """, (
+                chave, url, status_code, comprimido, etag, last_modified,
+                agora + ttl, agora, len(comprimido)
+            ))
+            self._tamanho_total += len(comprimido)
+            
+            self._remover_excedente(cursor)
+            self.conn.commit()
+            
+    def renovar(self, chave: str, ttl: int):
+        """
+        Renova a validade de uma entrada revalidada pelo servidor (304)
+        
+        Args:
+            chave: Chave da requisição
+            ttl: Novo tempo de vida em segundos
+        """
+        agora = time.time()
+        
+        with self._lock:
+            self.conn.execute("""
+                UPDATE respostas SET expira_em = ?, ultimo_acesso = ?
+                WHERE chave = ?
+            """, (agora + ttl, agora, chave))
+            self._acessos.pop(chave, None)
+            self.conn.commit()
+            
+    def _gravar_acessos(self, cursor: sqlite3.Cursor):
+        """Grava os acessos acumulados (com _lock, na transação em andamento)"""
+        if self._acessos:
+            cursor.executemany(
+                "UPDATE respostas SET ultimo_acesso = ? WHERE chave = ?",
+                [(acesso, chave) for chave, acesso in self._acessos.items()]
+            )
+            self._acessos.clear()
+        self._ultima_gravacao_acessos = time.monotonic()
+            
+    def _remover_excedente(self, cursor: sqlite3.Cursor):
+        """Remove as entradas menos usadas até respeitar o tamanho máximo"""
+        if self._tamanho_total <= self.tamanho_maximo:
+            return
+            
+        # A ordem LRU precisa dos acessos ainda em memória
+        self._gravar_acessos(cursor)
+        cursor.execute(
+            "SELECT chave, tamanho FROM respostas ORDER BY ultimo_acesso"
+        )
+        remover = []
+        for row in cursor.fetchall():
+            if self._tamanho_total <= self.tamanho_maximo:
+                break
+            remover.append((row['chave'],))
+            self._tamanho_total -= row['tamanho']
+            
+        cursor.executemany("DELETE FROM respostas WHERE chave = ?", remover)
+        logger.debug(f"Cache: {len(remover)} entradas removidas (LRU)")
+        
+    def limpar(self):
+        """Remove todas as entradas do cache"""
+        with self._lock:
+            self.conn.execute("DELETE FROM respostas")
+            self.conn.commit()
+            self._tamanho_total = 0
+            self._acessos.clear()
+            
+    def fechar(self):
+        """Grava os acessos pendentes e fecha a conexão com o arquivo do cache"""
+        with self._lock:
+            self._gravar_acessos(self.conn.cursor())
+            self.conn.commit()
+            self.conn.close()
@@ -0,0 +1,121 @@
+"""
+Compressão dos dados completos das contratações
+zlib com dicionário pré-definido, treinado a partir de registros já gravados
+"""
+
+import json
+import zlib
+from collections import Counter
+from typing import Dict, Iterable, Iterator, Optional
+
+# O zlib aproveita no máximo os últimos 32 KB do dicionário
+TAMANHO_MAXIMO_DICIONARIO = 32 * 1024
+
+NIVEL_COMPRESSAO = 9
+
+
+def serializar(contratacao: Dict) -> bytes:
+    """
+    Serializa uma contratação no formato usado para comprimir e treinar
+    
+    Args:
+        contratacao: Dados da contratação
+        
+    Returns:
+        JSON em UTF-8
+    """
+    return json.dumps(contratacao, ensure_ascii=False).encode('utf-8')
+
+
+def _fragmentos(valor) -> Iterator[str]:
+    """Gera os trechos "chave": valor de um JSON, como aparecem serializados"""
+    if isinstance(valor, dict):
+        for chave, item in valor.items():
+            chave_json = json.dumps(chave, ensure_ascii=False) + ": "
+            if isinstance(item, (dict, list)):
+                yield chave_json
+                yield from _fragmentos(item)
+            else:
+                yield chave_json + json.dumps(item, ensure_ascii=False)
+    elif isinstance(valor, list):
+        for item in valor:
+            yield from _fragmentos(item)
+
+
+def treinar_dicionario(
+    amostras: Iterable[Dict],
+    tamanho_maximo: int = TAMANHO_MAXIMO_DICIONARIO
+) -> bytes:
+    """
+    Monta um dicionário zlib com os trechos mais frequentes das amostras
+    
+    Os registros do PNCP repetem chaves e muitos valores (órgão, modalidade,
+    situação). Trechos presentes em mais de uma amostra entram no dicionário
+    por ordem de ganho (frequência x tamanho), com os mais valiosos no final,
+    onde o zlib os alcança com distâncias menores.
+    
+    Args:
+        amostras: Contratações usadas no treino
+        tamanho_maximo: Tamanho máximo do dicionário em bytes
+        
+    Returns:
+        Dicionário para zlib (vazio se não houver trechos repetidos)
+    """
+    contagem = Counter()
+    for amostra in amostras:
+        # Cada trecho conta uma vez por amostra
+        contagem.update(set(_fragmentos(amostra)))
+        
+    repetidos = [
+        (quantidade * len(trecho.encode('utf-8')), trecho)
+        for trecho, quantidade in contagem.items()
+        if quantidade > 1
+    ]
+    repetidos.sort(reverse=True)
+    
+    selecionados = []
+    tamanho = 0
+    for _, trecho in repetidos:
+        dados = trecho.encode('utf-8') + b", "
+        if tamanho + len(dados) > tamanho_maximo:
+            continue
+        selecionados.append(dados)
+        tamanho += len(dados)
+        
+    return b"".join(reversed(selecionados))
+
+
+def comprimir(dados: bytes, dicionario: Optional[bytes] = None) -> bytes:
+    """
+    Comprime dados, opcionalmente com um dicionário pré-definido
+    
+    Args:
+        dados: Dados a comprimir
+        dicionario: Dicionário zlib (None = sem dicionário)
+        
+    Returns:
+        Dados comprimidos
+    """
+    if dicionario:
+        compressor = zlib.compressobj(NIVEL_COMPRESSAO, zdict=dicionario)
+    else:
+        compressor = zlib.compressobj(NIVEL_COMPRESSAO)
+    return compressor.compress(dados) + compressor.flush()
+
+
+def descomprimir(dados: bytes, dicionario: Optional[bytes] = None) -> bytes:
+    """
+    Descomprime dados gerados por `comprimir`
+    
+    Args:
+        dados: Dados comprimidos
+        dicionario: O mesmo dicionário usado na compressão
+        
+    Returns:
+        Dados originais
+    """
+    if dicionario:
+        descompressor = zlib.decompressobj(zdict=dicionario)
+    else:
+        descompressor = zlib.decompressobj()
+    return descompressor.decompress(dados) + descompressor.flush()
@@ -6,38 +6,169 @@ Armazena contratações e controla notificações
 import sqlite3
 import json
 import logging
-from datetime import datetime
-from typing import List, Dict, Optional
+import threading
+import queue
+import time
+import uuid
+import calendar
+import re
+from contextlib import contextmanager, ExitStack
+from datetime import datetime, timezone
+from typing import List, Dict, Optional, Iterable, Iterator
 from pathlib import Path
 
+from armazenamento import Armazenamento, _sincronizado, _para_epoch, _hash_conteudo
+from compressao import serializar, treinar_dicionario, comprimir, descomprimir
+
 logger = logging.getLogger(__name__)
 
 
-class Database:
+class Database(Armazenamento):
     """Gerenciador de banco de dados SQLite"""
     
-    def __init__(self, db_path: str = "pncp_monitor.db"):
+    # Ajustes aplicados às conexões no modo WAL
+    PRAGMAS_WAL = {
+        'synchronous': 'NORMAL',
+        'cache_size': -64000,      # ~64 MB
+        'mmap_size': 268435456,    # 256 MB
+        'busy_timeout': 5000,      # ms
+        'temp_store': 'MEMORY'
+    }
+    
+    # Colunas das listagens (sem os dados completos, lidos sob demanda)
+    COLUNAS_RESUMO = """
+        id, numero_compra, ano_compra, sequencial_compra, codigo_ibge,
+        cnpj_orgao, objeto, valor_estimado, valor_homologado,
+        modalidade_codigo, modalidade_nome, data_publicacao, situacao,
+        orgao_nome, link_pncp, data_captura, notificado, data_notificacao,
+        data_publicacao_ts
+    """
+    
+    # Registros necessários para treinar o dicionário de compressão
+    AMOSTRAS_DICIONARIO = 200
+    
+    # Migrações de esquema, aplicadas em ordem e registradas em user_version
+    MIGRACOES = [
+        (1, '_migracao_datas_epoch'),
+        (2, '_migracao_reserva_notificacao'),
+        (3, '_migracao_geracao'),
+        (4, '_migracao_series'),
+        (5, '_migracao_versoes'),
+        (6, '_migracao_dados_completos'),
+    ]
+    
+    # Séries temporais: granularidade -> (tabela, formato do período)
+    SERIES = {
+        'dia': ('serie_diaria', '%Y-%m-%d'),
+        'mes': ('serie_mensal', '%Y-%m'),
+    }
+    
+    def __init__(
+        self,
+        db_path: str = "pncp_monitor.db",
+        modo_wal: bool = False,
+        max_leitores: int = 4
+    ):
         """
         Inicializa o banco de dados
         
         Args:
             db_path: Caminho para o arquivo do banco de dados
+            modo_wal: Usar WAL, com uma conexão de escrita e um pool de
+                conexões somente leitura para as consultas
+            max_leitores: Tamanho máximo do pool de leitura (modo WAL)
         """
         self.db_path = db_path
         self.conn = None
+        self._lock = threading.RLock()
+        
+        if modo_wal and db_path == ":memory:":
+            logger.warning("Modo WAL indisponível para banco em memória")
+            modo_wal = False
+        self.modo_wal = modo_wal
+        
+        self.max_leitores = max_leitores
+        self._leitores: queue.Queue = queue.Queue()
+        self._total_leitores = 0
+        
+        # Dicionários de compressão por id e o usado nas novas gravações
+        self._dicionarios: Dict[int, bytes] = {}
+        self._dicionario_atual: Optional[int] = None
+        
+        # Desativada se o SQLite não tiver FTS5
+        self.busca_disponivel = True
+        
         self._conectar()
         self._criar_tabelas()
+        self._carregar_dicionario()
+        self._aplicar_migracoes()
     
     def _conectar(self):
         """Conecta ao banco de dados"""
         try:
-            self.conn = sqlite3.connect(self.db_path)
+            # A conexão pode ser usada por várias threads (acesso serializado)
+            self.conn = sqlite3.connect(self.db_path, check_same_thread=False)
             self.conn.row_factory = sqlite3.Row  # Permite acesso por nome de coluna
+            self.conn.create_function("pncp_epoch", 1, _para_epoch, deterministic=True)
+            
+            if self.modo_wal:
+                self.conn.execute("PRAGMA journal_mode = WAL")
+                self._aplicar_pragmas(self.conn)
+                
             logger.info(f"Conectado ao banco de dados: {self.db_path}")
         except sqlite3.Error as e:
             logger.error(f"Erro ao conectar ao banco de dados: {e}")
             raise
     
+    def _aplicar_pragmas(self, conn: sqlite3.Connection):
+        """Aplica os ajustes de desempenho do modo WAL a uma conexão"""
+        for pragma, valor in self.PRAGMAS_WAL.items():
+            conn.execute(f"PRAGMA {pragma} = {valor}")
+    
+    def _abrir_leitor(self) -> sqlite3.Connection:
+        """Abre uma conexão somente leitura para o pool"""
+        uri = f"{Path(self.db_path).resolve().as_uri()}?mode=ro"
+        conn = sqlite3.connect(uri, uri=True, check_same_thread=False)
+        conn.row_factory = sqlite3.Row
+        self._aplicar_pragmas(conn)
+        return conn
+    
+    @contextmanager
+    def _leitura(self):
+        """
+        Fornece uma conexão para consultas
+        
+        No modo WAL, empresta uma conexão somente leitura do pool, que não
+        bloqueia nem é bloqueada pela escrita. Fora dele, usa a conexão
+        principal com acesso serializado.
+        """
+        if not self.modo_wal:
+            with self._lock:
+                yield self.conn
+            return
+            
+        try:
+            conn = self._leitores.get_nowait()
+        except queue.Empty:
+            with self._lock:
+                criar = self._total_leitores < self.max_leitores
+                if criar:
+                    self._total_leitores += 1
+            if not criar:
+                conn = self._leitores.get()
+            else:
+                try:
+                    conn = self._abrir_leitor()
+                except sqlite3.Error:
+                    with self._lock:
+                        self._total_leitores -= 1
+                    raise
+            
+        try:
+            yield conn
+        finally:
+            self._leitores.put(conn)
+    
     def _criar_tabelas(self):
         """Cria as tabelas necessárias"""
         cursor = self.conn.cursor()
@@ -68,6 +199,25 @@ class Database:
             )
         """)
         
+        # Dados completos (JSON da API) comprimidos, lidos apenas sob demanda
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS contratacoes_dados (
+                contratacao_id INTEGER PRIMARY KEY REFERENCES contratacoes(id),
+                dicionario_id INTEGER REFERENCES dicionarios_compressao(id),
+                dados BLOB NOT NULL
+            )
+        """)
+        
+        # Dicionários zlib treinados com os próprios registros
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS dicionarios_compressao (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                dicionario BLOB NOT NULL,
+                amostras INTEGER,
+                data_criacao TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        """)
+        
         # Tabela de configurações
         cursor.execute("""
             CREATE TABLE IF NOT EXISTS configuracoes (
@@ -77,11 +227,40 @@ class Database:
             )
         """)
         
+        # Marcas d'água da sincronização incremental
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS sincronizacao (
+                codigo_ibge TEXT NOT NULL,
+                modalidade_codigo INTEGER NOT NULL,
+                ultima_publicacao TEXT NOT NULL,
+                data_atualizacao TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                PRIMARY KEY (codigo_ibge, modalidade_codigo)
+            )
+        """)
+        
+        # Unidades de trabalho da carga histórica (mês x modalidade x página)
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS backfill_unidades (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                codigo_ibge TEXT NOT NULL,
+                modalidade_codigo INTEGER NOT NULL,
+                ano_mes TEXT NOT NULL,
+                pagina INTEGER NOT NULL,
+                status TEXT NOT NULL DEFAULT 'pendente',
+                tentativas INTEGER NOT NULL DEFAULT 0,
+                registros INTEGER,
+                erro TEXT,
+                data_atualizacao TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                UNIQUE(codigo_ibge, modalidade_codigo, ano_mes, pagina)
+            )
+        """)
+        
         # Tabela de log de execuções
         cursor.execute("""
             CREATE TABLE IF NOT EXISTS log_execucoes (
                 id INTEGER PRIMARY KEY AUTOINCREMENT,
                 data_execucao TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                codigo_ibge TEXT,
                 contratacoes_encontradas INTEGER,
                 contratacoes_novas INTEGER,
                 sucesso BOOLEAN,
@@ -89,314 +268,2291 @@ class Database:
             )
         """)
         
-        # Índices para melhorar performance
-        cursor.execute("""
-            CREATE INDEX IF NOT EXISTS idx_data_publicacao 
-            ON contratacoes(data_publicacao)
-        """)
+        # Bancos criados antes do monitor multi-município
+        self._adicionar_coluna("log_execucoes", "codigo_ibge", "TEXT")
         
+        # Índices para melhorar performance (os de data vêm das migrações)
         cursor.execute("""
             CREATE INDEX IF NOT EXISTS idx_notificado 
             ON contratacoes(notificado)
         """)
         
-        cursor.execute("""
-            CREATE INDEX IF NOT EXISTS idx_modalidade 
-            ON contratacoes(modalidade_codigo)
-        """)
+        # Substituído pelos índices de modalidade + data das migrações
+        cursor.execute("DROP INDEX IF EXISTS idx_modalidade")
+        
+        self._criar_estatisticas(cursor)
+        self._criar_busca(cursor)
         
         self.conn.commit()
         logger.info("Tabelas criadas/verificadas com sucesso")
     
-    def salvar_contratacao(self, contratacao: Dict) -> bool:
+    @_sincronizado
+    def _aplicar_migracoes(self):
         """
-        Salva uma contratação no banco de dados
+        Aplica as migrações de esquema pendentes
         
-        Args:
-            contratacao: Dados da contratação
-            
-        Returns:
-            True se foi uma nova contratação, False se já existia
+        A versão do esquema fica em PRAGMA user_version. Cada migração é
+        idempotente: se for interrompida, é executada de novo por inteiro
+        na próxima abertura do banco.
+        """
+        versao = self.conn.execute("PRAGMA user_version").fetchone()[0]
+        
+        for numero, metodo in self.MIGRACOES:
+            if numero <= versao:
+                continue
+                
+            logger.info(f"Aplicando migração {numero} ({metodo})")
+            try:
+                getattr(self, metodo)()
+                self.conn.execute(f"PRAGMA user_version = {numero}")
+                self.conn.commit()
+            except sqlite3.Error:
+                self.conn.rollback()
+                logger.error(f"Falha na migração {numero}")
+                raise
+            versao = numero
+    
+    def _migracao_datas_epoch(self, tamanho_lote: int = 5000):
+        """
+        Migração 1: data de publicação como inteiro (epoch) indexado
+        
+        As comparações de período e a ordenação passam a usar
+        data_publicacao_ts, independente do formato do texto da API.
+        O preenchimento é feito em lotes por faixa de id, cada um com
+        seu próprio commit.
         """
+        self._adicionar_coluna("contratacoes", "data_publicacao_ts", "INTEGER")
+        
         cursor = self.conn.cursor()
+        cursor.execute("SELECT COALESCE(MAX(id), 0) FROM contratacoes")
+        maior_id = cursor.fetchone()[0]
         
-        try:
-            # Extrair dados principais
-            cnpj_orgao = contratacao.get('orgaoEntidade', {}).get('cnpj', '')
-            ano_compra = contratacao.get('anoCompra')
-            sequencial_compra = contratacao.get('sequencialCompra')
-            
-            # Verificar se já existe
-            cursor.execute("""
-                SELECT id FROM contratacoes 
-                WHERE cnpj_orgao = ? AND ano_compra = ? AND sequencial_compra = ?
-            """, (cnpj_orgao, ano_compra, sequencial_compra))
-            
-            existe = cursor.fetchone()
-            
-            if existe:
-                logger.debug(f"Contratação já existe: {ano_compra}/{sequencial_compra}")
-                return False
-            
-            # Inserir nova contratação
+        for inicio in range(0, maior_id, tamanho_lote):
             cursor.execute("""
-                INSERT INTO contratacoes (
-                    numero_compra, ano_compra, sequencial_compra,
-                    codigo_ibge, cnpj_orgao, objeto,
-                    valor_estimado, valor_homologado,
-                    modalidade_codigo, modalidade_nome,
-                    data_publicacao, situacao, orgao_nome,
-                    link_pncp, dados_completos
-                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-            """, (
-                contratacao.get('numeroCompra'),
-                ano_compra,
-                sequencial_compra,
-                contratacao.get('codigoMunicipioIbge'),
-                cnpj_orgao,
-                contratacao.get('objetoCompra'),
-                contratacao.get('valorTotalEstimado'),
-                contratacao.get('valorTotalHomologado'),
-                contratacao.get('_modalidade_codigo'),
-                contratacao.get('_modalidade_nome'),
-                contratacao.get('dataPublicacaoPncp'),
-                contratacao.get('situacaoCompra'),
-                contratacao.get('orgaoEntidade', {}).get('razaoSocial'),
-                self._gerar_link_pncp(contratacao),
-                json.dumps(contratacao, ensure_ascii=False)
-            ))
-            
+                UPDATE contratacoes SET data_publicacao_ts = pncp_epoch(data_publicacao)
+                WHERE id > ? AND id <= ? AND data_publicacao_ts IS NULL
+            """, (inicio, inicio + tamanho_lote))
             self.conn.commit()
-            logger.info(f"Nova contratação salva: {ano_compra}/{sequencial_compra}")
-            return True
-            
-        except sqlite3.IntegrityError:
-            logger.debug("Contratação duplicada (ignorada)")
-            return False
-        except Exception as e:
-            logger.error(f"Erro ao salvar contratação: {e}")
-            self.conn.rollback()
-            return False
+            
+        cursor.execute("""
+            CREATE INDEX IF NOT EXISTS idx_data_publicacao_ts 
+            ON contratacoes(data_publicacao_ts)
+        """)
+        
+        # Filtro por modalidade + período na ordem da paginação; o id
+        # (rowid) já faz parte de toda entrada de índice
+        cursor.execute("""
+            CREATE INDEX IF NOT EXISTS idx_modalidade_data_ts 
+            ON contratacoes(modalidade_codigo, data_publicacao_ts)
+        """)
+        
+        cursor.execute("DROP INDEX IF EXISTS idx_data_publicacao")
+        cursor.execute("DROP INDEX IF EXISTS idx_modalidade_data")
     
-    def salvar_contratacoes(self, contratacoes: List[Dict]) -> int:
+    def _migracao_reserva_notificacao(self):
         """
-        Salva múltiplas contratações
+        Migração 2: reserva de lotes de notificação
         
-        Args:
-            contratacoes: Lista de contratações
-            
-        Returns:
-            Número de novas contratações salvas
+        Uma execução reserva contratações pendentes com um token antes de
+        enviá-las; outra execução simultânea não pega as mesmas linhas
+        enquanto a reserva for válida.
         """
-        novas = 0
-        for contratacao in contratacoes:
-            if self.salvar_contratacao(contratacao):
-                novas += 1
-        return novas
+        self._adicionar_coluna("contratacoes", "reserva_notificacao", "TEXT")
+        self._adicionar_coluna("contratacoes", "reservado_em", "INTEGER")
+        
+        self.conn.execute("""
+            CREATE INDEX IF NOT EXISTS idx_reserva_notificacao 
+            ON contratacoes(reserva_notificacao) 
+            WHERE reserva_notificacao IS NOT NULL
+        """)
     
-    def buscar_contratacoes_nao_notificadas(self) -> List[Dict]:
+    def _migracao_geracao(self):
         """
-        Busca contratações que ainda não foram notificadas
+        Migração 3: contador de geração das gravações
         
-        Returns:
-            Lista de contratações não notificadas
+        Cada gravação que insere contratações incrementa a geração em
+        configuracoes, e as linhas inseridas guardam esse número. Exportações
+        e caches identificam o que mudou desde uma geração conhecida.
         """
-        cursor = self.conn.cursor()
-        cursor.execute("""
-            SELECT * FROM contratacoes 
-            WHERE notificado = 0 
-            ORDER BY data_publicacao DESC
-        """)
+        self._adicionar_coluna("contratacoes", "geracao", "INTEGER NOT NULL DEFAULT 0")
         
-        rows = cursor.fetchall()
-        return [dict(row) for row in rows]
+        self.conn.execute("""
+            CREATE INDEX IF NOT EXISTS idx_geracao 
+            ON contratacoes(geracao)
+        """)
+        self.conn.execute("""
+            INSERT OR IGNORE INTO configuracoes (chave, valor) VALUES ('geracao', '0')
+        """)
     
-    def marcar_como_notificado(self, contratacao_id: int):
+    def _migracao_series(self):
         """
-        Marca uma contratação como notificada
+        Migração 4: séries temporais por dia e por mês
         
-        Args:
-            contratacao_id: ID da contratação
+        Tabelas com quantidade e valor estimado por período de publicação x
+        modalidade x órgão x município, mantidas por gatilhos como as
+        estatísticas. Bancos existentes (e arquivos) são totalizados aqui.
         """
+        # Totais dos arquivos antes de qualquer escrita (ATTACH fora de transação)
+        totais_arquivos = []
+        for ano in self.listar_arquivos():
+            with self._anexar(self.conn, ano) as esquema:
+                totais_arquivos.append(
+                    self._totais_series(f"SELECT * FROM {esquema}.contratacoes")
+                )
+        
         cursor = self.conn.cursor()
-        cursor.execute("""
-            UPDATE contratacoes 
-            SET notificado = 1, data_notificacao = CURRENT_TIMESTAMP 
-            WHERE id = ?
-        """, (contratacao_id,))
-        self.conn.commit()
+        for tabela, formato in self.SERIES.values():
+            self._criar_serie(cursor, tabela, formato)
+            
+        self._somar_series(self._totais_series("SELECT * FROM main.contratacoes"))
+        for totais in totais_arquivos:
+            self._somar_series(totais)
     
-    def buscar_contratacoes(
-        self,
-        limite: int = 100,
-        offset: int = 0,
-        modalidade: Optional[int] = None,
-        data_inicio: Optional[str] = None,
-        data_fim: Optional[str] = None
-    ) -> List[Dict]:
+    def _migracao_versoes(self):
         """
-        Busca contratações com filtros
+        Migração 5: hash do conteúdo e histórico de versões
         
-        Args:
-            limite: Número máximo de registros
-            offset: Deslocamento para paginação
-            modalidade: Filtrar por código de modalidade
-            data_inicio: Data inicial (formato ISO)
-            data_fim: Data final (formato ISO)
-            
-        Returns:
-            Lista de contratações
+        Cada contratação guarda o hash do JSON recebido, e a gravação usa o
+        hash para separar registros novos, alterados e inalterados. As
+        alterações ficam em contratacoes_versoes. Linhas gravadas antes da
+        migração recebem o hash na próxima vez que forem recebidas.
         """
-        cursor = self.conn.cursor()
-        
-        query = "SELECT * FROM contratacoes WHERE 1=1"
-        params = []
-        
-        if modalidade is not None:
-            query += " AND modalidade_codigo = ?"
-            params.append(modalidade)
-        
-        if data_inicio:
-            query += " AND data_publicacao >= ?"
-            params.append(data_inicio)
+        self._adicionar_coluna("contratacoes", "hash_conteudo", "TEXT")
         
-        if data_fim:
-            query += " AND data_publicacao <= ?"
-            params.append(data_fim)
+        self.conn.execute("""
+            CREATE TABLE IF NOT EXISTS contratacoes_versoes (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                contratacao_id INTEGER NOT NULL,
+                geracao INTEGER NOT NULL,
+                hash_anterior TEXT,
+                hash_novo TEXT NOT NULL,
+                alteracoes TEXT NOT NULL,
+                data_alteracao TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        """)
+        self.conn.execute("""
+            CREATE INDEX IF NOT EXISTS idx_versoes_contratacao 
+            ON contratacoes_versoes(contratacao_id)
+        """)
+    
+    def _criar_serie(self, cursor: sqlite3.Cursor, tabela: str, formato: str):
+        """Cria a tabela de uma série temporal e os gatilhos que a mantêm"""
+        # Dimensões ausentes são guardadas como 0/'' (chave primária)
+        cursor.execute(f"""
+            CREATE TABLE IF NOT EXISTS {tabela} (
+                periodo TEXT NOT NULL,
+                modalidade_codigo INTEGER NOT NULL,
+                cnpj_orgao TEXT NOT NULL,
+                codigo_ibge TEXT NOT NULL,
+                modalidade_nome TEXT,
+                orgao_nome TEXT,
+                quantidade INTEGER NOT NULL DEFAULT 0,
+                valor_estimado REAL NOT NULL DEFAULT 0,
+                PRIMARY KEY (periodo, modalidade_codigo, cnpj_orgao, codigo_ibge)
+            ) WITHOUT ROWID
+        """)
         
-        query += " ORDER BY data_publicacao DESC LIMIT ? OFFSET ?"
-        params.extend([limite, offset])
+        somar = f"""
+            INSERT INTO {tabela} (
+                periodo, modalidade_codigo, cnpj_orgao, codigo_ibge,
+                modalidade_nome, orgao_nome, quantidade, valor_estimado
+            )
+            SELECT
+                strftime('{formato}', NEW.data_publicacao_ts, 'unixepoch'),
+                COALESCE(NEW.modalidade_codigo, 0), COALESCE(NEW.cnpj_orgao, ''),
+                COALESCE(NEW.codigo_ibge, ''), NEW.modalidade_nome, NEW.orgao_nome,
+                1, COALESCE(NEW.valor_estimado, 0)
+            WHERE NEW.data_publicacao_ts IS NOT NULL
+            ON CONFLICT(periodo, modalidade_codigo, cnpj_orgao, codigo_ibge) DO UPDATE SET
+                quantidade = quantidade + 1,
+                valor_estimado = valor_estimado + excluded.valor_estimado,
+                modalidade_nome = COALESCE(excluded.modalidade_nome, modalidade_nome),
+                orgao_nome = COALESCE(excluded.orgao_nome, orgao_nome);
+        """
+        subtrair = f"""
+            UPDATE {tabela} SET
+                quantidade = quantidade - 1,
+                valor_estimado = valor_estimado - COALESCE(OLD.valor_estimado, 0)
+            WHERE periodo = strftime('{formato}', OLD.data_publicacao_ts, 'unixepoch')
+                AND modalidade_codigo = COALESCE(OLD.modalidade_codigo, 0)
+                AND cnpj_orgao = COALESCE(OLD.cnpj_orgao, '')
+                AND codigo_ibge = COALESCE(OLD.codigo_ibge, '');
+        """
         
-        cursor.execute(query, params)
-        rows = cursor.fetchall()
-        return [dict(row) for row in rows]
+        cursor.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS trg_{tabela}_insert
+            AFTER INSERT ON contratacoes
+            BEGIN {somar} END
+        """)
+        cursor.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS trg_{tabela}_delete
+            AFTER DELETE ON contratacoes
+            BEGIN {subtrair} END
+        """)
+        cursor.execute(f"""
+            CREATE TRIGGER IF NOT EXISTS trg_{tabela}_update
+            AFTER UPDATE OF data_publicacao_ts, valor_estimado, modalidade_codigo,
+                cnpj_orgao, codigo_ibge ON contratacoes
+            BEGIN {subtrair} {somar} END
+        """)
     
-    def contar_contratacoes(
-        self,
-        modalidade: Optional[int] = None,
-        data_inicio: Optional[str] = None,
-        data_fim: Optional[str] = None
-    ) -> int:
+    def _criar_estatisticas(self, cursor: sqlite3.Cursor):
         """
-        Conta o total de contratações com filtros
+        Cria as tabelas de estatísticas e os gatilhos que as mantêm
         
-        Args:
-            modalidade: Filtrar por código de modalidade
-            data_inicio: Data inicial (formato ISO)
-            data_fim: Data final (formato ISO)
-            
-        Returns:
-            Número total de contratações
+        Os gatilhos atualizam os totais na mesma transação de cada
+        gravação, então obter_estatisticas não percorre a tabela de
+        contratações. Bancos existentes são totalizados na primeira vez.
         """
-        cursor = self.conn.cursor()
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS estatisticas_resumo (
+                id INTEGER PRIMARY KEY CHECK (id = 1),
+                total INTEGER NOT NULL DEFAULT 0,
+                valor_total_estimado REAL NOT NULL DEFAULT 0,
+                ultima_atualizacao TIMESTAMP
+            )
+        """)
         
-        query = "SELECT COUNT(*) as total FROM contratacoes WHERE 1=1"
-        params = []
+        # Modalidade sem nome é guardada como '' (chave primária)
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS estatisticas_modalidade (
+                modalidade_nome TEXT PRIMARY KEY,
+                quantidade INTEGER NOT NULL DEFAULT 0
+            )
+        """)
         
-        if modalidade is not None:
-            query += " AND modalidade_codigo = ?"
-            params.append(modalidade)
+        cursor.execute("""
+            CREATE TRIGGER IF NOT EXISTS trg_estatisticas_insert
+            AFTER INSERT ON contratacoes
+            BEGIN
+                UPDATE estatisticas_resumo SET
+                    total = total + 1,
+                    valor_total_estimado = valor_total_estimado + COALESCE(NEW.valor_estimado, 0),
+                    ultima_atualizacao = MAX(COALESCE(ultima_atualizacao, ''), NEW.data_captura)
+                WHERE id = 1;
+                
+                INSERT INTO estatisticas_modalidade (modalidade_nome, quantidade)
+                VALUES (COALESCE(NEW.modalidade_nome, ''), 1)
+                ON CONFLICT(modalidade_nome) DO UPDATE SET quantidade = quantidade + 1;
+            END
+        """)
         
-        if data_inicio:
-            query += " AND data_publicacao >= ?"
-            params.append(data_inicio)
+        cursor.execute("""
+            CREATE TRIGGER IF NOT EXISTS trg_estatisticas_delete
+            AFTER DELETE ON contratacoes
+            BEGIN
+                UPDATE estatisticas_resumo SET
+                    total = total - 1,
+                    valor_total_estimado = valor_total_estimado - COALESCE(OLD.valor_estimado, 0)
+                WHERE id = 1;
+                
+                UPDATE estatisticas_modalidade SET quantidade = quantidade - 1
+                WHERE modalidade_nome = COALESCE(OLD.modalidade_nome, '');
+            END
+        """)
         
-        if data_fim:
-            query += " AND data_publicacao <= ?"
-            params.append(data_fim)
+        cursor.execute("""
+            CREATE TRIGGER IF NOT EXISTS trg_estatisticas_update
+            AFTER UPDATE OF valor_estimado, modalidade_nome ON contratacoes
+            BEGIN
+                UPDATE estatisticas_resumo SET
+                    valor_total_estimado = valor_total_estimado
+                        - COALESCE(OLD.valor_estimado, 0) + COALESCE(NEW.valor_estimado, 0)
+                WHERE id = 1;
+                
+                UPDATE estatisticas_modalidade SET quantidade = quantidade - 1
+                WHERE modalidade_nome = COALESCE(OLD.modalidade_nome, '');
+                
+                INSERT INTO estatisticas_modalidade (modalidade_nome, quantidade)
+                VALUES (COALESCE(NEW.modalidade_nome, ''), 1)
+                ON CONFLICT(modalidade_nome) DO UPDATE SET quantidade = quantidade + 1;
+            END
+        """)
         
-        cursor.execute(query, params)
-        result = cursor.fetchone()
-        return result['total'] if result else 0
+        cursor.execute("SELECT 1 FROM estatisticas_resumo WHERE id = 1")
+        if cursor.fetchone() is None:
+            self._totalizar_estatisticas(cursor)
     
-    def obter_estatisticas(self) -> Dict:
+    def _criar_busca(self, cursor: sqlite3.Cursor):
         """
-        Obtém estatísticas gerais do banco de dados
+        Cria o índice de texto completo (FTS5) sobre objeto e órgão
         
-        Returns:
-            Dicionário com estatísticas
+        O índice referencia a própria tabela de contratações (external
+        content) e é mantido por gatilhos. O tokenizador unicode61 com
+        remove_diacritics ignora acentos: "manutencao" encontra "manutenção".
         """
-        cursor = self.conn.cursor()
+        cursor.execute("""
+            SELECT 1 FROM sqlite_master WHERE name = 'contratacoes_fts'
+        """)
+        existia = cursor.fetchone() is not None
+        
+        try:
+            cursor.execute("""
+                CREATE VIRTUAL TABLE IF NOT EXISTS contratacoes_fts USING fts5(
+                    objeto,
+                    orgao_nome,
+                    content='contratacoes',
+                    content_rowid='id',
+                    tokenize='unicode61 remove_diacritics 2'
+                )
+            """)
+        except sqlite3.OperationalError as e:
+            logger.warning(f"Busca textual indisponível (FTS5): {e}")
+            self.busca_disponivel = False
+            return
+        
+        cursor.execute("""
+            CREATE TRIGGER IF NOT EXISTS trg_busca_insert
+            AFTER INSERT ON contratacoes
+            BEGIN
+                INSERT INTO contratacoes_fts (rowid, objeto, orgao_nome)
+                VALUES (NEW.id, NEW.objeto, NEW.orgao_nome);
+            END
+        """)
         
-        # Total de contratações
-        cursor.execute("SELECT COUNT(*) as total FROM contratacoes")
-        total = cursor.fetchone()['total']
+        cursor.execute("""
+            CREATE TRIGGER IF NOT EXISTS trg_busca_delete
+            AFTER DELETE ON contratacoes
+            BEGIN
+                INSERT INTO contratacoes_fts (contratacoes_fts, rowid, objeto, orgao_nome)
+                VALUES ('delete', OLD.id, OLD.objeto, OLD.orgao_nome);
+            END
+        """)
         
-        # Contratações por modalidade
         cursor.execute("""
-            SELECT modalidade_nome, COUNT(*) as quantidade 
-            FROM contratacoes 
-            GROUP BY modalidade_nome 
-            ORDER BY quantidade DESC
+            CREATE TRIGGER IF NOT EXISTS trg_busca_update
+            AFTER UPDATE OF objeto, orgao_nome ON contratacoes
+            BEGIN
+                INSERT INTO contratacoes_fts (contratacoes_fts, rowid, objeto, orgao_nome)
+                VALUES ('delete', OLD.id, OLD.objeto, OLD.orgao_nome);
+                INSERT INTO contratacoes_fts (rowid, objeto, orgao_nome)
+                VALUES (NEW.id, NEW.objeto, NEW.orgao_nome);
+            END
         """)
-        por_modalidade = [dict(row) for row in cursor.fetchall()]
         
-        # Valor total estimado
-        cursor.execute("SELECT SUM(valor_estimado) as total FROM contratacoes")
-        valor_total = cursor.fetchone()['total'] or 0
+        if not existia:
+            # Indexa as contratações gravadas antes da busca existir
+            cursor.execute(
+                "INSERT INTO contratacoes_fts (contratacoes_fts) VALUES ('rebuild')"
+            )
+    
+    @_sincronizado
+    def reconstruir_busca(self):
+        """Reconstrói o índice de texto completo a partir das contratações"""
+        if not self.busca_disponivel:
+            raise RuntimeError("Busca textual indisponível: SQLite sem FTS5")
+            
+        self.conn.execute(
+            "INSERT INTO contratacoes_fts (contratacoes_fts) VALUES ('rebuild')"
+        )
+        self.conn.execute(
+            "INSERT INTO contratacoes_fts (contratacoes_fts) VALUES ('optimize')"
+        )
+        self.conn.commit()
+        logger.info("Índice de busca reconstruído")
+    
+    def _totalizar_estatisticas(self, cursor: sqlite3.Cursor):
+        """Recalcula as tabelas de estatísticas a partir das contratações"""
+        cursor.execute("DELETE FROM estatisticas_resumo")
+        cursor.execute("DELETE FROM estatisticas_modalidade")
         
-        # Última atualização
         cursor.execute("""
-            SELECT MAX(data_captura) as ultima_atualizacao 
+            INSERT INTO estatisticas_resumo (id, total, valor_total_estimado, ultima_atualizacao)
+            SELECT 1, COUNT(*), COALESCE(SUM(valor_estimado), 0), MAX(data_captura)
+            FROM contratacoes
+        """)
+        cursor.execute("""
+            INSERT INTO estatisticas_modalidade (modalidade_nome, quantidade)
+            SELECT COALESCE(modalidade_nome, ''), COUNT(*)
             FROM contratacoes
+            GROUP BY COALESCE(modalidade_nome, '')
         """)
-        ultima_atualizacao = cursor.fetchone()['ultima_atualizacao']
+    
+    @_sincronizado
+    def reconstruir_estatisticas(self):
+        """
+        Recalcula as estatísticas do zero (ex.: após edição manual do banco)
         
-        return {
-            'total_contratacoes': total,
-            'por_modalidade': por_modalidade,
-            'valor_total_estimado': valor_total,
-            'ultima_atualizacao': ultima_atualizacao
-        }
+        Inclui as séries temporais e as contratações movidas para os bancos
+        de arquivo.
+        """
+        # Totais dos arquivos antes da transação (ATTACH/DETACH fora dela)
+        totais_arquivos = []
+        series_arquivos = []
+        for ano in self.listar_arquivos():
+            with self._anexar(self.conn, ano) as esquema:
+                totais_arquivos.append(self._totais_por_modalidade(
+                    f"SELECT * FROM {esquema}.contratacoes"
+                ))
+                series_arquivos.append(self._totais_series(
+                    f"SELECT * FROM {esquema}.contratacoes"
+                ))
+        
+        cursor = self.conn.cursor()
+        try:
+            self._totalizar_estatisticas(cursor)
+            for totais in totais_arquivos:
+                self._somar_estatisticas(totais)
+                
+            for tabela, _ in self.SERIES.values():
+                cursor.execute(f"DELETE FROM {tabela}")
+            self._somar_series(self._totais_series("SELECT * FROM main.contratacoes"))
+            for totais in series_arquivos:
+                self._somar_series(totais)
+            self.conn.commit()
+        except sqlite3.Error:
+            self.conn.rollback()
+            raise
+        logger.info("Estatísticas reconstruídas")
     
-    def registrar_execucao(
-        self,
-        encontradas: int,
-        novas: int,
-        sucesso: bool,
-        mensagem: str = ""
-    ):
+    def _totais_por_modalidade(self, origem: str, params: tuple = ()) -> List[tuple]:
+        """Conta e soma o valor das contratações de `origem` por modalidade"""
+        return [
+            tuple(row) for row in self.conn.execute(f"""
+                SELECT COALESCE(modalidade_nome, ''), COUNT(*), COALESCE(SUM(valor_estimado), 0)
+                FROM ({origem})
+                GROUP BY 1
+            """, params).fetchall()
+        ]
+    
+    def _somar_estatisticas(self, totais: List[tuple]):
+        """Acrescenta às estatísticas totais (modalidade, quantidade, valor)"""
+        for modalidade_nome, quantidade, valor in totais:
+            self.conn.execute("""
+                UPDATE estatisticas_resumo SET
+                    total = total + ?,
+                    valor_total_estimado = valor_total_estimado + ?
+                WHERE id = 1
+            """, (quantidade, valor))
+            self.conn.execute("""
+                INSERT INTO estatisticas_modalidade (modalidade_nome, quantidade)
+                VALUES (?, ?)
+                ON CONFLICT(modalidade_nome) DO UPDATE SET quantidade = quantidade + excluded.quantidade
+            """, (modalidade_nome, quantidade))
+    
+    def _totais_series(self, origem: str, params: tuple = ()) -> Dict[str, List[tuple]]:
+        """Agrega as contratações de `origem` em cada granularidade das séries"""
+        totais = {}
+        for granularidade, (_, formato) in self.SERIES.items():
+            totais[granularidade] = [
+                tuple(row) for row in self.conn.execute(f"""
+                    SELECT
+                        strftime('{formato}', data_publicacao_ts, 'unixepoch'),
+                        COALESCE(modalidade_codigo, 0), COALESCE(cnpj_orgao, ''),
+                        COALESCE(codigo_ibge, ''), MAX(modalidade_nome), MAX(orgao_nome),
+                        COUNT(*), COALESCE(SUM(valor_estimado), 0)
+                    FROM ({origem})
+                    WHERE data_publicacao_ts IS NOT NULL
+                    GROUP BY 1, 2, 3, 4
+                """, params).fetchall()
+            ]
+        return totais
+    
+    def _somar_series(self, totais: Dict[str, List[tuple]]):
+        """Acrescenta às séries temporais os totais de `_totais_series`"""
+        for granularidade, linhas in totais.items():
+            tabela, _ = self.SERIES[granularidade]
+            self.conn.executemany(f"""
+                INSERT INTO {tabela} (
+                    periodo, modalidade_codigo, cnpj_orgao, codigo_ibge,
+                    modalidade_nome, orgao_nome, quantidade, valor_estimado
+                ) VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT(periodo, modalidade_codigo, cnpj_orgao, codigo_ibge) DO UPDATE SET
+                    quantidade = quantidade + excluded.quantidade,
+                    valor_estimado = valor_estimado + excluded.valor_estimado,
+                    modalidade_nome = COALESCE(excluded.modalidade_nome, modalidade_nome),
+                    orgao_nome = COALESCE(excluded.orgao_nome, orgao_nome)
+            """, linhas)
+    
+    def _adicionar_coluna(self, tabela: str, coluna: str, definicao: str):
         """
-        Registra uma execução do monitoramento
+        Adiciona uma coluna a uma tabela existente, se ainda não existir
         
         Args:
-            encontradas: Número de contratações encontradas
-            novas: Número de contratações novas
-            sucesso: Se a execução foi bem-sucedida
-            mensagem: Mensagem adicional
+            tabela: Nome da tabela
+            coluna: Nome da coluna
+            definicao: Tipo/definição SQL da coluna
         """
         cursor = self.conn.cursor()
-        cursor.execute("""
-            INSERT INTO log_execucoes (
-                contratacoes_encontradas,
-                contratacoes_novas,
-                sucesso,
-                mensagem
-            ) VALUES (?, ?, ?, ?)
-        """, (encontradas, novas, sucesso, mensagem))
-        self.conn.commit()
-    
-    def _gerar_link_pncp(self, contratacao: Dict) -> str:
-        """Gera o link para a contratação no portal PNCP"""
-        cnpj = contratacao.get('orgaoEntidade', {}).get('cnpj', '')
-        ano = contratacao.get('anoCompra', '')
-        sequencial = contratacao.get('sequencialCompra', '')
+        cursor.execute(f"PRAGMA table_info({tabela})")
+        colunas = {row['name'] for row in cursor.fetchall()}
         
-        if cnpj and ano and sequencial:
-            return f"https://pncp.gov.br/app/editais/{cnpj}/{ano}/{sequencial}"
-        return "N/A"
+        if coluna not in colunas:
+            cursor.execute(f"ALTER TABLE {tabela} ADD COLUMN {coluna} {definicao}")
+            logger.info(f"Coluna {tabela}.{coluna} adicionada")
     
-    def fechar(self):
-        """Fecha a conexão com o banco de dados"""
-        if self.conn:
-            self.conn.close()
-            logger.info("Conexão com banco de dados fechada")
+    # Contratações já existentes (mesmo órgão, ano e sequencial) são ignoradas
+    SQL_INSERIR_CONTRATACAO = """
+        INSERT INTO contratacoes (
+            numero_compra, ano_compra, sequencial_compra,
+            codigo_ibge, cnpj_orgao, objeto,
+            valor_estimado, valor_homologado,
+            modalidade_codigo, modalidade_nome,
+            data_publicacao, situacao, orgao_nome,
+            link_pncp, data_publicacao_ts, hash_conteudo, geracao
+        ) VALUES (
+            ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?,
+            (SELECT CAST(valor AS INTEGER) + 1 FROM configuracoes WHERE chave = 'geracao')
+        )
+        ON CONFLICT(cnpj_orgao, ano_compra, sequencial_compra) DO NOTHING
+    """
     
-    def __enter__(self):
-        """Suporte para context manager"""
-        return self
+    SQL_INSERIR_DADOS = """
+        INSERT OR IGNORE INTO contratacoes_dados (contratacao_id, dicionario_id, dados)
+        SELECT id, ?, ? FROM contratacoes
+        WHERE cnpj_orgao = ? AND ano_compra = ? AND sequencial_compra = ?
+    """
     
-    def __exit__(self, exc_type, exc_val, exc_tb):
-        """Suporte para context manager"""
-        self.fechar()
-
+    SQL_PROXIMA_GERACAO = """
+        (SELECT CAST(valor AS INTEGER) + 1 FROM configuracoes WHERE chave = 'geracao')
+    """
+    
+    # Afinidade das colunas numéricas de COLUNAS_LINHA (as demais são TEXT)
+    AFINIDADES_LINHA = {
+        'ano_compra': int, 'sequencial_compra': int, 'modalidade_codigo': int,
+        'data_publicacao_ts': int, 'valor_estimado': float, 'valor_homologado': float
+    }
+    
+    @classmethod
+    def _com_afinidade(cls, coluna: str, valor):
+        """
+        Converte um valor da API como o SQLite o gravaria na coluna
+        
+        Ex.: situacaoCompra 1 é gravada como '1' em situacao (TEXT); sem a
+        conversão, toda comparação com o valor gravado acusaria alteração.
+        """
+        if valor is None:
+            return None
+            
+        afinidade = cls.AFINIDADES_LINHA.get(coluna, str)
+        if afinidade is str:
+            if isinstance(valor, bool):
+                return str(int(valor))
+            return str(valor) if isinstance(valor, (int, float)) else valor
+            
+        if isinstance(valor, str):
+            for conversao in (int, float):
+                try:
+                    return conversao(valor)
+                except ValueError:
+                    pass
+        return valor
+        
+    @_sincronizado
+    def salvar_contratacoes(self, contratacoes: List[Dict]) -> int:
+        """
+        Salva múltiplas contratações em uma única transação
+        
+        O hash do conteúdo separa os registros: novos são inseridos;
+        alterados têm apenas as colunas diferentes atualizadas e uma versão
+        registrada em contratacoes_versoes; inalterados não geram escrita.
+        
+        Args:
+            contratacoes: Lista de contratações
+            
+        Returns:
+            Número de novas contratações salvas
+        """
+        # Chave (cnpj, ano, sequencial) -> (linha, hash, contratação); a última vence
+        entradas = {}
+        for contratacao in contratacoes:
+            try:
+                linha = self._linha_contratacao(contratacao)
+            except Exception as e:
+                logger.error(f"Contratação inválida (ignorada): {e}")
+                continue
+                
+            chave = (linha[4], linha[1], linha[2])
+            entradas[chave] = (linha, _hash_conteudo(contratacao), contratacao)
+                
+        if not entradas:
+            return 0
+            
+        dicionario = self._dicionarios.get(self._dicionario_atual)
+        
+        # Arquivos que podem conter contratações do lote, anexados antes da
+        # transação (ATTACH não pode ocorrer dentro dela)
+        arquivadas = self._arquivadas_por_ano(entradas)
+        with ExitStack() as anexos:
+            esquemas = {
+                ano: anexos.enter_context(self._anexar(self.conn, ano))
+                for ano in arquivadas
+            }
+            
+            try:
+                # Contratações já arquivadas: inalteradas são ignoradas,
+                # alteradas voltam ao banco principal na mesma transação e
+                # seguem como atualização
+                for ano, itens in sorted(arquivadas.items()):
+                    for chave in self._restaurar_do_arquivo(esquemas[ano], itens):
+                        del entradas[chave]
+                        
+                existentes = self._buscar_existentes(list(entradas)) if entradas else {}
+                
+                linhas = []
+                dados = []
+                alteradas = 0
+                for chave, (linha, hash_novo, contratacao) in entradas.items():
+                    existente = existentes.get(chave)
+                    if existente is not None and existente['hash_conteudo'] == hash_novo:
+                        continue
+                        
+                    comprimido = comprimir(serializar(contratacao), dicionario)
+                    if existente is None:
+                        linhas.append(linha + (hash_novo,))
+                        dados.append((self._dicionario_atual, comprimido) + chave)
+                    else:
+                        self._atualizar_contratacao(existente, linha, hash_novo, comprimido)
+                        alteradas += 1
+                        
+                # rowcount não inclui as linhas alteradas pelos gatilhos
+                novas = 0
+                if linhas:
+                    novas = self.conn.executemany(self.SQL_INSERIR_CONTRATACAO, linhas).rowcount
+                    self.conn.executemany(self.SQL_INSERIR_DADOS, dados)
+                
+                # As linhas gravadas já usaram a próxima geração
+                if novas or alteradas:
+                    self._avancar_geracao()
+                self.conn.commit()
+            except sqlite3.Error as e:
+                logger.error(f"Erro ao salvar contratações: {e}")
+                self.conn.rollback()
+                raise
+                
+        logger.info(
+            f"Contratações salvas: {novas} novas, {alteradas} alteradas "
+            f"de {len(entradas)}"
+        )
+        
+        if self._dicionario_atual is None and novas:
+            self._treinar_se_necessario()
+            
+        return novas
+    
+    def _buscar_existentes(self, chaves: List[tuple]) -> Dict[tuple, Dict]:
+        """
+        Busca as contratações já gravadas com as chaves informadas
+        
+        As chaves vão para uma tabela temporária e a busca é uma única
+        junção pelo índice único (cnpj, ano, sequencial).
+        
+        Returns:
+            Dicionário chave -> linha (colunas de COLUNAS_LINHA, id e hash)
+        """
+        self.conn.execute("""
+            CREATE TEMP TABLE IF NOT EXISTS lote_entrada (
+                cnpj_orgao TEXT, ano_compra INTEGER, sequencial_compra INTEGER
+            )
+        """)
+        self.conn.execute("DELETE FROM temp.lote_entrada")
+        self.conn.executemany("INSERT INTO temp.lote_entrada VALUES (?, ?, ?)", chaves)
+        
+        colunas = ", ".join(f"c.{coluna}" for coluna in self.COLUNAS_LINHA)
+        rows = self.conn.execute(f"""
+            SELECT c.id, c.hash_conteudo, {colunas}
+            FROM temp.lote_entrada e
+            JOIN main.contratacoes c 
+                ON c.cnpj_orgao = e.cnpj_orgao 
+                AND c.ano_compra = e.ano_compra 
+                AND c.sequencial_compra = e.sequencial_compra
+        """).fetchall()
+        
+        return {
+            (row['cnpj_orgao'], row['ano_compra'], row['sequencial_compra']): dict(row)
+            for row in rows
+        }
+    
+    def _arquivadas_por_ano(self, entradas: Dict[tuple, tuple]) -> Dict[int, List[tuple]]:
+        """
+        Separa as contratações do lote que podem estar nos arquivos anuais
+        
+        Uma contratação arquivada pode voltar da API (ex.: carga histórica de
+        um mês já arquivado). Sem conferir o arquivo, ela seria inserida de
+        novo no banco principal e contada duas vezes.
+        
+        Args:
+            entradas: Chave -> (linha, hash, contratação) de salvar_contratacoes
+            
+        Returns:
+            Ano com arquivo existente -> lista de (chave, hash novo)
+        """
+        limite = self._limite_arquivo(self.conn)
+        if limite is None:
+            return {}
+            
+        por_ano = {}
+        for chave, (linha, hash_novo, _) in entradas.items():
+            publicacao = linha[self.COLUNAS_LINHA.index('data_publicacao_ts')]
+            if publicacao is not None and publicacao < limite:
+                ano = datetime.fromtimestamp(publicacao, timezone.utc).year
+                por_ano.setdefault(ano, []).append((chave, hash_novo))
+                
+        arquivos = set(self.listar_arquivos()) if por_ano else set()
+        return {ano: itens for ano, itens in por_ano.items() if ano in arquivos}
+    
+    def _restaurar_do_arquivo(self, esquema: str, itens: List[tuple]) -> set:
+        """
+        Move de volta ao principal as contratações alteradas de um arquivo anexado
+        
+        Roda na transação de salvar_contratacoes: a gravação registra depois
+        a versão e a geração como em qualquer atualização.
+        
+        Args:
+            esquema: Arquivo anexado
+            itens: Lista de (chave, hash novo)
+            
+        Returns:
+            Chaves encontradas no arquivo com o mesmo hash
+        """
+        colunas = self._colunas_comuns(esquema)
+        selecao = "id, hash_conteudo" if "hash_conteudo" in colunas.split(", ") else "id"
+        
+        inalteradas = set()
+        ids = []
+        for chave, hash_novo in itens:
+            row = self.conn.execute(f"""
+                SELECT {selecao} FROM {esquema}.contratacoes 
+                WHERE cnpj_orgao = ? AND ano_compra = ? AND sequencial_compra = ?
+            """, chave).fetchone()
+            if row is None:
+                continue
+                
+            hash_atual = row['hash_conteudo'] if 'hash_conteudo' in row.keys() else None
+            if hash_atual is None:
+                # Arquivada antes da migração 5: hash calculado dos dados completos
+                dados = self.conn.execute(f"""
+                    SELECT dicionario_id, dados FROM {esquema}.contratacoes_dados 
+                    WHERE contratacao_id = ?
+                """, (row['id'],)).fetchone()
+                if dados is not None:
+                    hash_atual = _hash_conteudo(json.loads(self._descomprimir_dados(self.conn, dados)))
+                    
+            if hash_atual == hash_novo:
+                inalteradas.add(chave)
+            else:
+                ids.append(row['id'])
+                
+        if not ids:
+            return inalteradas
+            
+        self.conn.execute(
+            "CREATE TEMP TABLE IF NOT EXISTS lote_arquivo (id INTEGER PRIMARY KEY)"
+        )
+        self.conn.execute("DELETE FROM temp.lote_arquivo")
+        self.conn.executemany("INSERT INTO temp.lote_arquivo (id) VALUES (?)", [(i,) for i in ids])
+        
+        # Os gatilhos contam as linhas inseridas no principal; os totais do
+        # arquivo, somados no arquivamento, são descontados
+        lote = f"""
+            SELECT * FROM {esquema}.contratacoes 
+            WHERE id IN (SELECT id FROM temp.lote_arquivo)
+        """
+        self._somar_estatisticas([
+            (modalidade, -quantidade, -valor)
+            for modalidade, quantidade, valor in self._totais_por_modalidade(lote)
+        ])
+        self._somar_series({
+            granularidade: [linha[:6] + (-linha[6], -linha[7]) for linha in linhas]
+            for granularidade, linhas in self._totais_series(lote).items()
+        })
+        
+        self.conn.execute(f"""
+            INSERT INTO main.contratacoes ({colunas})
+            SELECT {colunas} FROM {esquema}.contratacoes 
+            WHERE id IN (SELECT id FROM temp.lote_arquivo)
+        """)
+        self.conn.execute(f"""
+            INSERT OR REPLACE INTO main.contratacoes_dados
+            SELECT * FROM {esquema}.contratacoes_dados 
+            WHERE contratacao_id IN (SELECT id FROM temp.lote_arquivo)
+        """)
+        self.conn.execute(f"""
+            DELETE FROM {esquema}.contratacoes_dados 
+            WHERE contratacao_id IN (SELECT id FROM temp.lote_arquivo)
+        """)
+        self.conn.execute(f"""
+            DELETE FROM {esquema}.contratacoes 
+            WHERE id IN (SELECT id FROM temp.lote_arquivo)
+        """)
+        
+        logger.info(f"{len(ids)} contratações alteradas restauradas de {esquema}")
+        return inalteradas
+    
+    def _atualizar_contratacao(
+        self,
+        existente: Dict,
+        linha: tuple,
+        hash_novo: str,
+        comprimido: bytes
+    ):
+        """
+        Grava uma versão alterada de uma contratação (na transação em andamento)
+        
+        Atualiza apenas as colunas que mudaram, substitui os dados completos
+        e registra a versão. Linhas sem hash (anteriores à migração 5)
+        recebem o hash sem registro de versão.
+        """
+        novos = {
+            coluna: self._com_afinidade(coluna, valor)
+            for coluna, valor in zip(self.COLUNAS_LINHA, linha)
+        }
+        alteracoes = {
+            coluna: [existente[coluna], valor]
+            for coluna, valor in novos.items()
+            if existente[coluna] != valor
+        }
+        
+        atribuicoes = [f"{coluna} = ?" for coluna in alteracoes]
+        params = [valor for _, valor in alteracoes.values()]
+        self.conn.execute(f"""
+            UPDATE contratacoes SET {", ".join(atribuicoes + ["hash_conteudo = ?"])},
+                geracao = {self.SQL_PROXIMA_GERACAO}
+            WHERE id = ?
+        """, params + [hash_novo, existente['id']])
+        
+        self.conn.execute("""
+            INSERT OR REPLACE INTO contratacoes_dados (contratacao_id, dicionario_id, dados)
+            VALUES (?, ?, ?)
+        """, (existente['id'], self._dicionario_atual, comprimido))
+        
+        if existente['hash_conteudo'] is not None:
+            self.conn.execute(f"""
+                INSERT INTO contratacoes_versoes (
+                    contratacao_id, geracao, hash_anterior, hash_novo, alteracoes
+                ) VALUES (?, {self.SQL_PROXIMA_GERACAO}, ?, ?, ?)
+            """, (
+                existente['id'], existente['hash_conteudo'], hash_novo,
+                json.dumps(alteracoes, ensure_ascii=False)
+            ))
+    
+    def obter_versoes(self, contratacao_id: int) -> List[Dict]:
+        """
+        Obtém o histórico de alterações de uma contratação
+        
+        Args:
+            contratacao_id: ID da contratação
+            
+        Returns:
+            Versões em ordem cronológica, com 'alteracoes' como dicionário
+            coluna -> [valor anterior, valor novo]
+        """
+        with self._leitura() as conn:
+            rows = conn.execute("""
+                SELECT id, geracao, hash_anterior, hash_novo, alteracoes, data_alteracao
+                FROM contratacoes_versoes 
+                WHERE contratacao_id = ? 
+                ORDER BY id
+            """, (contratacao_id,)).fetchall()
+            
+        versoes = []
+        for row in rows:
+            versao = dict(row)
+            versao['alteracoes'] = json.loads(versao['alteracoes'])
+            versoes.append(versao)
+        return versoes
+    
+    def _avancar_geracao(self):
+        """Incrementa o contador de geração (na transação em andamento)"""
+        self.conn.execute("""
+            UPDATE configuracoes 
+            SET valor = CAST(valor AS INTEGER) + 1, data_atualizacao = CURRENT_TIMESTAMP 
+            WHERE chave = 'geracao'
+        """)
+    
+    def obter_geracao(self) -> int:
+        """
+        Retorna a geração atual dos dados
+        
+        O número só aumenta e muda sempre que contratações são gravadas,
+        notificadas ou arquivadas.
+        
+        Returns:
+            Geração atual
+        """
+        with self._leitura() as conn:
+            row = conn.execute(
+                "SELECT valor FROM configuracoes WHERE chave = 'geracao'"
+            ).fetchone()
+        return int(row['valor']) if row else 0
+    
+    def obter_configuracao(self, chave: str, padrao: Optional[str] = None) -> Optional[str]:
+        """
+        Lê um valor da tabela de configurações
+        
+        Args:
+            chave: Nome da configuração
+            padrao: Valor retornado se a chave não existir
+            
+        Returns:
+            Valor armazenado ou `padrao`
+        """
+        with self._leitura() as conn:
+            row = conn.execute(
+                "SELECT valor FROM configuracoes WHERE chave = ?", (chave,)
+            ).fetchone()
+        return row['valor'] if row else padrao
+    
+    @_sincronizado
+    def definir_configuracao(self, chave: str, valor: str):
+        """
+        Grava um valor na tabela de configurações
+        
+        Args:
+            chave: Nome da configuração
+            valor: Valor a gravar
+        """
+        self.conn.execute("""
+            INSERT INTO configuracoes (chave, valor, data_atualizacao)
+            VALUES (?, ?, CURRENT_TIMESTAMP)
+            ON CONFLICT(chave) DO UPDATE SET
+                valor = excluded.valor, data_atualizacao = excluded.data_atualizacao
+        """, (chave, valor))
+        self.conn.commit()
+    
+    def iter_contratacoes_alteradas(
+        self,
+        geracao_inicial: int,
+        geracao_final: Optional[int] = None,
+        tamanho_lote: int = 1000,
+        dados_completos: bool = True
+    ) -> Iterator[List[Dict]]:
+        """
+        Percorre as contratações gravadas depois de uma geração
+        
+        Cada registro traz as colunas de resumo, a geração e, se pedido, os
+        dados completos já descomprimidos (chave 'dados_completos').
+        
+        Args:
+            geracao_inicial: Última geração já processada (exclusiva)
+            geracao_final: Geração máxima (inclusiva; None = atual)
+            tamanho_lote: Registros por lote
+            dados_completos: Incluir o JSON original da API
+            
+        Yields:
+            Lotes de contratações em ordem de id
+        """
+        if geracao_final is None:
+            geracao_final = self.obter_geracao()
+            
+        ultimo_id = 0
+        while True:
+            with self._leitura() as conn:
+                rows = conn.execute(f"""
+                    SELECT {self.COLUNAS_RESUMO}, geracao FROM contratacoes 
+                    WHERE geracao > ? AND geracao <= ? AND id > ? 
+                    ORDER BY id LIMIT ?
+                """, (geracao_inicial, geracao_final, ultimo_id, tamanho_lote)).fetchall()
+                lote = [dict(row) for row in rows]
+                
+                dados = {}
+                if dados_completos:
+                    self._ler_dados_completos(conn, "main", [c['id'] for c in lote], dados)
+                    
+            if not lote:
+                return
+                
+            if dados_completos:
+                for contratacao in lote:
+                    contratacao['dados_completos'] = dados.get(contratacao['id'])
+            ultimo_id = lote[-1]['id']
+            yield lote
+    
+    def _carregar_dicionario(self):
+        """Carrega o dicionário de compressão mais recente"""
+        cursor = self.conn.cursor()
+        cursor.execute("""
+            SELECT id, dicionario FROM dicionarios_compressao 
+            ORDER BY id DESC LIMIT 1
+        """)
+        row = cursor.fetchone()
+        
+        if row:
+            self._dicionarios[row['id']] = row['dicionario']
+            self._dicionario_atual = row['id']
+    
+    def _treinar_se_necessario(self):
+        """Treina o primeiro dicionário quando há amostras suficientes"""
+        cursor = self.conn.cursor()
+        cursor.execute("SELECT COUNT(*) as total FROM contratacoes_dados")
+        
+        if cursor.fetchone()['total'] >= self.AMOSTRAS_DICIONARIO:
+            self.treinar_dicionario_compressao()
+    
+    @_sincronizado
+    def treinar_dicionario_compressao(self) -> Optional[int]:
+        """
+        Treina um dicionário de compressão com os registros mais recentes
+        
+        As próximas gravações passam a usar o novo dicionário; registros
+        já gravados continuam legíveis com o dicionário em que foram
+        comprimidos.
+        
+        Returns:
+            Id do novo dicionário ou None se não houver amostras suficientes
+        """
+        cursor = self.conn.cursor()
+        cursor.execute("""
+            SELECT contratacao_id, dicionario_id, dados FROM contratacoes_dados 
+            ORDER BY contratacao_id DESC LIMIT ?
+        """, (self.AMOSTRAS_DICIONARIO,))
+        
+        amostras = [
+            json.loads(self._descomprimir_dados(self.conn, row))
+            for row in cursor.fetchall()
+        ]
+        dicionario = treinar_dicionario(amostras)
+        if not dicionario:
+            return None
+            
+        cursor.execute("""
+            INSERT INTO dicionarios_compressao (dicionario, amostras) 
+            VALUES (?, ?)
+        """, (dicionario, len(amostras)))
+        self.conn.commit()
+        
+        self._dicionarios[cursor.lastrowid] = dicionario
+        self._dicionario_atual = cursor.lastrowid
+        logger.info(
+            f"Dicionário de compressão {cursor.lastrowid} treinado com "
+            f"{len(amostras)} amostras ({len(dicionario)} bytes)"
+        )
+        return cursor.lastrowid
+    
+    def _descomprimir_dados(self, conn: sqlite3.Connection, row) -> bytes:
+        """Descomprime uma linha de contratacoes_dados"""
+        dicionario_id = row['dicionario_id']
+        dicionario = None
+        
+        if dicionario_id is not None:
+            dicionario = self._dicionarios.get(dicionario_id)
+            if dicionario is None:
+                # Dicionário criado por outra conexão/processo
+                dicionario = conn.execute(
+                    "SELECT dicionario FROM dicionarios_compressao WHERE id = ?",
+                    (dicionario_id,)
+                ).fetchone()['dicionario']
+                self._dicionarios[dicionario_id] = dicionario
+                
+        return descomprimir(row['dados'], dicionario)
+    
+    def _migracao_dados_completos(self, tamanho_lote: int = 1000):
+        """
+        Migração 6: move o JSON de contratacoes.dados_completos para contratacoes_dados
+        
+        Bancos criados antes da compressão guardam o JSON em texto na
+        própria tabela de contratações. Cada lote tem seu próprio commit;
+        depois da migração, VACUUM devolve o espaço liberado ao sistema de
+        arquivos.
+        """
+        cursor = self.conn.cursor()
+        cursor.execute("""
+            SELECT dados_completos FROM contratacoes 
+            WHERE dados_completos IS NOT NULL LIMIT ?
+        """, (self.AMOSTRAS_DICIONARIO,))
+        amostras = [json.loads(row['dados_completos']) for row in cursor.fetchall()]
+        
+        if not amostras:
+            return
+            
+        if self._dicionario_atual is None and len(amostras) >= self.AMOSTRAS_DICIONARIO:
+            dicionario = treinar_dicionario(amostras)
+            if dicionario:
+                cursor.execute("""
+                    INSERT INTO dicionarios_compressao (dicionario, amostras) 
+                    VALUES (?, ?)
+                """, (dicionario, len(amostras)))
+                self._dicionarios[cursor.lastrowid] = dicionario
+                self._dicionario_atual = cursor.lastrowid
+                
+        dicionario = self._dicionarios.get(self._dicionario_atual)
+        migradas = 0
+        
+        while True:
+            cursor.execute("""
+                SELECT id, dados_completos FROM contratacoes 
+                WHERE dados_completos IS NOT NULL LIMIT ?
+            """, (tamanho_lote,))
+            rows = cursor.fetchall()
+            if not rows:
+                break
+                
+            cursor.executemany("""
+                INSERT OR IGNORE INTO contratacoes_dados 
+                (contratacao_id, dicionario_id, dados) VALUES (?, ?, ?)
+            """, [
+                (
+                    row['id'],
+                    self._dicionario_atual,
+                    comprimir(row['dados_completos'].encode('utf-8'), dicionario)
+                )
+                for row in rows
+            ])
+            cursor.executemany(
+                "UPDATE contratacoes SET dados_completos = NULL WHERE id = ?",
+                [(row['id'],) for row in rows]
+            )
+            self.conn.commit()
+            migradas += len(rows)
+            
+        logger.info(f"Dados completos migrados para contratacoes_dados: {migradas}")
+    
+    def obter_dados_completos(self, contratacao_ids: Iterable[int]) -> Dict[int, Dict]:
+        """
+        Carrega o JSON original da API de contratações já gravadas
+        
+        Args:
+            contratacao_ids: IDs das contratações
+            
+        Returns:
+            Dicionário id -> dados completos (ids inexistentes são omitidos)
+        """
+        ids = list(contratacao_ids)
+        resultado = {}
+        
+        with self._leitura() as conn:
+            self._ler_dados_completos(conn, "main", ids, resultado)
+            
+            # Contratações arquivadas guardam os dados no arquivo do ano
+            for ano in self.listar_arquivos():
+                faltantes = [i for i in ids if i not in resultado]
+                if not faltantes:
+                    break
+                with self._anexar(conn, ano, somente_leitura=conn is not self.conn) as esquema:
+                    self._ler_dados_completos(conn, esquema, faltantes, resultado)
+                    
+        return resultado
+    
+    def obter_contratacao(self, contratacao_id: int) -> Optional[Dict]:
+        """
+        Obtém as colunas de resumo de uma contratação (inclusive arquivada)
+        
+        Args:
+            contratacao_id: ID da contratação
+            
+        Returns:
+            Contratação ou None se não existir
+        """
+        consulta = f"SELECT {self.COLUNAS_RESUMO} FROM {{esquema}}.contratacoes WHERE id = ?"
+        
+        with self._leitura() as conn:
+            row = conn.execute(consulta.format(esquema="main"), (contratacao_id,)).fetchone()
+            
+            for ano in self.listar_arquivos():
+                if row is not None:
+                    break
+                with self._anexar(conn, ano, somente_leitura=conn is not self.conn) as esquema:
+                    row = conn.execute(
+                        consulta.format(esquema=esquema), (contratacao_id,)
+                    ).fetchone()
+                    
+        return dict(row) if row else None
+    
+    def _ler_dados_completos(
+        self,
+        conn: sqlite3.Connection,
+        esquema: str,
+        ids: List[int],
+        resultado: Dict[int, Dict]
+    ):
+        """Lê e descomprime os dados completos de `ids` no esquema informado"""
+        # Lotes abaixo do limite de parâmetros do SQLite
+        for inicio in range(0, len(ids), 500):
+            lote = ids[inicio:inicio + 500]
+            marcadores = ", ".join("?" * len(lote))
+            cursor = conn.execute(f"""
+                SELECT contratacao_id, dicionario_id, dados 
+                FROM {esquema}.contratacoes_dados 
+                WHERE contratacao_id IN ({marcadores})
+            """, lote)
+            
+            for row in cursor.fetchall():
+                resultado[row['contratacao_id']] = json.loads(
+                    self._descomprimir_dados(conn, row)
+                )
+    
+    def caminho_arquivo(self, ano: int) -> Path:
+        """
+        Caminho do banco de arquivo de um ano
+        
+        Args:
+            ano: Ano de publicação
+            
+        Returns:
+            Arquivo ao lado do banco principal (ex.: pncp_monitor_arquivo_2022.db)
+        """
+        principal = Path(self.db_path)
+        return principal.with_name(f"{principal.stem}_arquivo_{ano}.db")
+    
+    def listar_arquivos(self) -> List[int]:
+        """
+        Lista os anos que já têm banco de arquivo
+        
+        Returns:
+            Anos em ordem crescente
+        """
+        if self.db_path == ":memory:":
+            return []
+            
+        principal = Path(self.db_path)
+        anos = []
+        for caminho in principal.parent.glob(f"{principal.stem}_arquivo_*.db"):
+            sufixo = caminho.stem.rsplit("_", 1)[-1]
+            if sufixo.isdigit():
+                anos.append(int(sufixo))
+        return sorted(anos)
+    
+    @contextmanager
+    def _anexar(self, conn: sqlite3.Connection, ano: int, somente_leitura: bool = False):
+        """
+        Anexa (ATTACH) o banco de arquivo de um ano à conexão
+        
+        Yields:
+            Nome do esquema anexado
+        """
+        esquema = f"arquivo_{ano}"
+        caminho = self.caminho_arquivo(ano).resolve()
+        
+        if somente_leitura:
+            conn.execute("ATTACH DATABASE ? AS " + esquema, (f"{caminho.as_uri()}?mode=ro",))
+        else:
+            conn.execute("ATTACH DATABASE ? AS " + esquema, (str(caminho),))
+            
+        try:
+            yield esquema
+        finally:
+            conn.execute(f"DETACH DATABASE {esquema}")
+    
+    @contextmanager
+    def _fonte_contratacoes(
+        self,
+        conn: sqlite3.Connection,
+        data_inicio: Optional[str] = None,
+        data_fim: Optional[str] = None
+    ):
+        """
+        Define de onde as consultas leem as contratações
+        
+        Sem filtro de data, ou com um período que não alcança o limite do
+        arquivamento, a consulta usa só o banco principal. Caso contrário
+        (início antes do limite, ou só a data final, que não tem limite
+        inferior), anexa os arquivos dos anos do período e os une ao
+        principal.
+        
+        Yields:
+            Expressão para o FROM ('contratacoes' ou uma subconsulta UNION ALL)
+        """
+        limite = self._limite_arquivo(conn)
+        inicio = _para_epoch(data_inicio) if data_inicio else None
+        fim = _para_epoch(data_fim) if data_fim else None
+        
+        if limite is None or (inicio is None and fim is None) or (
+                inicio is not None and inicio >= limite):
+            yield "contratacoes"
+            return
+            
+        arquivos = self.listar_arquivos()
+        if inicio is not None:
+            ano_inicial = datetime.fromtimestamp(inicio, timezone.utc).year
+        else:
+            ano_inicial = arquivos[0] if arquivos else 0
+        ano_final = datetime.fromtimestamp(
+            min(limite, fim) if fim is not None else limite, timezone.utc
+        ).year
+        anos = [ano for ano in arquivos if ano_inicial <= ano <= ano_final]
+        
+        with ExitStack() as pilha:
+            # Conexões do pool de leitura anexam em modo somente leitura
+            esquemas = [
+                pilha.enter_context(
+                    self._anexar(conn, ano, somente_leitura=conn is not self.conn)
+                )
+                for ano in anos
+            ]
+            partes = [f"SELECT {self.COLUNAS_RESUMO} FROM main.contratacoes"] + [
+                f"SELECT {self.COLUNAS_RESUMO} FROM {esquema}.contratacoes"
+                for esquema in esquemas
+            ]
+            yield "(" + " UNION ALL ".join(partes) + ")"
+    
+    def _limite_arquivo(self, conn: sqlite3.Connection) -> Optional[int]:
+        """Epoch abaixo do qual as contratações foram arquivadas (None = nunca)"""
+        row = conn.execute(
+            "SELECT valor FROM configuracoes WHERE chave = 'arquivo_limite_ts'"
+        ).fetchone()
+        return int(row['valor']) if row else None
+    
+    @_sincronizado
+    def arquivar(self, idade_dias: int = 730, tamanho_lote: int = 5000) -> Dict[int, int]:
+        """
+        Move contratações antigas para bancos de arquivo anuais
+        
+        Contratações publicadas há mais de `idade_dias` saem do banco
+        principal (com seus dados completos) para um arquivo por ano de
+        publicação. As estatísticas continuam contando os registros
+        arquivados; a busca textual passa a cobrir só o banco principal.
+        
+        Args:
+            idade_dias: Idade mínima (dias desde a publicação) para arquivar
+            tamanho_lote: Registros movidos por transação
+            
+        Returns:
+            Dicionário ano -> contratações arquivadas
+        """
+        if self.db_path == ":memory:":
+            raise ValueError("Arquivamento indisponível para banco em memória")
+            
+        limite = int(time.time()) - idade_dias * 24 * 3600
+        limite_anterior = self._limite_arquivo(self.conn)
+        if limite_anterior is not None and limite < limite_anterior:
+            # O limite só avança: consultas confiam nele para anexar arquivos
+            limite = limite_anterior
+            
+        anos = [
+            row[0] for row in self.conn.execute("""
+                SELECT DISTINCT CAST(strftime('%Y', data_publicacao_ts, 'unixepoch') AS INTEGER)
+                FROM contratacoes WHERE data_publicacao_ts < ?
+            """, (limite,)).fetchall()
+        ]
+        
+        # Registrar o limite antes de mover: consultas passam a anexar os arquivos
+        self.conn.execute("""
+            INSERT INTO configuracoes (chave, valor, data_atualizacao)
+            VALUES ('arquivo_limite_ts', ?, CURRENT_TIMESTAMP)
+            ON CONFLICT(chave) DO UPDATE SET
+                valor = excluded.valor, data_atualizacao = excluded.data_atualizacao
+        """, (str(limite),))
+        self.conn.commit()
+        
+        arquivadas = {}
+        for ano in sorted(anos):
+            inicio_ano = calendar.timegm((ano, 1, 1, 0, 0, 0))
+            fim_ano = min(calendar.timegm((ano + 1, 1, 1, 0, 0, 0)), limite)
+            
+            with self._anexar(self.conn, ano) as esquema:
+                self._preparar_arquivo(esquema)
+                arquivadas[ano] = self._mover_para_arquivo(
+                    esquema, inicio_ano, fim_ano, tamanho_lote
+                )
+            logger.info(f"Arquivo {ano}: {arquivadas[ano]} contratações arquivadas")
+            
+        return arquivadas
+    
+    def _preparar_arquivo(self, esquema: str):
+        """Cria no arquivo anexado as tabelas com o mesmo esquema do principal"""
+        for tabela in ("contratacoes", "contratacoes_dados", "dicionarios_compressao"):
+            sql = self.conn.execute(
+                "SELECT sql FROM main.sqlite_master WHERE type = 'table' AND name = ?",
+                (tabela,)
+            ).fetchone()['sql']
+            sql = re.sub(
+                r"^CREATE TABLE\s+(IF NOT EXISTS\s+)?",
+                f"CREATE TABLE IF NOT EXISTS {esquema}.",
+                sql.strip()
+            )
+            self.conn.execute(sql)
+            
+        self.conn.execute(f"""
+            CREATE INDEX IF NOT EXISTS {esquema}.idx_data_publicacao_ts 
+            ON contratacoes(data_publicacao_ts)
+        """)
+        self.conn.execute(f"""
+            CREATE INDEX IF NOT EXISTS {esquema}.idx_modalidade_data_ts 
+            ON contratacoes(modalidade_codigo, data_publicacao_ts)
+        """)
+        
+        # Os dados completos do arquivo usam os mesmos dicionários
+        self.conn.execute(f"""
+            INSERT OR IGNORE INTO {esquema}.dicionarios_compressao 
+            SELECT * FROM main.dicionarios_compressao
+        """)
+        self.conn.commit()
+    
+    def _mover_para_arquivo(
+        self,
+        esquema: str,
+        inicio: int,
+        fim: int,
+        tamanho_lote: int
+    ) -> int:
+        """Move em lotes as contratações publicadas em [inicio, fim) para o arquivo"""
+        colunas = self._colunas_comuns(esquema)
+        
+        self.conn.execute(
+            "CREATE TEMP TABLE IF NOT EXISTS lote_arquivo (id INTEGER PRIMARY KEY)"
+        )
+        movidas = 0
+        
+        while True:
+            try:
+                self.conn.execute("DELETE FROM temp.lote_arquivo")
+                self.conn.execute("""
+                    INSERT INTO temp.lote_arquivo (id)
+                    SELECT id FROM main.contratacoes 
+                    WHERE data_publicacao_ts >= ? AND data_publicacao_ts < ? 
+                    LIMIT ?
+                """, (inicio, fim, tamanho_lote))
+                
+                quantidade = self.conn.execute(
+                    "SELECT COUNT(*) FROM temp.lote_arquivo"
+                ).fetchone()[0]
+                if quantidade == 0:
+                    self.conn.commit()
+                    break
+                    
+                self._descartar_do_arquivo(esquema)
+                self.conn.execute(f"""
+                    INSERT INTO {esquema}.contratacoes ({colunas})
+                    SELECT {colunas} FROM main.contratacoes 
+                    WHERE id IN (SELECT id FROM temp.lote_arquivo)
+                """)
+                self.conn.execute(f"""
+                    INSERT INTO {esquema}.contratacoes_dados
+                    SELECT * FROM main.contratacoes_dados 
+                    WHERE contratacao_id IN (SELECT id FROM temp.lote_arquivo)
+                """)
+                
+                # Os gatilhos descontam as linhas removidas; as arquivadas
+                # continuam contando nas estatísticas e séries temporais
+                lote = """
+                    SELECT * FROM main.contratacoes 
+                    WHERE id IN (SELECT id FROM temp.lote_arquivo)
+                """
+                totais = self._totais_por_modalidade(lote)
+                series = self._totais_series(lote)
+                self.conn.execute("""
+                    DELETE FROM main.contratacoes_dados 
+                    WHERE contratacao_id IN (SELECT id FROM temp.lote_arquivo)
+                """)
+                self.conn.execute("""
+                    DELETE FROM main.contratacoes 
+                    WHERE id IN (SELECT id FROM temp.lote_arquivo)
+                """)
+                self._somar_estatisticas(totais)
+                self._somar_series(series)
+                
+                # Listagens sem filtro de data mudam: invalida os ETags
+                self._avancar_geracao()
+                self.conn.commit()
+                movidas += quantidade
+                
+            except sqlite3.Error:
+                self.conn.rollback()
+                raise
+                
+        return movidas
+    
+    def _descartar_do_arquivo(self, esquema: str):
+        """
+        Remove do arquivo as cópias antigas das contratações do lote
+        
+        A mesma contratação pode já estar no arquivo (ex.: gravada de novo
+        no principal por uma versão sem a conferência dos arquivos). A cópia
+        do principal é a mais recente e a substitui; os totais da antiga,
+        somados quando ela foi arquivada, são descontados.
+        """
+        antigas = f"""
+            SELECT a.* FROM {esquema}.contratacoes a
+            JOIN main.contratacoes c 
+                ON c.cnpj_orgao = a.cnpj_orgao 
+                AND c.ano_compra = a.ano_compra 
+                AND c.sequencial_compra = a.sequencial_compra
+            WHERE c.id IN (SELECT id FROM temp.lote_arquivo)
+        """
+        quantidade = self.conn.execute(f"SELECT COUNT(*) FROM ({antigas})").fetchone()[0]
+        if quantidade == 0:
+            return
+            
+        self._somar_estatisticas([
+            (modalidade, -quantidade, -valor)
+            for modalidade, quantidade, valor in self._totais_por_modalidade(antigas)
+        ])
+        self._somar_series({
+            granularidade: [linha[:6] + (-linha[6], -linha[7]) for linha in linhas]
+            for granularidade, linhas in self._totais_series(antigas).items()
+        })
+        
+        self.conn.execute(f"""
+            DELETE FROM {esquema}.contratacoes_dados 
+            WHERE contratacao_id IN (SELECT id FROM ({antigas}))
+        """)
+        self.conn.execute(f"""
+            DELETE FROM {esquema}.contratacoes 
+            WHERE id IN (SELECT id FROM ({antigas}))
+        """)
+        logger.info(f"{quantidade} cópias antigas substituídas em {esquema}")
+    
+    def _colunas_comuns(self, esquema: str) -> str:
+        """Colunas de contratacoes presentes no principal e no arquivo anexado"""
+        colunas_arquivo = {
+            row['name'] for row in self.conn.execute(f"PRAGMA {esquema}.table_info(contratacoes)")
+        }
+        return ", ".join(
+            row['name'] for row in self.conn.execute("PRAGMA main.table_info(contratacoes)")
+            if row['name'] in colunas_arquivo
+        )
+    
+    @_sincronizado
+    def compactar(self):
+        """Executa VACUUM para devolver ao disco o espaço liberado"""
+        self.conn.execute("VACUUM")
+        logger.info("Banco de dados compactado")
+    
+    def buscar_contratacoes_nao_notificadas(self, limite: Optional[int] = None) -> List[Dict]:
+        """
+        Busca contratações que ainda não foram notificadas
+        
+        Args:
+            limite: Número máximo de registros (None = todos)
+            
+        Returns:
+            Lista de contratações não notificadas
+        """
+        with self._leitura() as conn:
+            cursor = conn.cursor()
+            cursor.execute(f"""
+                SELECT {self.COLUNAS_RESUMO} FROM contratacoes 
+                WHERE notificado = 0 
+                ORDER BY data_publicacao_ts DESC 
+                LIMIT ?
+            """, (-1 if limite is None else limite,))
+            
+            rows = cursor.fetchall()
+            return [dict(row) for row in rows]
+    
+    @_sincronizado
+    def reservar_notificacoes(
+        self,
+        limite: int = 500,
+        validade_reserva: int = 15 * 60
+    ) -> tuple:
+        """
+        Reserva atomicamente um lote de contratações pendentes de notificação
+        
+        A seleção e a reserva acontecem em um único UPDATE, então duas
+        execuções simultâneas (mesmo em processos diferentes) nunca recebem
+        a mesma contratação. Reservas mais antigas que `validade_reserva`
+        são consideradas abandonadas e podem ser reservadas de novo.
+        
+        Args:
+            limite: Tamanho máximo do lote
+            validade_reserva: Segundos até uma reserva expirar
+            
+        Returns:
+            Tupla (token da reserva, lista de contratações reservadas)
+        """
+        token = uuid.uuid4().hex
+        agora = int(time.time())
+        
+        cursor = self.conn.cursor()
+        try:
+            cursor.execute("""
+                UPDATE contratacoes 
+                SET reserva_notificacao = ?, reservado_em = ? 
+                WHERE id IN (
+                    SELECT id FROM contratacoes 
+                    WHERE notificado = 0 
+                      AND (reserva_notificacao IS NULL OR reservado_em < ?) 
+                    ORDER BY id 
+                    LIMIT ?
+                )
+            """, (token, agora, agora - validade_reserva, limite))
+            self.conn.commit()
+        except sqlite3.Error:
+            self.conn.rollback()
+            raise
+            
+        if cursor.rowcount == 0:
+            return token, []
+            
+        cursor.execute(f"""
+            SELECT {self.COLUNAS_RESUMO} FROM contratacoes 
+            WHERE reserva_notificacao = ? 
+            ORDER BY data_publicacao_ts DESC
+        """, (token,))
+        contratacoes = [dict(row) for row in cursor.fetchall()]
+        
+        logger.info(f"Reservadas {len(contratacoes)} contratações para notificação")
+        return token, contratacoes
+    
+    @_sincronizado
+    def marcar_lote_notificado(self, token: str) -> int:
+        """
+        Marca como notificadas todas as contratações de uma reserva
+        
+        Args:
+            token: Token retornado por reservar_notificacoes
+            
+        Returns:
+            Número de contratações marcadas
+        """
+        cursor = self.conn.cursor()
+        try:
+            cursor.execute("""
+                UPDATE contratacoes 
+                SET notificado = 1, data_notificacao = CURRENT_TIMESTAMP, 
+                    reserva_notificacao = NULL, reservado_em = NULL 
+                WHERE reserva_notificacao = ? AND notificado = 0
+            """, (token,))
+            marcadas = cursor.rowcount
+            # notificado faz parte das respostas: invalida os ETags
+            if marcadas:
+                self._avancar_geracao()
+            self.conn.commit()
+        except sqlite3.Error:
+            self.conn.rollback()
+            raise
+        return marcadas
+    
+    @_sincronizado
+    def liberar_reserva_notificacoes(self, token: str) -> int:
+        """
+        Devolve as contratações de uma reserva à fila (ex.: falha no envio)
+        
+        Args:
+            token: Token retornado por reservar_notificacoes
+            
+        Returns:
+            Número de contratações liberadas
+        """
+        cursor = self.conn.cursor()
+        cursor.execute("""
+            UPDATE contratacoes 
+            SET reserva_notificacao = NULL, reservado_em = NULL 
+            WHERE reserva_notificacao = ? AND notificado = 0
+        """, (token,))
+        self.conn.commit()
+        return cursor.rowcount
+    
+    @_sincronizado
+    def marcar_como_notificado(self, contratacao_id: int):
+        """
+        Marca uma contratação como notificada
+        
+        Args:
+            contratacao_id: ID da contratação
+        """
+        cursor = self.conn.cursor()
+        try:
+            cursor.execute("""
+                UPDATE contratacoes 
+                SET notificado = 1, data_notificacao = CURRENT_TIMESTAMP 
+                WHERE id = ?
+            """, (contratacao_id,))
+            if cursor.rowcount:
+                self._avancar_geracao()
+            self.conn.commit()
+        except sqlite3.Error:
+            self.conn.rollback()
+            raise
+    
+    def buscar_contratacoes(
+        self,
+        limite: int = 100,
+        offset: int = 0,
+        modalidade: Optional[int] = None,
+        data_inicio: Optional[str] = None,
+        data_fim: Optional[str] = None
+    ) -> List[Dict]:
+        """
+        Busca contratações com filtros
+        
+        Args:
+            limite: Número máximo de registros
+            offset: Deslocamento para paginação
+            modalidade: Filtrar por código de modalidade
+            data_inicio: Data inicial (formato ISO)
+            data_fim: Data final (formato ISO)
+            
+        Returns:
+            Lista de contratações
+        """
+        filtros, params = self._filtros(modalidade, data_inicio, data_fim)
+        
+        with self._leitura() as conn, \
+                self._fonte_contratacoes(conn, data_inicio, data_fim) as fonte:
+            cursor = conn.cursor()
+            
+            query = f"SELECT {self.COLUNAS_RESUMO} FROM {fonte} WHERE {filtros}"
+            
+            query += " ORDER BY data_publicacao_ts DESC, id DESC LIMIT ? OFFSET ?"
+            params.extend([limite, offset])
+            
+            cursor.execute(query, params)
+            rows = cursor.fetchall()
+            return [dict(row) for row in rows]
+    
+    def buscar_contratacoes_cursor(
+        self,
+        limite: int = 100,
+        cursor_pagina: Optional[str] = None,
+        modalidade: Optional[int] = None,
+        data_inicio: Optional[str] = None,
+        data_fim: Optional[str] = None
+    ) -> Dict:
+        """
+        Busca contratações com paginação por cursor (keyset)
+        
+        Cada página continua a partir da chave (data_publicacao_ts, id) do
+        último registro da anterior, então o custo não cresce com a
+        profundidade e a paginação não desloca com novas gravações.
+        
+        Args:
+            limite: Número máximo de registros
+            cursor_pagina: Cursor retornado pela página anterior (None = início)
+            modalidade: Filtrar por código de modalidade
+            data_inicio: Data inicial (formato ISO)
+            data_fim: Data final (formato ISO)
+            
+        Returns:
+            Dicionário com 'contratacoes' e 'proximo_cursor' (None na última página)
+        """
+        filtros, params = self._filtros(modalidade, data_inicio, data_fim)
+        base = f"SELECT {self.COLUNAS_RESUMO} FROM {{fonte}} WHERE {filtros}"
+        
+        data_publicacao_ts = contratacao_id = None
+        if cursor_pagina:
+            data_publicacao_ts, contratacao_id = self._decodificar_cursor(cursor_pagina)
+        
+        consultas = []
+        
+        # Registros com data, a partir da chave do cursor (busca no índice)
+        if not cursor_pagina or data_publicacao_ts is not None:
+            query = base + " AND data_publicacao_ts IS NOT NULL"
+            params_query = list(params)
+            if cursor_pagina:
+                query += " AND (data_publicacao_ts, id) < (?, ?)"
+                params_query.extend([data_publicacao_ts, contratacao_id])
+            query += " ORDER BY data_publicacao_ts DESC, id DESC LIMIT ?"
+            consultas.append((query, params_query))
+        
+        # Registros sem data vêm por último na ordem decrescente
+        query = base + " AND data_publicacao_ts IS NULL"
+        params_query = list(params)
+        if cursor_pagina and data_publicacao_ts is None:
+            query += " AND id < ?"
+            params_query.append(contratacao_id)
+        query += " ORDER BY id DESC LIMIT ?"
+        consultas.append((query, params_query))
+        
+        # Um registro a mais indica se existe próxima página
+        rows = []
+        with self._leitura() as conn, \
+                self._fonte_contratacoes(conn, data_inicio, data_fim) as fonte:
+            for query, params_query in consultas:
+                restantes = limite + 1 - len(rows)
+                if restantes <= 0:
+                    break
+                rows.extend(
+                    dict(row)
+                    for row in conn.execute(
+                        query.format(fonte=fonte), params_query + [restantes]
+                    ).fetchall()
+                )
+        
+        proximo_cursor = None
+        if len(rows) > limite:
+            rows = rows[:limite]
+            ultimo = rows[-1]
+            proximo_cursor = self._codificar_cursor(
+                ultimo['data_publicacao_ts'], ultimo['id']
+            )
+        
+        return {'contratacoes': rows, 'proximo_cursor': proximo_cursor}
+    
+    def pesquisar(
+        self,
+        termo: str,
+        limite: int = 20,
+        offset: int = 0,
+        modalidade: Optional[int] = None
+    ) -> List[Dict]:
+        """
+        Pesquisa contratações por palavras do objeto ou do órgão
+        
+        Todas as palavras devem aparecer (sem diferenciar acentos e
+        maiúsculas); a última também casa como prefixo. Os resultados vêm
+        ordenados por relevância (BM25, com peso maior para o objeto).
+        
+        Args:
+            termo: Texto livre (ex.: "manutencao veiculos")
+            limite: Número máximo de registros
+            offset: Deslocamento para paginação
+            modalidade: Filtrar por código de modalidade
+            
+        Returns:
+            Lista de contratações com a coluna 'relevancia' (menor = melhor)
+        """
+        if not self.busca_disponivel:
+            raise RuntimeError("Busca textual indisponível: SQLite sem FTS5")
+            
+        palavras = re.findall(r"\w+", termo)
+        if not palavras:
+            return []
+            
+        # Cada palavra entre aspas: o texto do usuário não vira sintaxe FTS5
+        expressao = " ".join(f'"{palavra}"' for palavra in palavras) + "*"
+        
+        colunas = ", ".join(
+            f"c.{coluna.strip()}" for coluna in self.COLUNAS_RESUMO.split(",")
+        )
+        query = f"""
+            SELECT {colunas}, bm25(contratacoes_fts, 2.0, 1.0) as relevancia
+            FROM contratacoes_fts
+            JOIN contratacoes c ON c.id = contratacoes_fts.rowid
+            WHERE contratacoes_fts MATCH ?
+        """
+        params = [expressao]
+        
+        if modalidade is not None:
+            query += " AND c.modalidade_codigo = ?"
+            params.append(modalidade)
+            
+        query += " ORDER BY relevancia LIMIT ? OFFSET ?"
+        params.extend([limite, offset])
+        
+        with self._leitura() as conn:
+            rows = conn.execute(query, params).fetchall()
+            return [dict(row) for row in rows]
+    
+    def contar_contratacoes(
+        self,
+        modalidade: Optional[int] = None,
+        data_inicio: Optional[str] = None,
+        data_fim: Optional[str] = None
+    ) -> int:
+        """
+        Conta o total de contratações com filtros
+        
+        Args:
+            modalidade: Filtrar por código de modalidade
+            data_inicio: Data inicial (formato ISO)
+            data_fim: Data final (formato ISO)
+            
+        Returns:
+            Número total de contratações
+        """
+        filtros, params = self._filtros(modalidade, data_inicio, data_fim)
+        
+        with self._leitura() as conn, \
+                self._fonte_contratacoes(conn, data_inicio, data_fim) as fonte:
+            cursor = conn.cursor()
+            
+            query = f"SELECT COUNT(*) as total FROM {fonte} WHERE {filtros}"
+            
+            cursor.execute(query, params)
+            result = cursor.fetchone()
+            return result['total'] if result else 0
+    
+    def obter_estatisticas(self) -> Dict:
+        """
+        Obtém estatísticas gerais do banco de dados
+        
+        Lê as tabelas de estatísticas mantidas pelos gatilhos, com custo
+        constante independente do número de contratações.
+        
+        Returns:
+            Dicionário com estatísticas
+        """
+        with self._leitura() as conn:
+            cursor = conn.cursor()
+            
+            cursor.execute("""
+                SELECT total, valor_total_estimado, ultima_atualizacao 
+                FROM estatisticas_resumo WHERE id = 1
+            """)
+            resumo = cursor.fetchone()
+            
+            # Contratações por modalidade
+            cursor.execute("""
+                SELECT NULLIF(modalidade_nome, '') as modalidade_nome, quantidade 
+                FROM estatisticas_modalidade 
+                WHERE quantidade > 0 
+                ORDER BY quantidade DESC
+            """)
+            por_modalidade = [dict(row) for row in cursor.fetchall()]
+        
+        return {
+            'total_contratacoes': resumo['total'] if resumo else 0,
+            'por_modalidade': por_modalidade,
+            'valor_total_estimado': resumo['valor_total_estimado'] if resumo else 0,
+            'ultima_atualizacao': resumo['ultima_atualizacao'] if resumo else None
+        }
+    
+    def obter_serie_temporal(
+        self,
+        granularidade: str = "mes",
+        data_inicio: Optional[str] = None,
+        data_fim: Optional[str] = None,
+        modalidade: Optional[int] = None,
+        cnpj_orgao: Optional[str] = None,
+        codigo_ibge: Optional[str] = None,
+        agrupar_por: Optional[str] = None
+    ) -> List[Dict]:
+        """
+        Obtém a quantidade e o valor estimado por período de publicação
+        
+        Lê as tabelas de séries temporais mantidas pelos gatilhos: o custo
+        depende do número de períodos e grupos, não do de contratações.
+        
+        Args:
+            granularidade: "dia" ou "mes"
+            data_inicio: Data inicial (ISO)
+            data_fim: Data final (ISO; sem horário inclui o dia inteiro)
+            modalidade: Código da modalidade
+            cnpj_orgao: CNPJ do órgão
+            codigo_ibge: Código IBGE do município
+            agrupar_por: None (total do período), "modalidade", "orgao" ou "municipio"
+            
+        Returns:
+            Lista em ordem de período com 'periodo', 'quantidade',
+            'valor_estimado' e as colunas do agrupamento
+        """
+        if granularidade not in self.SERIES:
+            raise ValueError(f"Granularidade inválida: {granularidade}")
+        if agrupar_por is not None and agrupar_por not in self.DIMENSOES_SERIE:
+            raise ValueError(f"Agrupamento inválido: {agrupar_por}")
+            
+        tabela, formato = self.SERIES[granularidade]
+        condicoes, params = self._filtros_serie(
+            formato, data_inicio, data_fim, modalidade, cnpj_orgao, codigo_ibge
+        )
+        
+        chaves = ["periodo"]
+        nomes = []
+        if agrupar_por is not None:
+            chave, nome = self.DIMENSOES_SERIE[agrupar_por]
+            chaves.append(chave)
+            if nome:
+                nomes.append(f"MAX({nome}) as {nome}")
+        grupo = ", ".join(chaves)
+        
+        with self._leitura() as conn:
+            rows = conn.execute(f"""
+                SELECT {", ".join(chaves + nomes)},
+                    SUM(quantidade) as quantidade, SUM(valor_estimado) as valor_estimado
+                FROM {tabela}
+                WHERE {condicoes}
+                GROUP BY {grupo}
+                HAVING SUM(quantidade) > 0
+                ORDER BY {grupo}
+            """, params).fetchall()
+            
+        return [dict(row) for row in rows]
+    
+    def obter_totais_por_orgao(
+        self,
+        data_inicio: Optional[str] = None,
+        data_fim: Optional[str] = None,
+        modalidade: Optional[int] = None,
+        codigo_ibge: Optional[str] = None,
+        limite: int = 20
+    ) -> List[Dict]:
+        """
+        Obtém os órgãos com maior valor estimado no período
+        
+        Args:
+            data_inicio: Data inicial (ISO)
+            data_fim: Data final (ISO; sem horário inclui o dia inteiro)
+            modalidade: Código da modalidade
+            codigo_ibge: Código IBGE do município
+            limite: Número máximo de órgãos
+            
+        Returns:
+            Lista com 'cnpj_orgao', 'orgao_nome', 'quantidade' e 'valor_estimado'
+        """
+        # Com filtro de data, a série diária respeita o dia exato dos limites
+        granularidade = "dia" if data_inicio or data_fim else "mes"
+        tabela, formato = self.SERIES[granularidade]
+        condicoes, params = self._filtros_serie(
+            formato, data_inicio, data_fim, modalidade, None, codigo_ibge
+        )
+        
+        with self._leitura() as conn:
+            rows = conn.execute(f"""
+                SELECT cnpj_orgao, MAX(orgao_nome) as orgao_nome,
+                    SUM(quantidade) as quantidade, SUM(valor_estimado) as valor_estimado
+                FROM {tabela}
+                WHERE {condicoes}
+                GROUP BY cnpj_orgao
+                HAVING SUM(quantidade) > 0
+                ORDER BY valor_estimado DESC
+                LIMIT ?
+            """, params + [limite]).fetchall()
+            
+        return [dict(row) for row in rows]
+    
+    @staticmethod
+    def _filtros_serie(
+        formato: str,
+        data_inicio: Optional[str],
+        data_fim: Optional[str],
+        modalidade: Optional[int],
+        cnpj_orgao: Optional[str],
+        codigo_ibge: Optional[str]
+    ) -> tuple:
+        """
+        Monta a cláusula WHERE das consultas às séries temporais
+        
+        As datas viram o período (dia ou mês) que as contém, com a mesma
+        interpretação de `_filtros`.
+        
+        Returns:
+            Tupla (condição SQL, parâmetros)
+        """
+        condicoes = ["1=1"]
+        params = []
+        
+        if data_inicio:
+            inicio = _para_epoch(data_inicio)
+            if inicio is None:
+                raise ValueError(f"Data inicial inválida: {data_inicio}")
+            condicoes.append("periodo >= ?")
+            params.append(time.strftime(formato, time.gmtime(inicio)))
+            
+        if data_fim:
+            fim = _para_epoch(data_fim)
+            if fim is None:
+                raise ValueError(f"Data final inválida: {data_fim}")
+            condicoes.append("periodo <= ?")
+            params.append(time.strftime(formato, time.gmtime(fim)))
+            
+        for coluna, valor in (
+            ("modalidade_codigo", modalidade),
+            ("cnpj_orgao", cnpj_orgao),
+            ("codigo_ibge", codigo_ibge)
+        ):
+            if valor is not None:
+                condicoes.append(f"{coluna} = ?")
+                params.append(valor)
+                
+        return " AND ".join(condicoes), params
+    
+    @_sincronizado
+    def obter_marcas_sincronizacao(self, codigo_ibge: str) -> Dict[int, str]:
+        """
+        Obtém a última publicação totalmente ingerida por modalidade
+        
+        Args:
+            codigo_ibge: Código IBGE do município
+            
+        Returns:
+            Dicionário código da modalidade -> dataPublicacaoPncp
+        """
+        cursor = self.conn.cursor()
+        cursor.execute("""
+            SELECT modalidade_codigo, ultima_publicacao 
+            FROM sincronizacao 
+            WHERE codigo_ibge = ?
+        """, (codigo_ibge,))
+        
+        return {
+            row['modalidade_codigo']: row['ultima_publicacao']
+            for row in cursor.fetchall()
+        }
+    
+    @_sincronizado
+    def atualizar_marca_sincronizacao(
+        self,
+        codigo_ibge: str,
+        modalidade_codigo: int,
+        ultima_publicacao: str
+    ):
+        """
+        Avança a marca d'água de uma modalidade (nunca retrocede)
+        
+        Args:
+            codigo_ibge: Código IBGE do município
+            modalidade_codigo: Código da modalidade
+            ultima_publicacao: Maior dataPublicacaoPncp ingerida
+        """
+        cursor = self.conn.cursor()
+        cursor.execute("""
+            INSERT INTO sincronizacao (
+                codigo_ibge, modalidade_codigo, ultima_publicacao
+            ) VALUES (?, ?, ?)
+            ON CONFLICT(codigo_ibge, modalidade_codigo) DO UPDATE SET
+                ultima_publicacao = MAX(ultima_publicacao, excluded.ultima_publicacao),
+                data_atualizacao = CURRENT_TIMESTAMP
+        """, (codigo_ibge, modalidade_codigo, ultima_publicacao))
+        self.conn.commit()
+    
+    @_sincronizado
+    def criar_unidades_backfill(
+        self,
+        codigo_ibge: str,
+        unidades: List[tuple]
+    ) -> int:
+        """
+        Registra unidades de trabalho da carga histórica (ignora existentes)
+        
+        Args:
+            codigo_ibge: Código IBGE do município
+            unidades: Lista de tuplas (modalidade, ano_mes, pagina)
+            
+        Returns:
+            Número de unidades novas
+        """
+        cursor = self.conn.cursor()
+        antes = self.conn.total_changes
+        cursor.executemany("""
+            INSERT OR IGNORE INTO backfill_unidades (
+                codigo_ibge, modalidade_codigo, ano_mes, pagina
+            ) VALUES (?, ?, ?, ?)
+        """, [(codigo_ibge, m, ano_mes, pagina) for m, ano_mes, pagina in unidades])
+        self.conn.commit()
+        return self.conn.total_changes - antes
+    
+    @_sincronizado
+    def reiniciar_unidades_backfill(self, codigo_ibge: str) -> int:
+        """
+        Devolve à fila as unidades deixadas 'em_andamento' por uma
+        execução interrompida
+        
+        Args:
+            codigo_ibge: Código IBGE do município
+            
+        Returns:
+            Número de unidades reiniciadas
+        """
+        cursor = self.conn.cursor()
+        cursor.execute("""
+            UPDATE backfill_unidades SET status = 'pendente' 
+            WHERE codigo_ibge = ? AND status = 'em_andamento'
+        """, (codigo_ibge,))
+        self.conn.commit()
+        return cursor.rowcount
+    
+    @_sincronizado
+    def buscar_unidades_backfill_pendentes(
+        self,
+        codigo_ibge: str,
+        max_tentativas: int = 3,
+        modalidade: Optional[int] = None,
+        ano_mes: Optional[str] = None
+    ) -> List[Dict]:
+        """
+        Busca as unidades que ainda precisam ser executadas
+        
+        Args:
+            codigo_ibge: Código IBGE do município
+            max_tentativas: Unidades com mais falhas que isso são ignoradas
+            modalidade: Filtrar por código de modalidade
+            ano_mes: Filtrar por mês (AAAA-MM)
+            
+        Returns:
+            Lista de unidades (mais antigas primeiro)
+        """
+        cursor = self.conn.cursor()
+        
+        query = """
+            SELECT * FROM backfill_unidades 
+            WHERE codigo_ibge = ? 
+              AND status IN ('pendente', 'erro') 
+              AND tentativas < ?
+        """
+        params = [codigo_ibge, max_tentativas]
+        
+        if modalidade is not None:
+            query += " AND modalidade_codigo = ?"
+            params.append(modalidade)
+        
+        if ano_mes:
+            query += " AND ano_mes = ?"
+            params.append(ano_mes)
+        
+        query += " ORDER BY ano_mes, modalidade_codigo, pagina"
+        
+        cursor.execute(query, params)
+        return [dict(row) for row in cursor.fetchall()]
+    
+    @_sincronizado
+    def atualizar_unidade_backfill(
+        self,
+        unidade_id: int,
+        status: str,
+        registros: Optional[int] = None,
+        erro: Optional[str] = None
+    ):
+        """
+        Atualiza o status de uma unidade da carga histórica
+        
+        Args:
+            unidade_id: ID da unidade
+            status: 'em_andamento', 'concluida' ou 'erro'
+            registros: Registros obtidos (unidades concluídas)
+            erro: Mensagem de erro (unidades com falha)
+        """
+        cursor = self.conn.cursor()
+        cursor.execute("""
+            UPDATE backfill_unidades SET 
+                status = ?,
+                registros = COALESCE(?, registros),
+                erro = ?,
+                tentativas = tentativas + (CASE WHEN ? = 'erro' THEN 1 ELSE 0 END),
+                data_atualizacao = CURRENT_TIMESTAMP
+            WHERE id = ?
+        """, (status, registros, erro, status, unidade_id))
+        self.conn.commit()
+    
+    def resumo_backfill(self, codigo_ibge: str) -> Dict[str, int]:
+        """
+        Conta as unidades da carga histórica por status
+        
+        Args:
+            codigo_ibge: Código IBGE do município
+            
+        Returns:
+            Dicionário status -> quantidade
+        """
+        with self._leitura() as conn:
+            cursor = conn.cursor()
+            cursor.execute("""
+                SELECT status, COUNT(*) as quantidade 
+                FROM backfill_unidades 
+                WHERE codigo_ibge = ? 
+                GROUP BY status
+            """, (codigo_ibge,))
+            return {row['status']: row['quantidade'] for row in cursor.fetchall()}
+    
+    @_sincronizado
+    def registrar_execucao(
+        self,
+        encontradas: int,
+        novas: int,
+        sucesso: bool,
+        mensagem: str = "",
+        codigo_ibge: Optional[str] = None
+    ):
+        """
+        Registra uma execução do monitoramento
+        
+        Args:
+            encontradas: Número de contratações encontradas
+            novas: Número de contratações novas
+            sucesso: Se a execução foi bem-sucedida
+            mensagem: Mensagem adicional
+            codigo_ibge: Município monitorado na execução
+        """
+        cursor = self.conn.cursor()
+        cursor.execute("""
+            INSERT INTO log_execucoes (
+                codigo_ibge,
+                contratacoes_encontradas,
+                contratacoes_novas,
+                sucesso,
+                mensagem
+            ) VALUES (?, ?, ?, ?, ?)
+        """, (codigo_ibge, encontradas, novas, sucesso, mensagem))
+        self.conn.commit()
+    
+    @_sincronizado
+    def fechar(self):
+        """Fecha a conexão com o banco de dados"""
+        while not self._leitores.empty():
+            self._leitores.get_nowait().close()
+        self._total_leitores = 0
+        
+        if self.conn:
+            self.conn.close()
+            logger.info("Conexão com banco de dados fechada")
@@ -0,0 +1,159 @@
+"""
+Canal de eventos das contratações gravadas
+Entrega aos assinantes (SSE/WebSocket) cada geração nova do banco
+"""
+
+import asyncio
+import logging
+import threading
+from typing import Dict, List, Optional, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Mais registros do que isso de uma vez: o assinante deve recarregar a listagem
+MAXIMO_EVENTOS = 5000
+
+# Gerações pendentes por assinante antes de considerá-lo atrasado
+TAMANHO_FILA = 256
+
+# Marcador entregue ao assinante que perdeu eventos
+RECARREGAR = None
+
+
+def carregar_eventos(
+    db,
+    geracao_inicial: int,
+    geracao_final: int,
+    maximo: int = MAXIMO_EVENTOS
+) -> Optional[List[Tuple[int, List[Dict]]]]:
+    """
+    Lê do banco as contratações gravadas entre duas gerações
+    
+    Args:
+        db: Banco de dados (Armazenamento)
+        geracao_inicial: Última geração já entregue (exclusiva)
+        geracao_final: Geração máxima (inclusiva)
+        maximo: Limite de registros
+        
+    Returns:
+        Lista de (geração, contratações) em ordem de geração, ou None se
+        houver mais de `maximo` registros
+    """
+    por_geracao: Dict[int, List[Dict]] = {}
+    total = 0
+    
+    for lote in db.iter_contratacoes_alteradas(
+        geracao_inicial, geracao_final, dados_completos=False
+    ):
+        total += len(lote)
+        if total > maximo:
+            logger.info(
+                f"Eventos: gerações {geracao_inicial + 1}-{geracao_final} "
+                f"excedem {maximo} registros"
+            )
+            return None
+        for contratacao in lote:
+            por_geracao.setdefault(contratacao['geracao'], []).append(contratacao)
+            
+    return sorted(por_geracao.items())
+
+
+class CanalEventos:
+    """
+    Distribui as contratações novas ou alteradas a assinantes assíncronos
+    
+    `verificar` pode ser chamado de qualquer thread (monitor após cada
+    lote, ou a tarefa de vigilância da API): a marca de geração é única,
+    então cada geração é entregue uma só vez, qualquer que seja a origem.
+    """
+    
+    def __init__(self, geracao_inicial: int = 0):
+        """
+        Inicializa o canal
+        
+        Args:
+            geracao_inicial: Geração a partir da qual publicar
+        """
+        self.geracao = geracao_inicial
+        self._lock = threading.Lock()
+        self._verificacao = threading.Lock()
+        self._assinantes = {}  # fila -> loop
+        
+    def assinar(self) -> Tuple[asyncio.Queue, int]:
+        """
+        Registra um assinante no loop de eventos atual
+        
+        Returns:
+            Tupla (fila, geração): a fila recebe (geração, contratações) ou
+            RECARREGAR; eventos até a geração retornada podem chegar
+            repetidos e devem ser ignorados
+        """
+        fila = asyncio.Queue()
+        with self._lock:
+            self._assinantes[fila] = asyncio.get_running_loop()
+            return fila, self.geracao
+            
+    def cancelar(self, fila: asyncio.Queue):
+        """Remove um assinante"""
+        with self._lock:
+            self._assinantes.pop(fila, None)
+            
+    @property
+    def assinantes(self) -> int:
+        """Quantidade de assinantes conectados"""
+        return len(self._assinantes)
+        
+    def verificar(self, db) -> int:
+        """
+        Publica as gerações gravadas desde a última verificação
+        
+        Sem assinantes, apenas avança a marca (nada é lido do banco).
+        
+        Args:
+            db: Banco de dados (Armazenamento)
+            
+        Returns:
+            Número de contratações publicadas
+        """
+        with self._verificacao:
+            atual = db.obter_geracao()
+            with self._lock:
+                if atual <= self.geracao:
+                    return 0
+                inicial, self.geracao = self.geracao, atual
+                if not self._assinantes:
+                    return 0
+                    
+            # Leitura fora do lock: assinar() não espera o banco
+            try:
+                eventos = carregar_eventos(db, inicial, atual)
+            except Exception as e:
+                logger.warning(f"Eventos: falha ao ler gerações {inicial + 1}-{atual}: {e}")
+                eventos = None
+            
+            with self._lock:
+                if eventos is None:
+                    self._entregar_todos(RECARREGAR)
+                    return 0
+                    
+                for evento in eventos:
+                    self._entregar_todos(evento)
+            return sum(len(contratacoes) for _, contratacoes in eventos)
+            
+    def _entregar_todos(self, evento):
+        """Enfileira o evento para cada assinante, no loop de cada um (com _lock)"""
+        for fila, loop in list(self._assinantes.items()):
+            try:
+                loop.call_soon_threadsafe(self._entregar, fila, evento)
+            except RuntimeError:
+                # Loop já encerrado
+                self._assinantes.pop(fila, None)
+                
+    @staticmethod
+    def _entregar(fila: asyncio.Queue, evento):
+        """Enfileira um evento; um assinante atrasado recebe só RECARREGAR"""
+        if fila.qsize() >= TAMANHO_FILA:
+            while not fila.empty():
+                fila.get_nowait()
+            evento = RECARREGAR
+        fila.put_nowait(evento)
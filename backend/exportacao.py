@@ -0,0 +1,233 @@
+"""
+Exportação incremental das contratações para formato colunar
+Grava em Parquet (pyarrow) ou CSV, particionado por ano/mês de publicação
+"""
+
+import csv
+import logging
+import os
+from datetime import datetime, timezone
+from pathlib import Path
+from typing import Dict, List, Tuple
+
+from database import Database
+
+logger = logging.getLogger(__name__)
+
+# Colunas exportadas: (nome, tipo, origem)
+# Origem "coluna" vem do banco; "a.b" é um caminho no JSON original da API
+CAMPOS = [
+    ("id", "int64", "id"),
+    ("geracao", "int64", "geracao"),
+    ("cnpj_orgao", "string", "cnpj_orgao"),
+    ("ano_compra", "int64", "ano_compra"),
+    ("sequencial_compra", "int64", "sequencial_compra"),
+    ("numero_compra", "string", "numero_compra"),
+    ("processo", "string", "dados_completos.processo"),
+    ("codigo_ibge", "string", "codigo_ibge"),
+    ("objeto", "string", "objeto"),
+    ("valor_estimado", "float64", "valor_estimado"),
+    ("valor_homologado", "float64", "valor_homologado"),
+    ("modalidade_codigo", "int64", "modalidade_codigo"),
+    ("modalidade_nome", "string", "modalidade_nome"),
+    ("situacao_codigo", "string", "situacao"),
+    ("situacao_nome", "string", "dados_completos.situacaoCompraNome"),
+    ("modo_disputa", "string", "dados_completos.modoDisputaNome"),
+    ("amparo_legal", "string", "dados_completos.amparoLegal.nome"),
+    ("srp", "bool", "dados_completos.srp"),
+    ("data_publicacao", "string", "data_publicacao"),
+    ("data_publicacao_ts", "int64", "data_publicacao_ts"),
+    ("data_abertura_proposta", "string", "dados_completos.dataAberturaProposta"),
+    ("data_encerramento_proposta", "string", "dados_completos.dataEncerramentoProposta"),
+    ("data_captura", "string", "data_captura"),
+    ("orgao_razao_social", "string", "orgao_nome"),
+    ("orgao_poder_id", "string", "dados_completos.orgaoEntidade.poderId"),
+    ("orgao_esfera_id", "string", "dados_completos.orgaoEntidade.esferaId"),
+    ("unidade_codigo", "string", "dados_completos.unidadeOrgao.codigoUnidade"),
+    ("unidade_nome", "string", "dados_completos.unidadeOrgao.nomeUnidade"),
+    ("unidade_uf", "string", "dados_completos.unidadeOrgao.ufSigla"),
+    ("unidade_municipio", "string", "dados_completos.unidadeOrgao.municipioNome"),
+    ("link_pncp", "string", "link_pncp"),
+    ("link_sistema_origem", "string", "dados_completos.linkSistemaOrigem"),
+]
+
+# Geração até a qual as contratações já foram exportadas
+CHAVE_MARCA = "exportacao_geracao"
+
+
+def achatar(contratacao: Dict) -> Dict:
+    """
+    Converte uma contratação do banco em uma linha plana de CAMPOS
+    
+    Args:
+        contratacao: Registro de iter_contratacoes_alteradas
+        
+    Returns:
+        Dicionário coluna -> valor
+    """
+    linha = {}
+    
+    for nome, tipo, origem in CAMPOS:
+        valor = contratacao
+        for parte in origem.split("."):
+            valor = valor.get(parte) if isinstance(valor, dict) else None
+            
+        if valor is not None:
+            if tipo == "string":
+                valor = str(valor)
+            elif tipo == "int64":
+                valor = int(valor)
+            elif tipo == "float64":
+                valor = float(valor)
+            elif tipo == "bool":
+                valor = bool(valor)
+        linha[nome] = valor
+        
+    return linha
+
+
+def particao(linha: Dict) -> Tuple[str, str]:
+    """Partição (ano, mês) da linha pela data de publicação"""
+    if linha['data_publicacao_ts'] is None:
+        return "0000", "00"
+    data = datetime.fromtimestamp(linha['data_publicacao_ts'], timezone.utc)
+    return f"{data.year:04d}", f"{data.month:02d}"
+
+
+class ExportadorColunar:
+    """Exporta para arquivos colunares as contratações novas ou alteradas"""
+    
+    FORMATOS = ("parquet", "csv")
+    
+    def __init__(
+        self,
+        db: Database,
+        diretorio: str = "exportacao",
+        formato: str = "parquet",
+        linhas_por_arquivo: int = 100000
+    ):
+        """
+        Inicializa o exportador
+        
+        Args:
+            db: Banco de dados de origem
+            diretorio: Diretório raiz dos arquivos (ano=AAAA/mes=MM/...)
+            formato: "parquet" (requer pyarrow) ou "csv"
+            linhas_por_arquivo: Linhas acumuladas por partição antes de gravar
+        """
+        if formato not in self.FORMATOS:
+            raise ValueError(f"Formato inválido: {formato} (use {', '.join(self.FORMATOS)})")
+            
+        if formato == "parquet":
+            try:
+                import pyarrow  # noqa: F401
+            except ImportError as e:
+                raise ImportError(
+                    "Exportação em Parquet requer pyarrow (pip install pyarrow) "
+                    "ou use formato='csv'"
+                ) from e
+                
+        self.db = db
+        self.diretorio = Path(diretorio)
+        self.formato = formato
+        self.linhas_por_arquivo = linhas_por_arquivo
+        
+    def exportar(self) -> Dict:
+        """
+        Exporta as contratações gravadas desde a última exportação
+        
+        Cada execução cria novos arquivos (nunca reescreve os anteriores).
+        Uma contratação alterada aparece de novo em um arquivo mais recente;
+        a versão válida é a de maior `geracao`.
+        
+        Returns:
+            Dicionário com 'registros', 'arquivos' e 'geracao' exportada
+        """
+        marca = int(self.db.obter_configuracao(CHAVE_MARCA, "0"))
+        geracao = self.db.obter_geracao()
+        
+        resultado = {'registros': 0, 'arquivos': [], 'geracao': geracao}
+        if geracao <= marca:
+            logger.info("Exportação: nenhuma alteração desde a última execução")
+            return resultado
+            
+        buffers: Dict[Tuple[str, str], List[Dict]] = {}
+        sequencia = 0
+        
+        for lote in self.db.iter_contratacoes_alteradas(marca, geracao):
+            for contratacao in lote:
+                linha = achatar(contratacao)
+                chave = particao(linha)
+                buffers.setdefault(chave, []).append(linha)
+                
+                if len(buffers[chave]) >= self.linhas_por_arquivo:
+                    sequencia += 1
+                    resultado['arquivos'].append(
+                        self._gravar(chave, buffers.pop(chave), marca, geracao, sequencia)
+                    )
+            resultado['registros'] += len(lote)
+            
+        for chave, linhas in sorted(buffers.items()):
+            sequencia += 1
+            resultado['arquivos'].append(
+                self._gravar(chave, linhas, marca, geracao, sequencia)
+            )
+            
+        # A marca só avança depois de todos os arquivos gravados
+        self.db.definir_configuracao(CHAVE_MARCA, str(geracao))
+        
+        logger.info(
+            f"Exportação: {resultado['registros']} registros em "
+            f"{len(resultado['arquivos'])} arquivos (gerações {marca + 1}-{geracao})"
+        )
+        return resultado
+        
+    def _gravar(
+        self,
+        chave: Tuple[str, str],
+        linhas: List[Dict],
+        marca: int,
+        geracao: int,
+        sequencia: int
+    ) -> str:
+        """Grava as linhas de uma partição em um novo arquivo"""
+        ano, mes = chave
+        pasta = self.diretorio / f"ano={ano}" / f"mes={mes}"
+        pasta.mkdir(parents=True, exist_ok=True)
+        
+        caminho = pasta / f"parte-g{marca + 1:08d}-{geracao:08d}-{sequencia:04d}.{self.formato}"
+        temporario = caminho.with_name(caminho.name + ".tmp")
+        
+        if self.formato == "parquet":
+            self._gravar_parquet(temporario, linhas)
+        else:
+            self._gravar_csv(temporario, linhas)
+            
+        # Leitores nunca veem um arquivo pela metade
+        os.replace(temporario, caminho)
+        return str(caminho)
+        
+    @staticmethod
+    def _gravar_parquet(caminho: Path, linhas: List[Dict]):
+        """Grava as linhas em Parquet com o esquema de CAMPOS"""
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+        
+        tipos = {
+            "string": pa.string(),
+            "int64": pa.int64(),
+            "float64": pa.float64(),
+            "bool": pa.bool_()
+        }
+        esquema = pa.schema([(nome, tipos[tipo]) for nome, tipo, _ in CAMPOS])
+        tabela = pa.Table.from_pylist(linhas, schema=esquema)
+        pq.write_table(tabela, caminho, compression="zstd")
+        
+    @staticmethod
+    def _gravar_csv(caminho: Path, linhas: List[Dict]):
+        """Grava as linhas em CSV (UTF-8, com cabeçalho)"""
+        with open(caminho, "w", newline="", encoding="utf-8") as arquivo:
+            escritor = csv.DictWriter(arquivo, fieldnames=[nome for nome, _, _ in CAMPOS])
+            escritor.writeheader()
+            escritor.writerows(linhas)
+
@@ -0,0 +1,155 @@
+"""
+Instrumentação das requisições à API do PNCP
+Agrega latência, tempo até o primeiro byte e volume por endpoint e modalidade
+"""
+
+import bisect
+import random
+import threading
+from typing import Dict, List, Optional
+
+# Limites superiores (ms) das faixas do histograma de duração
+FAIXAS_MS = [50, 100, 250, 500, 1000, 2500, 5000, 10000, float('inf')]
+
+
+class _Serie:
+    """Amostras de uma métrica com contagem por faixa e amostragem limitada"""
+    
+    def __init__(self, max_amostras: int):
+        """Inicializa a série com no máximo `max_amostras` amostras"""
+        self.max_amostras = max_amostras
+        self.amostras: List[float] = []
+        self.total = 0
+        self.soma = 0.0
+        self.faixas = [0] * len(FAIXAS_MS)
+        
+    def adicionar(self, valor: float):
+        """Adiciona uma medição à série"""
+        self.total += 1
+        self.soma += valor
+        self.faixas[bisect.bisect_left(FAIXAS_MS, valor)] += 1
+        
+        # Amostragem de reservatório: memória constante em execuções longas
+        if len(self.amostras) < self.max_amostras:
+            self.amostras.append(valor)
+        else:
+            indice = random.randrange(self.total)
+            if indice < self.max_amostras:
+                self.amostras[indice] = valor
+                
+    def percentil(self, p: float) -> Optional[float]:
+        """Calcula o percentil `p` (0-100) das amostras"""
+        if not self.amostras:
+            return None
+        ordenadas = sorted(self.amostras)
+        indice = min(len(ordenadas) - 1, int(round(p / 100 * (len(ordenadas) - 1))))
+        return ordenadas[indice]
+        
+    def resumo(self) -> Dict:
+        """Resume a série em média, percentis e máximo"""
+        return {
+            'quantidade': self.total,
+            'media': self.soma / self.total if self.total else None,
+            'p50': self.percentil(50),
+            'p90': self.percentil(90),
+            'p99': self.percentil(99),
+            'max': max(self.amostras) if self.amostras else None
+        }
+
+
+class Instrumentacao:
+    """Coletor de métricas das requisições, seguro para várias threads"""
+    
+    def __init__(self, max_amostras: int = 5000):
+        """
+        Inicializa o coletor
+        
+        Args:
+            max_amostras: Amostras mantidas por série para os percentis
+        """
+        self.max_amostras = max_amostras
+        self._lock = threading.Lock()
+        self._grupos: Dict[tuple, Dict] = {}
+        
+    def registrar(self, medicao: Dict):
+        """
+        Registra a medição de uma requisição
+        
+        Args:
+            medicao: Dicionário com endpoint, modalidade, pagina, status,
+                tentativa, bytes, ttfb_ms, duracao_ms, cache e erro
+        """
+        chaves = [
+            (medicao['endpoint'], None),
+            (medicao['endpoint'], medicao.get('modalidade'))
+        ]
+        
+        with self._lock:
+            for chave in dict.fromkeys(chaves):
+                grupo = self._grupos.get(chave)
+                if grupo is None:
+                    grupo = self._grupos[chave] = {
+                        'duracao_ms': _Serie(self.max_amostras),
+                        'ttfb_ms': _Serie(self.max_amostras),
+                        'bytes': 0,
+                        'status': {},
+                        'retentativas': 0,
+                        'erros': 0,
+                        'cache': 0
+                    }
+                    
+                grupo['duracao_ms'].adicionar(medicao['duracao_ms'])
+                if medicao.get('ttfb_ms') is not None:
+                    grupo['ttfb_ms'].adicionar(medicao['ttfb_ms'])
+                grupo['bytes'] += medicao.get('bytes') or 0
+                
+                status = medicao.get('status')
+                grupo['status'][status] = grupo['status'].get(status, 0) + 1
+                
+                if medicao.get('tentativa'):
+                    grupo['retentativas'] += 1
+                if medicao.get('erro'):
+                    grupo['erros'] += 1
+                if medicao.get('cache') == 'hit':
+                    grupo['cache'] += 1
+                    
+    def resumo(self, por_modalidade: bool = False) -> Dict:
+        """
+        Resume as métricas coletadas
+        
+        Args:
+            por_modalidade: Separar também por modalidade
+            
+        Returns:
+            Dicionário endpoint (ou "endpoint [modalidade N]") -> métricas
+            com percentis, histograma de duração, bytes, status e retentativas
+        """
+        with self._lock:
+            resumo = {}
+            for (endpoint, modalidade), grupo in sorted(
+                self._grupos.items(), key=lambda item: (item[0][0], item[0][1] or 0)
+            ):
+                if (modalidade is not None) != por_modalidade:
+                    continue
+                    
+                nome = endpoint if modalidade is None else f"{endpoint} [modalidade {modalidade}]"
+                resumo[nome] = {
+                    'requisicoes': grupo['duracao_ms'].total,
+                    'duracao_ms': grupo['duracao_ms'].resumo(),
+                    'ttfb_ms': grupo['ttfb_ms'].resumo(),
+                    'histograma_ms': {
+                        f"<={faixa:g}": quantidade
+                        for faixa, quantidade in zip(FAIXAS_MS, grupo['duracao_ms'].faixas)
+                    },
+                    'bytes': grupo['bytes'],
+                    'status': dict(grupo['status']),
+                    'retentativas': grupo['retentativas'],
+                    'erros': grupo['erros'],
+                    'cache_hits': grupo['cache']
+                }
+            return resumo
+            
+    def limpar(self):
+        """Descarta as métricas coletadas"""
+        with self._lock:
+            self._grupos.clear()
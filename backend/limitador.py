@@ -0,0 +1,183 @@
+"""
+Limitador de taxa adaptativo para a API do PNCP
+Token bucket compartilhado pelo processo, com ajuste AIMD
+"""
+
+import logging
+import threading
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Optional
+
+logger = logging.getLogger(__name__)
+
+
+class LimitadorTaxa:
+    """
+    Token bucket com taxa adaptativa
+    
+    A taxa cresce de forma aditiva com respostas 2xx e cai de forma
+    multiplicativa ao receber 429/503, no máximo um ajuste de cada tipo por
+    intervalo_reducao (independe do número de workers). Um cabeçalho
+    Retry-After suspende todas as requisições até o instante indicado.
+    """
+    
+    STATUS_SOBRECARGA = (429, 503)
+    
+    def __init__(
+        self,
+        taxa_inicial: float = 2.0,
+        taxa_minima: float = 0.2,
+        taxa_maxima: float = 10.0,
+        capacidade: float = 5.0,
+        incremento: float = 0.1,
+        fator_reducao: float = 0.5,
+        intervalo_reducao: float = 1.0
+    ):
+        """
+        Inicializa o limitador
+        
+        Args:
+            taxa_inicial: Requisições por segundo no início
+            taxa_minima: Limite inferior da taxa
+            taxa_maxima: Limite superior da taxa
+            capacidade: Rajada máxima de requisições (tamanho do balde)
+            incremento: Aumento aditivo da taxa por intervalo com respostas 2xx
+            fator_reducao: Fator multiplicativo aplicado em 429/503
+            intervalo_reducao: Intervalo mínimo entre dois aumentos ou duas
+                reduções da taxa (segundos)
+        """
+        self.taxa = taxa_inicial
+        self.taxa_minima = taxa_minima
+        self.taxa_maxima = taxa_maxima
+        self.capacidade = capacidade
+        self.incremento = incremento
+        self.fator_reducao = fator_reducao
+        self.intervalo_reducao = intervalo_reducao
+        
+        self._tokens = capacidade
+        self._ultimo_reabastecimento = time.monotonic()
+        self._bloqueado_ate = 0.0
+        self._ultima_reducao = 0.0
+        self._ultimo_aumento = 0.0
+        self._lock = threading.Lock()
+        
+    def reservar(self) -> float:
+        """
+        Reserva um token para a próxima requisição
+        
+        Returns:
+            Segundos que o chamador deve aguardar antes de requisitar
+        """
+        with self._lock:
+            agora = time.monotonic()
+            self._reabastecer(agora)
+            
+            # Tokens negativos representam requisições já enfileiradas
+            self._tokens -= 1
+            espera = 0.0 if self._tokens >= 0 else -self._tokens / self.taxa
+            
+            return max(espera, self._bloqueado_ate - agora)
+            
+    def aguardar(self):
+        """Bloqueia a thread atual até a requisição ser permitida"""
+        espera = self.reservar()
+        if espera > 0:
+            time.sleep(espera)
+            
+    def registrar_resposta(
+        self,
+        status_code: int,
+        retry_after: Optional[str] = None
+    ):
+        """
+        Ajusta a taxa de acordo com a resposta recebida
+        
+        Args:
+            status_code: Status HTTP da resposta
+            retry_after: Valor do cabeçalho Retry-After, se houver
+        """
+        with self._lock:
+            agora = time.monotonic()
+            
+            if status_code in self.STATUS_SOBRECARGA:
+                # Várias respostas da mesma rajada contam como uma redução
+                if agora - self._ultima_reducao >= self.intervalo_reducao:
+                    self._reabastecer(agora)
+                    self.taxa = max(
+                        self.taxa_minima, self.taxa * self.fator_reducao
+                    )
+                    self._ultima_reducao = agora
+                    logger.warning(
+                        f"API sobrecarregada ({status_code}), "
+                        f"taxa reduzida para {self.taxa:.2f} req/s"
+                    )
+                    
+                segundos = self._interpretar_retry_after(retry_after)
+                if segundos:
+                    self._bloqueado_ate = max(
+                        self._bloqueado_ate, agora + segundos
+                    )
+                    logger.warning(f"Aguardando {segundos:.0f}s (Retry-After)")
+                    
+            elif 200 <= status_code < 300:
+                # Como na redução: um aumento por intervalo, e nunca logo após
+                # uma redução, para que N workers não cresçam N vezes mais rápido
+                desde_ajuste = agora - max(self._ultimo_aumento, self._ultima_reducao)
+                if desde_ajuste >= self.intervalo_reducao:
+                    self._reabastecer(agora)
+                    self.taxa = min(self.taxa_maxima, self.taxa + self.incremento)
+                    self._ultimo_aumento = agora
+                
+    def _reabastecer(self, agora: float):
+        """Adiciona ao balde os tokens gerados desde a última verificação"""
+        decorrido = agora - self._ultimo_reabastecimento
+        self._tokens = min(
+            self.capacidade, self._tokens + decorrido * self.taxa
+        )
+        self._ultimo_reabastecimento = agora
+        
+    @staticmethod
+    def _interpretar_retry_after(valor: Optional[str]) -> float:
+        """
+        Converte o cabeçalho Retry-After em segundos
+        
+        Args:
+            valor: Segundos ou data HTTP
+            
+        Returns:
+            Segundos de espera (0 se ausente ou inválido)
+        """
+        if not valor:
+            return 0.0
+            
+        try:
+            return max(0.0, float(valor))
+        except ValueError:
+            pass
+            
+        try:
+            data = parsedate_to_datetime(valor)
+            return max(0.0, (data - datetime.now(timezone.utc)).total_seconds())
+        except (TypeError, ValueError):
+            return 0.0
+
+
+_limitador_global: Optional[LimitadorTaxa] = None
+_lock_global = threading.Lock()
+
+
+def obter_limitador() -> LimitadorTaxa:
+    """
+    Retorna o limitador compartilhado por todo o processo
+    
+    Returns:
+        Instância única de LimitadorTaxa
+    """
+    global _limitador_global
+    
+    with _lock_global:
+        if _limitador_global is None:
+            _limitador_global = LimitadorTaxa()
+        return _limitador_global
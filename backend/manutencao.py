@@ -0,0 +1,116 @@
+"""
+Tarefas de manutenção do banco de dados do monitor
+Executadas sob demanda pela linha de comando
+"""
+
+import argparse
+import logging
+import sys
+from pathlib import Path
+
+# Adicionar diretório atual ao path
+sys.path.insert(0, str(Path(__file__).parent))
+
+from database import Database
+from exportacao import ExportadorColunar
+
+logging.basicConfig(
+    level=logging.INFO,
+    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+)
+logger = logging.getLogger(__name__)
+
+
+def reconstruir_estatisticas(db: Database, args: argparse.Namespace):
+    """Recalcula as estatísticas e séries temporais a partir das contratações"""
+    db.reconstruir_estatisticas()
+    
+    estatisticas = db.obter_estatisticas()
+    print(f"Total de contratações: {estatisticas['total_contratacoes']}")
+    print(f"Valor total estimado: R$ {estatisticas['valor_total_estimado']:,.2f}")
+
+
+def reconstruir_busca(db: Database, args: argparse.Namespace):
+    """Reconstrói o índice de texto completo (FTS5)"""
+    db.reconstruir_busca()
+    print("Índice de busca reconstruído")
+
+
+def arquivar(db: Database, args: argparse.Namespace):
+    """Move contratações antigas para os bancos de arquivo anuais"""
+    arquivadas = db.arquivar(idade_dias=args.idade_dias)
+    
+    for ano, quantidade in sorted(arquivadas.items()):
+        print(f"{ano}: {quantidade} contratações arquivadas em {db.caminho_arquivo(ano)}")
+    if not arquivadas:
+        print("Nenhuma contratação para arquivar")
+        
+    if args.compactar:
+        db.compactar()
+
+
+def exportar(db: Database, args: argparse.Namespace):
+    """Exporta as contratações novas ou alteradas para Parquet/CSV"""
+    exportador = ExportadorColunar(db, diretorio=args.diretorio, formato=args.formato)
+    resultado = exportador.exportar()
+    
+    for caminho in resultado['arquivos']:
+        print(caminho)
+    print(f"{resultado['registros']} contratações exportadas (geração {resultado['geracao']})")
+
+
+def main():
+    """Função principal para execução via linha de comando"""
+    parser = argparse.ArgumentParser(
+        description="Manutenção do banco de dados do monitor PNCP"
+    )
+    parser.add_argument("--db", default="pncp_monitor.db", help="Banco de dados")
+    subparsers = parser.add_subparsers(dest="comando", required=True)
+    
+    estatisticas = subparsers.add_parser(
+        "estatisticas", help="Reconstrói as estatísticas e séries temporais"
+    )
+    estatisticas.set_defaults(funcao=reconstruir_estatisticas)
+    
+    busca = subparsers.add_parser(
+        "busca", help="Reconstrói o índice de busca textual"
+    )
+    busca.set_defaults(funcao=reconstruir_busca)
+    
+    arquivo = subparsers.add_parser(
+        "arquivar", help="Move contratações antigas para arquivos anuais"
+    )
+    arquivo.add_argument(
+        "--idade-dias", type=int, default=730,
+        help="Arquivar contratações publicadas há mais de N dias"
+    )
+    arquivo.add_argument(
+        "--compactar", action="store_true",
+        help="Executar VACUUM no banco principal ao final"
+    )
+    arquivo.set_defaults(funcao=arquivar)
+    
+    exportacao = subparsers.add_parser(
+        "exportar", help="Exporta contratações novas/alteradas em formato colunar"
+    )
+    exportacao.add_argument(
+        "--diretorio", default="exportacao",
+        help="Diretório raiz dos arquivos (particionado por ano/mês)"
+    )
+    exportacao.add_argument(
+        "--formato", choices=ExportadorColunar.FORMATOS, default="parquet",
+        help="Formato dos arquivos (parquet requer pyarrow)"
+    )
+    exportacao.set_defaults(funcao=exportar)
+    
+    args = parser.parse_args()
+    
+    db = Database(args.db)
+    try:
+        args.funcao(db, args)
+    finally:
+        db.fechar()
+
+
+if __name__ == "__main__":
+    main()
@@ -2,16 +2,19 @@
 Script principal de monitoramento de contratações do PNCP
 """
 
+import asyncio
 import logging
 from datetime import datetime, timedelta
 from pathlib import Path
+from typing import Dict, Iterator, Optional
 import sys
 
 # Adicionar diretório atual ao path
 sys.path.insert(0, str(Path(__file__).parent))
 
-from pncp_api import PNCPClient
-from database import Database
+from pncp_api import PNCPClient, PNCPErroConsulta
+from armazenamento import Armazenamento, abrir_armazenamento
+from eventos import CanalEventos
 
 # Configurar logging
 logging.basicConfig(
@@ -28,11 +31,18 @@ logger = logging.getLogger(__name__)
 class PNCPMonitor:
     """Monitor de contratações do PNCP"""
     
+    # Dias reconsultados antes da marca d'água em buscas incrementais
+    SOBREPOSICAO_DIAS = 1
+    
     def __init__(
         self,
         codigo_ibge: str,
         nome_municipio: str,
-        db_path: str = "pncp_monitor.db"
+        db_path: str = "pncp_monitor.db",
+        usar_async: bool = False,
+        client: Optional[PNCPClient] = None,
+        db: Optional[Armazenamento] = None,
+        canal_eventos: Optional[CanalEventos] = None
     ):
         """
         Inicializa o monitor
@@ -40,26 +50,49 @@ class PNCPMonitor:
         Args:
             codigo_ibge: Código IBGE do município
             nome_municipio: Nome do município
-            db_path: Caminho para o banco de dados
+            db_path: Arquivo SQLite ou URL postgresql:// do banco de dados
+            usar_async: Usar o cliente assíncrono (modalidades em paralelo)
+            client: Cliente compartilhado (None = cria um próprio)
+            db: Banco compartilhado (None = abre db_path)
+            canal_eventos: Canal notificado a cada lote gravado (SSE/WebSocket)
         """
         self.codigo_ibge = codigo_ibge
         self.nome_municipio = nome_municipio
-        self.client = PNCPClient()
-        self.db = Database(db_path)
+        self.usar_async = usar_async
+        
+        if client is not None:
+            self.client = client
+        elif usar_async:
+            # Importado sob demanda: depende do aiohttp
+            from pncp_api_async import AsyncPNCPClient
+            self.client = AsyncPNCPClient()
+        else:
+            self.client = PNCPClient()
+            
+        # Só fecha o banco ao final se ele foi aberto por este monitor
+        self._db_proprio = db is None
+        self.db = db if db is not None else abrir_armazenamento(db_path)
+        self.canal_eventos = canal_eventos
         
         logger.info(f"Monitor inicializado para {nome_municipio} ({codigo_ibge})")
     
     def executar_monitoramento(
         self,
         dias_retroativos: int = 7,
-        modalidades: list = None
+        modalidades: list = None,
+        incremental: bool = True
     ) -> dict:
         """
         Executa uma rodada de monitoramento
         
+        No modo incremental, cada modalidade é buscada apenas a partir da
+        última publicação já ingerida (menos uma pequena sobreposição),
+        limitada a `dias_retroativos`.
+        
         Args:
-            dias_retroativos: Quantos dias para trás buscar
+            dias_retroativos: Quantos dias para trás buscar (no máximo)
             modalidades: Lista de códigos de modalidade (None = todas)
+            incremental: Usar as marcas d'água de sincronização
             
         Returns:
             Dicionário com resultados da execução
@@ -72,39 +105,56 @@ class PNCPMonitor:
         data_final = datetime.now()
         data_inicial = data_final - timedelta(days=dias_retroativos)
         
+        if modalidades is None:
+            modalidades = list(self.client.MODALIDADES.keys())
+        
         logger.info(
             f"Período: {data_inicial.strftime('%d/%m/%Y')} a "
             f"{data_final.strftime('%d/%m/%Y')}"
         )
         
         try:
-            # Buscar contratações
-            contratacoes = self.client.buscar_contratacoes_por_municipio(
-                codigo_ibge=self.codigo_ibge,
-                data_inicial=data_inicial,
-                data_final=data_final,
-                modalidades=modalidades
+            if incremental:
+                datas_iniciais = self._calcular_datas_iniciais(
+                    modalidades, data_inicial
+                )
+            else:
+                datas_iniciais = {m: data_inicial for m in modalidades}
+            
+            # Buscar e salvar as contratações página a página
+            estado = {'encontradas': 0, 'falhas': [], 'marcas': {}}
+            novas = self.db.salvar_contratacoes_stream(
+                self._iter_paginas(datas_iniciais, data_final, estado),
+                ao_salvar_lote=self._publicar_eventos if self.canal_eventos else None
             )
+            encontradas = estado['encontradas']
+            falhas = estado['falhas']
             
-            logger.info(f"Total de contratações encontradas: {len(contratacoes)}")
+            logger.info(f"Total de contratações encontradas: {encontradas}")
+            logger.info(f"Novas contratações: {novas}")
+            self._registrar_metricas()
             
-            # Salvar no banco de dados
-            novas = self.db.salvar_contratacoes(contratacoes)
+            # Só avança a marca das modalidades buscadas por completo
+            self._atualizar_marcas(estado['marcas'], falhas)
             
-            logger.info(f"Novas contratações: {novas}")
+            mensagem = "Monitoramento executado com sucesso"
+            if falhas:
+                mensagem += f" (falha nas modalidades {falhas})"
             
             # Registrar execução
             self.db.registrar_execucao(
-                encontradas=len(contratacoes),
+                encontradas=encontradas,
                 novas=novas,
                 sucesso=True,
-                mensagem=f"Monitoramento executado com sucesso"
+                mensagem=mensagem,
+                codigo_ibge=self.codigo_ibge
             )
             
             resultado = {
                 'sucesso': True,
-                'total_encontradas': len(contratacoes),
+                'total_encontradas': encontradas,
                 'novas': novas,
+                'modalidades_com_falha': falhas,
                 'data_execucao': datetime.now().isoformat()
             }
             
@@ -118,7 +168,8 @@ class PNCPMonitor:
                 encontradas=0,
                 novas=0,
                 sucesso=False,
-                mensagem=f"Erro: {str(e)}"
+                mensagem=f"Erro: {str(e)}",
+                codigo_ibge=self.codigo_ibge
             )
             
             return {
@@ -127,6 +178,168 @@ class PNCPMonitor:
                 'data_execucao': datetime.now().isoformat()
             }
     
+    def _publicar_eventos(self):
+        """Publica no canal de eventos as contratações do lote recém-gravado"""
+        try:
+            self.canal_eventos.verificar(self.db)
+        except Exception as e:
+            # Falha na entrega não interrompe a coleta
+            logger.warning(f"Falha ao publicar eventos: {e}")
+            
+    def _registrar_metricas(self):
+        """Registra no log a latência das requisições por endpoint"""
+        metricas = getattr(self.client, 'metricas', None)
+        if metricas is None:
+            return
+            
+        for endpoint, dados in metricas.resumo().items():
+            duracao = dados['duracao_ms']
+            logger.info(
+                f"Requisições {endpoint}: {dados['requisicoes']} "
+                f"(p50 {duracao['p50']:.0f} ms, p90 {duracao['p90']:.0f} ms, "
+                f"{dados['bytes'] / 1024:.0f} KiB, "
+                f"{dados['retentativas']} retentativas, "
+                f"{dados['cache_hits']} do cache)"
+            )
+    
+    def _calcular_datas_iniciais(
+        self,
+        modalidades: list,
+        data_limite: datetime
+    ) -> Dict[int, datetime]:
+        """
+        Calcula a data inicial de cada modalidade a partir das marcas d'água
+        
+        Args:
+            modalidades: Códigos de modalidade a buscar
+            data_limite: Data inicial mais antiga permitida
+            
+        Returns:
+            Dicionário modalidade -> data inicial da busca
+        """
+        marcas = self.db.obter_marcas_sincronizacao(self.codigo_ibge)
+        datas_iniciais = {}
+        
+        for codigo_modalidade in modalidades:
+            data_inicial = data_limite
+            marca = marcas.get(codigo_modalidade)
+            
+            if marca:
+                # A API filtra por dia; a sobreposição cobre publicações tardias
+                ultima = datetime.fromisoformat(marca[:10])
+                data_inicial = max(
+                    data_limite,
+                    ultima - timedelta(days=self.SOBREPOSICAO_DIAS)
+                )
+                
+            datas_iniciais[codigo_modalidade] = data_inicial
+            
+        return datas_iniciais
+    
+    def _atualizar_marcas(self, marcas: Dict[int, str], falhas: list):
+        """
+        Registra a última publicação ingerida de cada modalidade completa
+        
+        Args:
+            marcas: Dicionário modalidade -> maior dataPublicacaoPncp vista
+            falhas: Modalidades que não foram buscadas por completo
+        """
+        for codigo_modalidade, ultima_publicacao in marcas.items():
+            if codigo_modalidade not in falhas:
+                self.db.atualizar_marca_sincronizacao(
+                    self.codigo_ibge, codigo_modalidade, ultima_publicacao
+                )
+    
+    def _iter_paginas(
+        self,
+        datas_iniciais: Dict[int, datetime],
+        data_final: datetime,
+        estado: dict
+    ) -> Iterator[list]:
+        """
+        Gera as páginas do período com o cliente configurado
+        
+        Enquanto as páginas são consumidas, `estado` acumula o total de
+        registros ('encontradas'), a maior data de publicação por modalidade
+        ('marcas') e as modalidades que falharam ('falhas').
+        
+        Args:
+            datas_iniciais: Data inicial da busca por modalidade
+            data_final: Data final da busca
+            estado: Dicionário atualizado durante a iteração
+            
+        Yields:
+            Lista de contratações de cada página
+        """
+        if self.usar_async:
+            paginas = self._iter_paginas_async(datas_iniciais, data_final)
+        else:
+            paginas = self.client.iter_contratacoes(
+                codigo_ibge=self.codigo_ibge,
+                data_inicial=min(datas_iniciais.values()),
+                data_final=data_final,
+                datas_iniciais=datas_iniciais
+            )
+            
+        marcas = estado['marcas']
+        
+        try:
+            for pagina in paginas:
+                estado['encontradas'] += len(pagina)
+                
+                for contratacao in pagina:
+                    data = contratacao.get('dataPublicacaoPncp')
+                    modalidade = contratacao.get('_modalidade_codigo')
+                    if data and data > marcas.get(modalidade, ''):
+                        marcas[modalidade] = data
+                        
+                yield pagina
+                
+        except PNCPErroConsulta as e:
+            # As páginas já entregues foram salvas; só as marcas ficam retidas
+            estado['falhas'] = e.modalidades
+    
+    def _iter_paginas_async(
+        self,
+        datas_iniciais: Dict[int, datetime],
+        data_final: datetime
+    ) -> Iterator[list]:
+        """
+        Consome o gerador assíncrono do cliente como um iterador comum
+        
+        O loop de eventos avança até a próxima página e para enquanto ela é
+        gravada: as requisições nunca ficam mais que uma janela à frente.
+        
+        Args:
+            datas_iniciais: Data inicial da busca por modalidade
+            data_final: Data final da busca
+            
+        Yields:
+            Lista de contratações de cada página
+        """
+        paginas = self.client.iter_contratacoes(
+            codigo_ibge=self.codigo_ibge,
+            data_inicial=min(datas_iniciais.values()),
+            data_final=data_final,
+            datas_iniciais=datas_iniciais
+        )
+        
+        async def proxima():
+            return await paginas.__anext__()
+            
+        # A sessão aiohttp pertence ao loop desta execução
+        with asyncio.Runner() as runner:
+            try:
+                while True:
+                    try:
+                        pagina = runner.run(proxima())
+                    except StopAsyncIteration:
+                        return
+                    yield pagina
+            finally:
+                runner.run(paginas.aclose())
+                runner.run(self.client.fechar())
+    
     def obter_contratacoes_nao_notificadas(self) -> list:
         """
         Obtém contratações que ainda não foram notificadas
@@ -136,6 +349,54 @@ class PNCPMonitor:
         """
         return self.db.buscar_contratacoes_nao_notificadas()
     
+    def obter_dados_completos(self, contratacao_ids: list) -> dict:
+        """
+        Obtém os dados originais da API das contratações informadas
+        
+        Args:
+            contratacao_ids: IDs das contratações
+            
+        Returns:
+            Dicionário id -> dados completos
+        """
+        return self.db.obter_dados_completos(contratacao_ids)
+    
+    def reservar_notificacoes(self, limite: int = 500) -> tuple:
+        """
+        Reserva um lote de contratações pendentes de notificação
+        
+        Args:
+            limite: Tamanho máximo do lote
+            
+        Returns:
+            Tupla (token da reserva, lista de contratações)
+        """
+        return self.db.reservar_notificacoes(limite=limite)
+    
+    def marcar_lote_notificado(self, token: str) -> int:
+        """
+        Marca como notificado um lote reservado
+        
+        Args:
+            token: Token da reserva
+            
+        Returns:
+            Número de contratações marcadas
+        """
+        return self.db.marcar_lote_notificado(token)
+    
+    def liberar_reserva_notificacoes(self, token: str) -> int:
+        """
+        Devolve à fila um lote reservado que não foi enviado
+        
+        Args:
+            token: Token da reserva
+            
+        Returns:
+            Número de contratações liberadas
+        """
+        return self.db.liberar_reserva_notificacoes(token)
+    
     def marcar_como_notificado(self, contratacao_id: int):
         """
         Marca uma contratação como notificada
@@ -156,7 +417,8 @@ class PNCPMonitor:
     
     def fechar(self):
         """Fecha conexões e libera recursos"""
-        self.db.fechar()
+        if self._db_proprio:
+            self.db.fechar()
 
 
 def main():
@@ -33,6 +33,7 @@ def main():
     CODIGO_IBGE = "3304706"
     NOME_MUNICIPIO = "Santo Antônio de Pádua - RJ"
     DIAS_RETROATIVOS = 7  # Buscar contratações dos últimos 7 dias
+    TAMANHO_LOTE_NOTIFICACAO = 500  # Contratações por e-mail
     
     # E-mails para notificação (configurar conforme necessário)
     DESTINATARIOS = [
@@ -69,39 +70,44 @@ def main():
         if resultado['novas'] > 0 and DESTINATARIOS:
             logger.info("\n[2/3] Preparando notificações por e-mail...")
             
-            # Buscar contratações não notificadas
-            contratacoes_nao_notificadas = monitor.obter_contratacoes_nao_notificadas()
+            # Criar notificador
+            notificador = EmailNotificador()
+            total_notificadas = 0
+            sucesso = True
             
-            if contratacoes_nao_notificadas:
-                # Criar notificador
-                notificador = EmailNotificador()
+            # Reservar e notificar em lotes (outra execução simultânea
+            # não recebe as mesmas contratações)
+            while True:
+                token, lote = monitor.reservar_notificacoes(limite=TAMANHO_LOTE_NOTIFICACAO)
+                if not lote:
+                    break
                 
-                # Converter formato do banco para formato esperado
-                contratacoes_para_notificar = []
-                for c in contratacoes_nao_notificadas:
-                    import json
-                    dados_completos = json.loads(c['dados_completos'])
-                    contratacoes_para_notificar.append(dados_completos)
+                # Carregar os dados originais da API (formato esperado)
+                dados_completos = monitor.obter_dados_completos([c['id'] for c in lote])
+                contratacoes_para_notificar = [
+                    dados_completos[c['id']] for c in lote if c['id'] in dados_completos
+                ]
                 
                 # Enviar notificação
-                logger.info(f"   Enviando notificação para {len(DESTINATARIOS)} destinatário(s)...")
+                logger.info(f"   Enviando {len(lote)} contratação(ões) para {len(DESTINATARIOS)} destinatário(s)...")
                 sucesso = notificador.enviar_notificacao_novas_contratacoes(
                     destinatarios=DESTINATARIOS,
                     contratacoes=contratacoes_para_notificar,
                     municipio=NOME_MUNICIPIO
                 )
                 
-                if sucesso:
-                    logger.info("✅ Notificações enviadas com sucesso!")
-                    
-                    # Marcar como notificadas
-                    logger.info("\n[3/3] Atualizando status das notificações...")
-                    for c in contratacoes_nao_notificadas:
-                        monitor.marcar_como_notificado(c['id'])
-                    logger.info("✅ Status atualizado!")
-                else:
+                if not sucesso:
+                    # Devolver o lote à fila para a próxima execução
+                    monitor.liberar_reserva_notificacoes(token)
                     logger.warning("⚠️  Falha ao enviar notificações.")
-            else:
+                    break
+                
+                # Marcar o lote inteiro como notificado
+                total_notificadas += monitor.marcar_lote_notificado(token)
+            
+            if total_notificadas:
+                logger.info(f"\n[3/3] ✅ {total_notificadas} contratação(ões) notificada(s)!")
+            elif sucesso:
                 logger.info("   Nenhuma contratação pendente de notificação.")
         elif resultado['novas'] > 0 and not DESTINATARIOS:
             logger.info("\n[2/3] Notificações desabilitadas (sem destinatários configurados)")
@@ -0,0 +1,205 @@
+"""
+Monitoramento de vários municípios em uma única execução
+Compartilha a sessão HTTP, o limitador de taxa e o banco de dados
+"""
+
+import argparse
+import logging
+import sys
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+# Adicionar diretório atual ao path
+sys.path.insert(0, str(Path(__file__).parent))
+
+from pncp_api import PNCPClient, criar_sessao
+from armazenamento import abrir_armazenamento
+from eventos import CanalEventos
+from monitor import PNCPMonitor
+
+logger = logging.getLogger(__name__)
+
+
+def carregar_municipios(caminho: str) -> List[Tuple[str, str]]:
+    """
+    Lê a lista de municípios de um arquivo texto
+    
+    Cada linha contém o código IBGE, opcionalmente seguido de ';' e o nome.
+    Linhas vazias e iniciadas por '#' são ignoradas.
+    
+    Args:
+        caminho: Caminho do arquivo
+        
+    Returns:
+        Lista de tuplas (código IBGE, nome)
+    """
+    municipios = []
+    
+    with open(caminho, encoding='utf-8') as arquivo:
+        for linha in arquivo:
+            linha = linha.strip()
+            if not linha or linha.startswith('#'):
+                continue
+                
+            codigo, _, nome = linha.partition(';')
+            codigo = codigo.strip()
+            municipios.append((codigo, nome.strip() or codigo))
+            
+    return municipios
+
+
+class MonitorMultiMunicipio:
+    """Executa o monitoramento de vários municípios no mesmo processo"""
+    
+    def __init__(
+        self,
+        municipios: List[Tuple[str, str]],
+        db_path: str = "pncp_monitor.db",
+        max_paralelo: int = 4,
+        max_workers: int = 4,
+        canal_eventos: Optional[CanalEventos] = None
+    ):
+        """
+        Inicializa o monitor multi-município
+        
+        Args:
+            municipios: Lista de tuplas (código IBGE, nome)
+            db_path: Arquivo SQLite ou URL postgresql:// do banco de dados
+            max_paralelo: Quantos municípios são monitorados ao mesmo tempo
+            max_workers: Páginas buscadas em paralelo por município
+            canal_eventos: Canal notificado a cada lote gravado (SSE/WebSocket)
+        """
+        self.municipios = municipios
+        self.max_paralelo = max_paralelo
+        self.canal_eventos = canal_eventos
+        
+        # Um único pool de conexões e um único banco para todos os municípios
+        self.session = criar_sessao(tamanho_pool=max_paralelo * max_workers)
+        self.client = PNCPClient(max_workers=max_workers, session=self.session)
+        self.db = abrir_armazenamento(db_path, modo_wal=True)
+        
+        logger.info(f"Monitor multi-município inicializado: {len(municipios)} municípios")
+        
+    def executar(
+        self,
+        dias_retroativos: int = 7,
+        modalidades: Optional[list] = None
+    ) -> Dict[str, dict]:
+        """
+        Executa o monitoramento de todos os municípios
+        
+        Args:
+            dias_retroativos: Quantos dias para trás buscar
+            modalidades: Lista de códigos de modalidade (None = todas)
+            
+        Returns:
+            Dicionário código IBGE -> resultado da execução
+        """
+        resultados = {}
+        
+        with ThreadPoolExecutor(max_workers=self.max_paralelo) as executor:
+            futuros = {
+                executor.submit(
+                    self._executar_municipio,
+                    codigo_ibge,
+                    nome_municipio,
+                    dias_retroativos,
+                    modalidades
+                ): codigo_ibge
+                for codigo_ibge, nome_municipio in self.municipios
+            }
+            
+            for futuro in as_completed(futuros):
+                codigo_ibge = futuros[futuro]
+                resultados[codigo_ibge] = futuro.result()
+                
+        sucessos = sum(1 for r in resultados.values() if r['sucesso'])
+        logger.info(
+            f"Multi-município concluído: {sucessos}/{len(resultados)} com sucesso"
+        )
+        return resultados
+        
+    def _executar_municipio(
+        self,
+        codigo_ibge: str,
+        nome_municipio: str,
+        dias_retroativos: int,
+        modalidades: Optional[list]
+    ) -> dict:
+        """Monitora um município usando o cliente e o banco compartilhados"""
+        monitor = PNCPMonitor(
+            codigo_ibge=codigo_ibge,
+            nome_municipio=nome_municipio,
+            client=self.client,
+            db=self.db,
+            canal_eventos=self.canal_eventos
+        )
+        # Cada execução já é registrada em log_execucoes com o código IBGE
+        return monitor.executar_monitoramento(
+            dias_retroativos=dias_retroativos,
+            modalidades=modalidades
+        )
+        
+    def fechar(self):
+        """Fecha conexões e libera recursos"""
+        self.session.close()
+        self.db.fechar()
+
+
+def main():
+    """Função principal para execução via linha de comando"""
+    parser = argparse.ArgumentParser(
+        description="Monitora vários municípios em uma única execução"
+    )
+    parser.add_argument(
+        "codigos", nargs="*",
+        help="Códigos IBGE dos municípios"
+    )
+    parser.add_argument(
+        "--arquivo",
+        help="Arquivo com um código IBGE por linha (opcionalmente 'codigo;nome')"
+    )
+    parser.add_argument("--dias", type=int, default=7, help="Dias retroativos")
+    parser.add_argument("--paralelo", type=int, default=4, help="Municípios em paralelo")
+    parser.add_argument("--db", default="pncp_monitor.db", help="Arquivo SQLite ou URL postgresql://")
+    args = parser.parse_args()
+    
+    municipios = [(codigo, codigo) for codigo in args.codigos]
+    if args.arquivo:
+        municipios.extend(carregar_municipios(args.arquivo))
+        
+    if not municipios:
+        parser.error("informe ao menos um código IBGE ou --arquivo")
+        
+    monitor = MonitorMultiMunicipio(
+        municipios=municipios,
+        db_path=args.db,
+        max_paralelo=args.paralelo
+    )
+    
+    try:
+        resultados = monitor.executar(dias_retroativos=args.dias)
+        
+        print("\n" + "=" * 80)
+        print("RESUMO POR MUNICÍPIO")
+        print("=" * 80)
+        for codigo_ibge, resultado in sorted(resultados.items()):
+            if resultado['sucesso']:
+                print(
+                    f"{codigo_ibge}: {resultado['total_encontradas']} encontradas, "
+                    f"{resultado['novas']} novas"
+                )
+            else:
+                print(f"{codigo_ibge}: ❌ {resultado['erro']}")
+        print("=" * 80)
+        
+        if not all(r['sucesso'] for r in resultados.values()):
+            sys.exit(1)
+            
+    finally:
+        monitor.fechar()
+
+
+if __name__ == "__main__":
+    main()
@@ -5,10 +5,18 @@ Portal Nacional de Contratações Públicas
 
 import requests
 import logging
+import warnings
+from collections import deque
 from datetime import datetime, timedelta
-from typing import List, Dict, Optional
+from typing import List, Dict, Optional, Tuple, Iterator, Callable
+from concurrent.futures import ThreadPoolExecutor, wait, FIRST_COMPLETED
+import math
 import time
 
+from cache_http import CacheHTTP
+from instrumentacao import Instrumentacao
+from limitador import LimitadorTaxa, obter_limitador
+
 # Configurar logging
 logging.basicConfig(
     level=logging.INFO,
@@ -17,6 +25,38 @@ logging.basicConfig(
 logger = logging.getLogger(__name__)
 
 
+class PNCPErroConsulta(Exception):
+    """Falha ao consultar a API do PNCP após esgotar as tentativas"""
+    
+    def __init__(self, mensagem: str, modalidades: Optional[List[int]] = None):
+        super().__init__(mensagem)
+        # Modalidades cujos resultados ficaram incompletos
+        self.modalidades = modalidades or []
+
+
+def criar_sessao(tamanho_pool: int = 20) -> requests.Session:
+    """
+    Cria uma sessão HTTP com pool de conexões dimensionado
+    
+    Uma única sessão pode ser compartilhada por vários clientes e threads
+    (por exemplo, ao monitorar muitos municípios no mesmo processo).
+    
+    Args:
+        tamanho_pool: Máximo de conexões mantidas abertas por host
+        
+    Returns:
+        Sessão configurada
+    """
+    session = requests.Session()
+    adaptador = requests.adapters.HTTPAdapter(
+        pool_connections=tamanho_pool,
+        pool_maxsize=tamanho_pool
+    )
+    session.mount("https://", adaptador)
+    session.mount("http://", adaptador)
+    return session
+
+
 class PNCPClient:
     """Cliente para interagir com a API do PNCP"""
     
@@ -39,17 +79,159 @@ class PNCPClient:
         13: "Leilão - Presencial"
     }
     
-    def __init__(self, timeout: int = 30, retry_attempts: int = 3):
+    def __init__(
+        self,
+        timeout: int = 30,
+        retry_attempts: int = 3,
+        max_workers: int = 4,
+        limitador: Optional[LimitadorTaxa] = None,
+        session: Optional[requests.Session] = None,
+        cache: Optional[CacheHTTP] = None,
+        limite_registros_janela: int = 1000,
+        ao_requisitar: Optional[Callable[[Dict], None]] = None
+    ):
         """
         Inicializa o cliente PNCP
         
         Args:
             timeout: Timeout para requisições em segundos
             retry_attempts: Número de tentativas em caso de falha
+            max_workers: Máximo de páginas buscadas em paralelo
+            limitador: Limitador de taxa (None = compartilhado pelo processo)
+            session: Sessão HTTP compartilhada (None = cria uma nova)
+            cache: Cache persistente de respostas (None = desativado)
+            limite_registros_janela: Acima deste total o período é dividido
+            ao_requisitar: Função chamada com a medição de cada requisição
         """
         self.timeout = timeout
         self.retry_attempts = retry_attempts
-        self.session = requests.Session()
+        self.max_workers = max_workers
+        self.limitador = limitador or obter_limitador()
+        self.session = session or requests.Session()
+        self.cache = cache
+        self.limite_registros_janela = limite_registros_janela
+        self.metricas = Instrumentacao()
+        self.ao_requisitar = ao_requisitar
+        
+    def _requisitar(
+        self,
+        url: str,
+        params: Optional[Dict] = None,
+        endpoint: str = "",
+        tentativa: int = 0
+    ):
+        """
+        Executa um GET respeitando o limitador de taxa e o cache
+        
+        Entradas válidas do cache são devolvidas sem acessar a rede; entradas
+        expiradas são revalidadas com If-None-Match/If-Modified-Since. Toda
+        requisição gera uma medição em `self.metricas` e no `ao_requisitar`.
+        
+        Args:
+            url: URL da requisição
+            params: Parâmetros de consulta
+            endpoint: Nome do endpoint para as métricas
+            tentativa: Número da tentativa (0 = primeira)
+            
+        Returns:
+            Resposta HTTP
+        """
+        params = params or {}
+        medicao = {
+            'endpoint': endpoint or url,
+            'modalidade': params.get('codigoModalidadeContratacao'),
+            'pagina': params.get('pagina'),
+            'tentativa': tentativa,
+            'status': None,
+            'bytes': 0,
+            'ttfb_ms': None,
+            'duracao_ms': 0.0,
+            'cache': None,
+            'erro': None
+        }
+        inicio = time.perf_counter()
+        
+        try:
+            response = self._executar_get(url, params, medicao, inicio)
+            medicao['status'] = response.status_code
+            return response
+            
+        except Exception as e:
+            medicao['erro'] = type(e).__name__
+            raise
+            
+        finally:
+            medicao['duracao_ms'] = (time.perf_counter() - inicio) * 1000
+            self.metricas.registrar(medicao)
+            if self.ao_requisitar is not None:
+                self.ao_requisitar(medicao)
+    
+    def _executar_get(
+        self,
+        url: str,
+        params: Dict,
+        medicao: Dict,
+        inicio: float
+    ):
+        """Executa o GET (cache, limitador e rede) preenchendo a medição"""
+        entrada = None
+        headers = {}
+        
+        if self.cache is not None:
+            chave = self.cache.gerar_chave(url, params)
+            entrada = self.cache.obter(chave)
+            
+            if entrada and not entrada['expirada']:
+                medicao['cache'] = 'hit'
+                return self._resposta_do_cache(url, entrada)
+                
+            if entrada:
+                if entrada['etag']:
+                    headers['If-None-Match'] = entrada['etag']
+                if entrada['last_modified']:
+                    headers['If-Modified-Since'] = entrada['last_modified']
+        
+        self.limitador.aguardar()
+        
+        # Com stream=True o retorno ocorre ao receber os cabeçalhos
+        inicio_rede = time.perf_counter()
+        response = self.session.get(
+            url, params=params, headers=headers,
+            timeout=self.timeout, stream=True
+        )
+        medicao['ttfb_ms'] = (time.perf_counter() - inicio_rede) * 1000
+        medicao['bytes'] = len(response.content)
+        
+        self.limitador.registrar_resposta(
+            response.status_code,
+            response.headers.get('Retry-After')
+        )
+        
+        if self.cache is not None:
+            ttl = self.cache.calcular_ttl(params)
+            
+            if response.status_code == 304 and entrada:
+                medicao['cache'] = 'revalidado'
+                self.cache.renovar(chave, ttl)
+                return self._resposta_do_cache(url, entrada)
+                
+            if response.status_code in CacheHTTP.STATUS_CACHEAVEIS:
+                self.cache.salvar(
+                    chave, url, response.status_code, response.content, ttl,
+                    etag=response.headers.get('ETag'),
+                    last_modified=response.headers.get('Last-Modified')
+                )
+        
+        return response
+    
+    def _resposta_do_cache(self, url: str, entrada: Dict) -> requests.Response:
+        """Monta uma resposta HTTP a partir de uma entrada do cache"""
+        response = requests.Response()
+        response.status_code = entrada['status_code']
+        response._content = entrada['corpo']
+        response.encoding = 'utf-8'
+        response.url = url
+        return response
         
     def buscar_contratacoes_por_municipio(
         self,
@@ -61,65 +243,314 @@ class PNCPClient:
         tamanho_pagina: int = 50
     ) -> List[Dict]:
         """
-        Busca contratações de um município específico
+        Busca contratações de um município específico (todas as páginas)
         
         Args:
             codigo_ibge: Código IBGE do município (7 dígitos)
             data_inicial: Data inicial da busca
             data_final: Data final da busca
             modalidades: Lista de códigos de modalidade (None = todas)
-            pagina: Número da página
+            pagina: Obsoleto e ignorado: todas as páginas são buscadas
+                (use buscar_pagina para uma página específica)
             tamanho_pagina: Quantidade de registros por página
             
         Returns:
             Lista de contratações encontradas
         """
+        if pagina != 1:
+            warnings.warn(
+                "O parâmetro 'pagina' é ignorado: todas as páginas são buscadas; "
+                "use buscar_pagina para uma página específica",
+                DeprecationWarning,
+                stacklevel=2
+            )
+            
         if modalidades is None:
             # Buscar todas as modalidades
             modalidades = list(self.MODALIDADES.keys())
         
+        resultados = self.buscar_contratacoes_por_modalidades(
+            codigo_ibge=codigo_ibge,
+            datas_iniciais={m: data_inicial for m in modalidades},
+            data_final=data_final,
+            tamanho_pagina=tamanho_pagina
+        )
+        
         todas_contratacoes = []
+        for contratacoes in resultados.values():
+            if contratacoes:
+                todas_contratacoes.extend(contratacoes)
         
-        for codigo_modalidade in modalidades:
-            logger.info(
-                f"Buscando modalidade {codigo_modalidade} "
-                f"({self.MODALIDADES.get(codigo_modalidade, 'Desconhecida')})"
+        logger.info(f"Total de contratações encontradas: {len(todas_contratacoes)}")
+        return todas_contratacoes
+    
+    def buscar_contratacoes_por_modalidades(
+        self,
+        codigo_ibge: str,
+        datas_iniciais: Dict[int, datetime],
+        data_final: datetime,
+        tamanho_pagina: int = 50
+    ) -> Dict[int, Optional[List[Dict]]]:
+        """
+        Busca contratações com uma data inicial própria para cada modalidade
+        
+        Todas as modalidades compartilham o executor de _iter_paginas, então
+        as páginas de uma modalidade não esperam as da anterior terminar.
+        
+        Args:
+            codigo_ibge: Código IBGE do município (7 dígitos)
+            datas_iniciais: Data inicial da busca por código de modalidade
+            data_final: Data final da busca
+            tamanho_pagina: Quantidade de registros por página
+            
+        Returns:
+            Dicionário modalidade -> contratações; None indica que a
+            modalidade falhou e seus resultados estão incompletos
+        """
+        logger.info(f"Buscando {len(datas_iniciais)} modalidades")
+        
+        resultados = {codigo_modalidade: [] for codigo_modalidade in datas_iniciais}
+        falhas = []
+        
+        # As páginas já chegam com as informações da modalidade
+        for pagina in self._iter_paginas(
+            codigo_ibge=codigo_ibge,
+            datas_iniciais=datas_iniciais,
+            data_final=data_final,
+            tamanho_pagina=tamanho_pagina,
+            falhas=falhas
+        ):
+            resultados[pagina[0]['_modalidade_codigo']].extend(pagina)
+            
+        for codigo_modalidade in falhas:
+            resultados[codigo_modalidade] = None
+            
+        for codigo_modalidade, contratacoes in resultados.items():
+            if contratacoes is not None:
+                logger.info(
+                    f"Modalidade {codigo_modalidade} "
+                    f"({self.MODALIDADES.get(codigo_modalidade, 'Desconhecida')}): "
+                    f"{len(contratacoes)} contratações"
+                )
+        
+        return resultados
+    
+    def iter_contratacoes(
+        self,
+        codigo_ibge: str,
+        data_inicial: datetime,
+        data_final: datetime,
+        modalidades: Optional[List[int]] = None,
+        tamanho_pagina: int = 50,
+        datas_iniciais: Optional[Dict[int, datetime]] = None
+    ) -> Iterator[List[Dict]]:
+        """
+        Gera as contratações página a página, sem acumular o período todo
+        
+        As modalidades são buscadas em paralelo; cada página é entregue assim
+        que fica pronta, já com as informações da modalidade. Uma modalidade
+        com falha é interrompida sem afetar as demais.
+        
+        Args:
+            codigo_ibge: Código IBGE do município (7 dígitos)
+            data_inicial: Data inicial da busca
+            data_final: Data final da busca
+            modalidades: Lista de códigos de modalidade (None = todas)
+            tamanho_pagina: Quantidade de registros por página
+            datas_iniciais: Data inicial por modalidade (substitui as anteriores)
+            
+        Yields:
+            Lista de contratações de cada página
+            
+        Raises:
+            PNCPErroConsulta: Ao final, se alguma modalidade ficou incompleta
+                (as páginas obtidas com sucesso já terão sido entregues)
+        """
+        if datas_iniciais is None:
+            if modalidades is None:
+                modalidades = list(self.MODALIDADES.keys())
+            datas_iniciais = {m: data_inicial for m in modalidades}
+        
+        falhas = []
+        
+        yield from self._iter_paginas(
+            codigo_ibge=codigo_ibge,
+            datas_iniciais=datas_iniciais,
+            data_final=data_final,
+            tamanho_pagina=tamanho_pagina,
+            falhas=falhas
+        )
+        
+        if falhas:
+            raise PNCPErroConsulta(
+                f"Falha nas modalidades {sorted(falhas)}",
+                modalidades=sorted(falhas)
             )
+    
+    def _iter_paginas(
+        self,
+        codigo_ibge: str,
+        datas_iniciais: Dict[int, datetime],
+        data_final: datetime,
+        tamanho_pagina: int = 50,
+        falhas: Optional[List[int]] = None
+    ) -> Iterator[List[Dict]]:
+        """
+        Gera as páginas de uma ou mais modalidades à medida que chegam
+        
+        Todas as requisições (primeiras páginas, demais páginas e
+        subperíodos) passam por um único executor: no máximo `max_workers`
+        requisições e `2 * max_workers` páginas à frente do consumidor,
+        qualquer que seja o número de modalidades ou de divisões.
+        
+        A primeira página informa o total de páginas. Se o período tiver mais
+        de `limite_registros_janela` registros, ele é dividido em subperíodos
+        (até dias isolados); os registros dessa primeira página são entregues
+        mesmo assim e ignorados quando reaparecem nos subperíodos.
+        
+        Args:
+            codigo_ibge: Código IBGE do município
+            datas_iniciais: Data inicial da busca por código de modalidade
+            data_final: Data final da busca
+            tamanho_pagina: Quantidade de registros por página
+            falhas: Recebe as modalidades que falharam, sem interromper as
+                demais (None = propaga a primeira falha)
+            
+        Yields:
+            Lista de contratações de cada página, com a modalidade
+            
+        Raises:
+            PNCPErroConsulta: Se alguma página falhar e `falhas` for None
+        """
+        # Tarefa: (modalidade, início, fim, página, chaves já entregues)
+        pendentes = deque(
+            (codigo_modalidade, inicio, data_final, 1, frozenset())
+            for codigo_modalidade, inicio in datas_iniciais.items()
+        )
+        em_execucao = {}
+        
+        def buscar(tarefa: tuple) -> Dict:
+            codigo_modalidade, inicio, fim, pagina, _ = tarefa
+            return self._buscar_pagina(
+                codigo_ibge=codigo_ibge,
+                data_inicial=inicio,
+                data_final=fim,
+                codigo_modalidade=codigo_modalidade,
+                pagina=pagina,
+                tamanho_pagina=tamanho_pagina
+            )
+        
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            def preencher():
+                while pendentes and len(em_execucao) < 2 * self.max_workers:
+                    tarefa = pendentes.popleft()
+                    em_execucao[executor.submit(buscar, tarefa)] = tarefa
             
             try:
-                contratacoes = self._buscar_por_modalidade(
-                    codigo_ibge=codigo_ibge,
-                    data_inicial=data_inicial,
-                    data_final=data_final,
-                    codigo_modalidade=codigo_modalidade,
-                    pagina=pagina,
-                    tamanho_pagina=tamanho_pagina
-                )
-                
-                if contratacoes:
-                    # Adicionar informação da modalidade
-                    for contratacao in contratacoes:
-                        contratacao['_modalidade_codigo'] = codigo_modalidade
-                        contratacao['_modalidade_nome'] = self.MODALIDADES[codigo_modalidade]
-                    
-                    todas_contratacoes.extend(contratacoes)
-                    logger.info(f"Encontradas {len(contratacoes)} contratações")
-                else:
-                    logger.info("Nenhuma contratação encontrada")
+                preencher()
+                while em_execucao:
+                    prontos, _ = wait(em_execucao, return_when=FIRST_COMPLETED)
                     
-                # Pequeno delay para não sobrecarregar a API
-                time.sleep(0.5)
-                
-            except Exception as e:
-                logger.error(
-                    f"Erro ao buscar modalidade {codigo_modalidade}: {e}"
-                )
-                continue
+                    for futuro in prontos:
+                        tarefa = em_execucao.pop(futuro)
+                        codigo_modalidade, _, _, pagina, entregues = tarefa
+                        if falhas is not None and codigo_modalidade in falhas:
+                            continue
+                            
+                        try:
+                            resultado = futuro.result()
+                        except Exception as e:
+                            if falhas is None:
+                                raise
+                            logger.error(
+                                f"Erro ao buscar modalidade {codigo_modalidade}: {e}"
+                            )
+                            falhas.append(codigo_modalidade)
+                            # Descarta o restante da modalidade
+                            restantes = [t for t in pendentes if t[0] != codigo_modalidade]
+                            pendentes.clear()
+                            pendentes.extend(restantes)
+                            continue
+                            
+                        if pagina == 1:
+                            self._planejar_paginas(tarefa, resultado, pendentes)
+                            
+                        # Repõe a janela antes de entregar a página ao consumidor
+                        preencher()
+                        
+                        contratacoes = [
+                            contratacao for contratacao in resultado['contratacoes']
+                            if self._chave_contratacao(contratacao) not in entregues
+                        ]
+                        if contratacoes:
+                            nome_modalidade = self.MODALIDADES.get(codigo_modalidade)
+                            for contratacao in contratacoes:
+                                contratacao['_modalidade_codigo'] = codigo_modalidade
+                                contratacao['_modalidade_nome'] = nome_modalidade
+                            yield contratacoes
+            finally:
+                # Falha ou consumidor encerrado: descarta páginas não iniciadas
+                for futuro in em_execucao:
+                    futuro.cancel()
+    
+    def _planejar_paginas(self, tarefa: tuple, primeira: Dict, pendentes: deque):
+        """
+        Enfileira o restante de um período a partir da sua primeira página
         
-        logger.info(f"Total de contratações encontradas: {len(todas_contratacoes)}")
-        return todas_contratacoes
+        Args:
+            tarefa: Tarefa da primeira página (modalidade, início, fim, 1, entregues)
+            primeira: Resultado da primeira página
+            pendentes: Fila de tarefas do executor
+        """
+        codigo_modalidade, inicio, fim, _, entregues = tarefa
+        total_paginas = primeira['total_paginas']
+        if total_paginas <= 1:
+            return
+            
+        dias = (fim.date() - inicio.date()).days + 1
+        
+        if primeira['total_registros'] > self.limite_registros_janela and dias > 1:
+            partes = min(
+                dias,
+                math.ceil(primeira['total_registros'] / self.limite_registros_janela)
+            )
+            janelas = self._dividir_janela(inicio, fim, partes)
+            logger.info(
+                f"Modalidade {codigo_modalidade}: período dividido em "
+                f"{len(janelas)} subperíodos"
+            )
+            
+            # A primeira página já foi entregue: não repetir seus registros
+            entregues = entregues | {
+                self._chave_contratacao(contratacao)
+                for contratacao in primeira['contratacoes']
+            }
+            pendentes.extend(
+                (codigo_modalidade, sub_inicio, sub_fim, 1, entregues)
+                for sub_inicio, sub_fim in janelas
+            )
+            return
+            
+        logger.info(
+            f"Modalidade {codigo_modalidade}: {primeira['total_registros']} "
+            f"registros em {total_paginas} páginas"
+        )
+        pendentes.extend(
+            (codigo_modalidade, inicio, fim, pagina, entregues)
+            for pagina in range(2, total_paginas + 1)
+        )
+    
+    @staticmethod
+    def _chave_contratacao(contratacao: Dict) -> tuple:
+        """Identifica a contratação: (CNPJ do órgão, ano, sequencial)"""
+        orgao = contratacao.get('orgaoEntidade') or {}
+        return (
+            orgao.get('cnpj'),
+            contratacao.get('anoCompra'),
+            contratacao.get('sequencialCompra')
+        )
     
-    def _buscar_por_modalidade(
+    def buscar_pagina(
         self,
         codigo_ibge: str,
         data_inicial: datetime,
@@ -127,9 +558,9 @@ class PNCPClient:
         codigo_modalidade: int,
         pagina: int = 1,
         tamanho_pagina: int = 50
-    ) -> List[Dict]:
+    ) -> Dict:
         """
-        Busca contratações de uma modalidade específica
+        Busca uma única página de uma modalidade
         
         Args:
             codigo_ibge: Código IBGE do município
@@ -140,7 +571,85 @@ class PNCPClient:
             tamanho_pagina: Quantidade de registros por página
             
         Returns:
-            Lista de contratações
+            Dicionário com 'contratacoes', 'total_paginas' e 'total_registros'
+            
+        Raises:
+            PNCPErroConsulta: Se a página não puder ser obtida
+        """
+        resultado = self._buscar_pagina(
+            codigo_ibge=codigo_ibge,
+            data_inicial=data_inicial,
+            data_final=data_final,
+            codigo_modalidade=codigo_modalidade,
+            pagina=pagina,
+            tamanho_pagina=tamanho_pagina
+        )
+        
+        for contratacao in resultado['contratacoes']:
+            contratacao['_modalidade_codigo'] = codigo_modalidade
+            contratacao['_modalidade_nome'] = self.MODALIDADES[codigo_modalidade]
+        
+        return resultado
+    
+    @staticmethod
+    def _dividir_janela(
+        data_inicial: datetime,
+        data_final: datetime,
+        partes: int
+    ) -> List[Tuple[datetime, datetime]]:
+        """
+        Divide um período em subperíodos contíguos de dias inteiros
+        
+        Args:
+            data_inicial: Data inicial do período
+            data_final: Data final do período
+            partes: Quantidade desejada de subperíodos
+            
+        Returns:
+            Lista de tuplas (data inicial, data final), sem sobreposição
+        """
+        inicio = datetime.combine(data_inicial.date(), datetime.min.time())
+        dias = (data_final.date() - data_inicial.date()).days + 1
+        partes = max(1, min(partes, dias))
+        
+        janelas = []
+        deslocamento = 0
+        for indice in range(partes):
+            # Distribui o resto da divisão pelos primeiros subperíodos
+            tamanho = dias // partes + (1 if indice < dias % partes else 0)
+            janelas.append((
+                inicio + timedelta(days=deslocamento),
+                inicio + timedelta(days=deslocamento + tamanho - 1)
+            ))
+            deslocamento += tamanho
+        
+        return janelas
+    
+    def _buscar_pagina(
+        self,
+        codigo_ibge: str,
+        data_inicial: datetime,
+        data_final: datetime,
+        codigo_modalidade: int,
+        pagina: int = 1,
+        tamanho_pagina: int = 50
+    ) -> Dict:
+        """
+        Busca uma única página de contratações
+        
+        Args:
+            codigo_ibge: Código IBGE do município
+            data_inicial: Data inicial da busca
+            data_final: Data final da busca
+            codigo_modalidade: Código da modalidade
+            pagina: Número da página
+            tamanho_pagina: Quantidade de registros por página
+            
+        Returns:
+            Dicionário com 'contratacoes', 'total_paginas' e 'total_registros'
+            
+        Raises:
+            PNCPErroConsulta: Se a página não puder ser obtida
         """
         url = f"{self.BASE_URL}/contratacoes/publicacao"
         
@@ -153,25 +662,46 @@ class PNCPClient:
             "tamanhoPagina": tamanho_pagina
         }
         
+        vazia = {'contratacoes': [], 'total_paginas': 0, 'total_registros': 0}
+        
         for tentativa in range(self.retry_attempts):
             try:
-                response = self.session.get(
+                response = self._requisitar(
                     url,
                     params=params,
-                    timeout=self.timeout
+                    endpoint="contratacoes/publicacao",
+                    tentativa=tentativa
                 )
                 
                 if response.status_code == 200:
                     data = response.json()
-                    return self._extrair_contratacoes(data)
+                    contratacoes = self._extrair_contratacoes(data)
+                    total_paginas, total_registros = self._extrair_paginacao(
+                        data, contratacoes
+                    )
+                    return {
+                        'contratacoes': contratacoes,
+                        'total_paginas': total_paginas,
+                        'total_registros': total_registros
+                    }
+                    
+                elif response.status_code == 204:
+                    # A API responde 204 quando não há registros no período
+                    return vazia
                     
                 elif response.status_code == 422:
                     logger.warning(f"Código IBGE inválido: {codigo_ibge}")
-                    return []
+                    return vazia
                     
                 elif response.status_code == 404:
                     logger.warning("Endpoint não encontrado")
-                    return []
+                    return vazia
+                    
+                elif response.status_code in LimitadorTaxa.STATUS_SOBRECARGA:
+                    # O limitador já reduziu a taxa e aplica o Retry-After
+                    logger.warning(
+                        f"Status {response.status_code} na tentativa {tentativa + 1}"
+                    )
                     
                 else:
                     logger.warning(
@@ -188,7 +718,35 @@ class PNCPClient:
                 if tentativa < self.retry_attempts - 1:
                     time.sleep(2 ** tentativa)
                     
-        return []
+        raise PNCPErroConsulta(
+            f"Falha ao buscar página {pagina} da modalidade "
+            f"{codigo_modalidade} após {self.retry_attempts} tentativas"
+        )
+    
+    def _extrair_paginacao(
+        self,
+        data: Dict,
+        contratacoes: List[Dict]
+    ) -> Tuple[int, int]:
+        """
+        Extrai os totais de paginação da resposta da API
+        
+        Args:
+            data: Dados retornados pela API
+            contratacoes: Contratações já extraídas da página
+            
+        Returns:
+            Tupla (total de páginas, total de registros)
+        """
+        if isinstance(data, dict):
+            total_paginas = data.get('totalPaginas')
+            total_registros = data.get('totalRegistros')
+            
+            if total_paginas is not None:
+                return int(total_paginas), int(total_registros or len(contratacoes))
+        
+        # Resposta sem metadados de paginação: considerar página única
+        return (1 if contratacoes else 0), len(contratacoes)
     
     def _extrair_contratacoes(self, data: Dict) -> List[Dict]:
         """
@@ -239,7 +797,7 @@ class PNCPClient:
         url = f"{self.BASE_URL}/orgaos/{cnpj}/compras/{ano}/{sequencial}"
         
         try:
-            response = self.session.get(url, timeout=self.timeout)
+            response = self._requisitar(url, endpoint="orgaos/compras")
             
             if response.status_code == 200:
                 return response.json()
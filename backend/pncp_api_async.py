@@ -0,0 +1,526 @@
+"""
+Cliente assíncrono da API do PNCP
+Executa modalidades e páginas em paralelo com concorrência limitada
+"""
+
+import asyncio
+import logging
+import math
+from collections import deque
+from contextlib import asynccontextmanager
+from datetime import datetime
+from typing import AsyncIterator, List, Dict, Optional
+
+import aiohttp
+
+from limitador import LimitadorTaxa, obter_limitador
+from pncp_api import PNCPClient, PNCPErroConsulta
+
+logger = logging.getLogger(__name__)
+
+
+class AsyncPNCPClient:
+    """Cliente assíncrono para interagir com a API do PNCP"""
+    
+    BASE_URL = PNCPClient.BASE_URL
+    MODALIDADES = PNCPClient.MODALIDADES
+    
+    # Mesma interpretação das respostas do cliente síncrono
+    _extrair_contratacoes = PNCPClient._extrair_contratacoes
+    _extrair_paginacao = PNCPClient._extrair_paginacao
+    _dividir_janela = staticmethod(PNCPClient._dividir_janela)
+    _planejar_paginas = PNCPClient._planejar_paginas
+    _chave_contratacao = staticmethod(PNCPClient._chave_contratacao)
+    formatar_contratacao = PNCPClient.formatar_contratacao
+    _extrair_orgao = PNCPClient._extrair_orgao
+    _gerar_link_pncp = PNCPClient._gerar_link_pncp
+    
+    def __init__(
+        self,
+        timeout: int = 30,
+        retry_attempts: int = 3,
+        max_concorrencia: int = 8,
+        limitador: Optional[LimitadorTaxa] = None,
+        limite_registros_janela: int = 1000
+    ):
+        """
+        Inicializa o cliente assíncrono
+        
+        Args:
+            timeout: Timeout para requisições em segundos
+            retry_attempts: Número de tentativas em caso de falha
+            max_concorrencia: Máximo de requisições simultâneas
+            limitador: Limitador de taxa (None = compartilhado pelo processo)
+            limite_registros_janela: Acima deste total o período é dividido
+        """
+        self.timeout = timeout
+        self.retry_attempts = retry_attempts
+        self.max_concorrencia = max_concorrencia
+        self.limitador = limitador or obter_limitador()
+        self.limite_registros_janela = limite_registros_janela
+        self.session: Optional[aiohttp.ClientSession] = None
+        self._semaforo: Optional[asyncio.Semaphore] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._usos = 0
+        
+    def _obter_sessao(self) -> aiohttp.ClientSession:
+        """
+        Cria a sessão HTTP no loop de eventos corrente, se necessário
+        
+        Sessão e semáforo pertencem ao loop em que foram criados: com outro
+        loop (ex.: um novo asyncio.run) ambos são recriados.
+        """
+        loop = asyncio.get_running_loop()
+        if self.session is None or self.session.closed or self._loop is not loop:
+            if self.session is not None and not self.session.closed:
+                # O loop antigo já terminou: a sessão não pode mais ser usada
+                logger.debug("Loop de eventos trocado; recriando sessão HTTP")
+                self.session.detach()
+            self.session = aiohttp.ClientSession(
+                timeout=aiohttp.ClientTimeout(total=self.timeout),
+                connector=aiohttp.TCPConnector(limit=self.max_concorrencia)
+            )
+            self._semaforo = asyncio.Semaphore(self.max_concorrencia)
+            self._loop = loop
+        return self.session
+        
+    @asynccontextmanager
+    async def _uso_sessao(self):
+        """Mantém a sessão aberta durante uma chamada e a fecha ao fim da última"""
+        self._usos += 1
+        try:
+            yield self._obter_sessao()
+        finally:
+            self._usos -= 1
+            if self._usos == 0:
+                await self.fechar()
+                
+    async def fechar(self):
+        """Fecha a sessão HTTP"""
+        if self.session is not None and not self.session.closed:
+            if self._loop is asyncio.get_running_loop():
+                await self.session.close()
+            else:
+                self.session.detach()
+        self.session = None
+        self._semaforo = None
+        self._loop = None
+        
+    async def __aenter__(self):
+        """Suporte para context manager assíncrono"""
+        self._usos += 1
+        return self
+        
+    async def __aexit__(self, exc_type, exc_val, exc_tb):
+        """Suporte para context manager assíncrono"""
+        self._usos -= 1
+        await self.fechar()
+        
+    async def _aguardar_limitador(self):
+        """Aguarda a vez da requisição no limitador sem bloquear o loop"""
+        espera = self.limitador.reservar()
+        if espera > 0:
+            await asyncio.sleep(espera)
+            
+    def _registrar_resposta(self, response: aiohttp.ClientResponse):
+        """Informa o status da resposta ao limitador"""
+        self.limitador.registrar_resposta(
+            response.status,
+            response.headers.get('Retry-After')
+        )
+        
+    async def buscar_contratacoes_por_municipio(
+        self,
+        codigo_ibge: str,
+        data_inicial: datetime,
+        data_final: datetime,
+        modalidades: Optional[List[int]] = None,
+        tamanho_pagina: int = 50
+    ) -> List[Dict]:
+        """
+        Busca contratações de um município em todas as modalidades em paralelo
+        
+        Args:
+            codigo_ibge: Código IBGE do município (7 dígitos)
+            data_inicial: Data inicial da busca
+            data_final: Data final da busca
+            modalidades: Lista de códigos de modalidade (None = todas)
+            tamanho_pagina: Quantidade de registros por página
+            
+        Returns:
+            Lista de contratações encontradas
+        """
+        if modalidades is None:
+            modalidades = list(self.MODALIDADES.keys())
+            
+        resultados = await self.buscar_contratacoes_por_modalidades(
+            codigo_ibge=codigo_ibge,
+            datas_iniciais={m: data_inicial for m in modalidades},
+            data_final=data_final,
+            tamanho_pagina=tamanho_pagina
+        )
+        
+        todas_contratacoes = []
+        for contratacoes in resultados.values():
+            if contratacoes:
+                todas_contratacoes.extend(contratacoes)
+                
+        logger.info(f"Total de contratações encontradas: {len(todas_contratacoes)}")
+        return todas_contratacoes
+        
+    async def buscar_contratacoes_por_modalidades(
+        self,
+        codigo_ibge: str,
+        datas_iniciais: Dict[int, datetime],
+        data_final: datetime,
+        tamanho_pagina: int = 50
+    ) -> Dict[int, Optional[List[Dict]]]:
+        """
+        Busca em paralelo, com uma data inicial própria para cada modalidade
+        
+        Args:
+            codigo_ibge: Código IBGE do município (7 dígitos)
+            datas_iniciais: Data inicial da busca por código de modalidade
+            data_final: Data final da busca
+            tamanho_pagina: Quantidade de registros por página
+            
+        Returns:
+            Dicionário modalidade -> contratações; None indica que a
+            modalidade falhou e seus resultados estão incompletos
+        """
+        modalidades = list(datas_iniciais.keys())
+        
+        async with self._uso_sessao():
+            resultados = await asyncio.gather(*[
+                self._buscar_modalidade_segura(
+                    codigo_ibge=codigo_ibge,
+                    data_inicial=datas_iniciais[codigo_modalidade],
+                    data_final=data_final,
+                    codigo_modalidade=codigo_modalidade,
+                    tamanho_pagina=tamanho_pagina
+                )
+                for codigo_modalidade in modalidades
+            ])
+        
+        return dict(zip(modalidades, resultados))
+        
+    async def iter_contratacoes(
+        self,
+        codigo_ibge: str,
+        data_inicial: datetime,
+        data_final: datetime,
+        modalidades: Optional[List[int]] = None,
+        tamanho_pagina: int = 50,
+        datas_iniciais: Optional[Dict[int, datetime]] = None
+    ) -> AsyncIterator[List[Dict]]:
+        """
+        Gera as contratações página a página, sem acumular o período todo
+        
+        Mesma divisão em tarefas do cliente síncrono: no máximo
+        `2 * max_concorrencia` páginas em andamento ou prontas à frente do
+        consumidor. Uma modalidade com falha é interrompida sem afetar as
+        demais.
+        
+        Args:
+            codigo_ibge: Código IBGE do município (7 dígitos)
+            data_inicial: Data inicial da busca
+            data_final: Data final da busca
+            modalidades: Lista de códigos de modalidade (None = todas)
+            tamanho_pagina: Quantidade de registros por página
+            datas_iniciais: Data inicial por modalidade (substitui as anteriores)
+            
+        Yields:
+            Lista de contratações de cada página, com a modalidade
+            
+        Raises:
+            PNCPErroConsulta: Ao final, se alguma modalidade ficou incompleta
+                (as páginas obtidas com sucesso já terão sido entregues)
+        """
+        if datas_iniciais is None:
+            if modalidades is None:
+                modalidades = list(self.MODALIDADES.keys())
+            datas_iniciais = {m: data_inicial for m in modalidades}
+            
+        # Tarefa: (modalidade, início, fim, página, chaves já entregues)
+        pendentes = deque(
+            (codigo_modalidade, inicio, data_final, 1, frozenset())
+            for codigo_modalidade, inicio in datas_iniciais.items()
+        )
+        em_execucao = {}
+        falhas = []
+        
+        def preencher():
+            while pendentes and len(em_execucao) < 2 * self.max_concorrencia:
+                tarefa = pendentes.popleft()
+                codigo_modalidade, inicio, fim, pagina, _ = tarefa
+                futuro = asyncio.ensure_future(self._buscar_pagina(
+                    codigo_ibge, inicio, fim, codigo_modalidade, pagina, tamanho_pagina
+                ))
+                em_execucao[futuro] = tarefa
+                
+        try:
+            preencher()
+            while em_execucao:
+                prontos, _ = await asyncio.wait(
+                    em_execucao, return_when=asyncio.FIRST_COMPLETED
+                )
+                
+                for futuro in prontos:
+                    tarefa = em_execucao.pop(futuro)
+                    codigo_modalidade, _, _, pagina, entregues = tarefa
+                    if codigo_modalidade in falhas:
+                        continue
+                        
+                    try:
+                        resultado = futuro.result()
+                    except Exception as e:
+                        logger.error(f"Erro ao buscar modalidade {codigo_modalidade}: {e}")
+                        falhas.append(codigo_modalidade)
+                        # Descarta o restante da modalidade
+                        restantes = [t for t in pendentes if t[0] != codigo_modalidade]
+                        pendentes.clear()
+                        pendentes.extend(restantes)
+                        continue
+                        
+                    if pagina == 1:
+                        self._planejar_paginas(tarefa, resultado, pendentes)
+                        
+                    # Repõe a janela antes de entregar a página ao consumidor
+                    preencher()
+                    
+                    contratacoes = [
+                        contratacao for contratacao in resultado['contratacoes']
+                        if self._chave_contratacao(contratacao) not in entregues
+                    ]
+                    if contratacoes:
+                        nome_modalidade = self.MODALIDADES.get(codigo_modalidade)
+                        for contratacao in contratacoes:
+                            contratacao['_modalidade_codigo'] = codigo_modalidade
+                            contratacao['_modalidade_nome'] = nome_modalidade
+                        yield contratacoes
+        finally:
+            # Falha ou consumidor encerrado: cancela as páginas em andamento
+            for futuro in em_execucao:
+                futuro.cancel()
+            await asyncio.gather(*em_execucao, return_exceptions=True)
+            
+        if falhas:
+            raise PNCPErroConsulta(
+                f"Falha nas modalidades {sorted(falhas)}",
+                modalidades=sorted(falhas)
+            )
+            
+    async def _buscar_modalidade_segura(
+        self,
+        codigo_ibge: str,
+        data_inicial: datetime,
+        data_final: datetime,
+        codigo_modalidade: int,
+        tamanho_pagina: int = 50
+    ) -> Optional[List[Dict]]:
+        """
+        Busca uma modalidade registrando erros em vez de propagá-los
+        
+        Returns:
+            Lista de contratações (None em caso de erro)
+        """
+        nome_modalidade = self.MODALIDADES.get(codigo_modalidade, 'Desconhecida')
+        
+        try:
+            contratacoes = await self._buscar_por_modalidade(
+                codigo_ibge=codigo_ibge,
+                data_inicial=data_inicial,
+                data_final=data_final,
+                codigo_modalidade=codigo_modalidade,
+                tamanho_pagina=tamanho_pagina
+            )
+        except Exception as e:
+            logger.error(f"Erro ao buscar modalidade {codigo_modalidade}: {e}")
+            return None
+            
+        for contratacao in contratacoes:
+            contratacao['_modalidade_codigo'] = codigo_modalidade
+            contratacao['_modalidade_nome'] = nome_modalidade
+            
+        logger.info(
+            f"Modalidade {codigo_modalidade} ({nome_modalidade}): "
+            f"{len(contratacoes)} contratações"
+        )
+        return contratacoes
+        
+    async def _buscar_por_modalidade(
+        self,
+        codigo_ibge: str,
+        data_inicial: datetime,
+        data_final: datetime,
+        codigo_modalidade: int,
+        tamanho_pagina: int = 50
+    ) -> List[Dict]:
+        """
+        Busca todas as páginas de uma modalidade específica
+        
+        Períodos com mais de `limite_registros_janela` registros são
+        divididos em subperíodos (até dias isolados) buscados em paralelo.
+        
+        Raises:
+            PNCPErroConsulta: Se alguma página falhar após as tentativas
+        """
+        primeira = await self._buscar_pagina(
+            codigo_ibge, data_inicial, data_final,
+            codigo_modalidade, 1, tamanho_pagina
+        )
+        
+        contratacoes = list(primeira['contratacoes'])
+        dias = (data_final.date() - data_inicial.date()).days + 1
+        
+        if primeira['total_registros'] > self.limite_registros_janela and dias > 1:
+            partes = math.ceil(
+                primeira['total_registros'] / self.limite_registros_janela
+            )
+            subjanelas = await asyncio.gather(*[
+                self._buscar_por_modalidade(
+                    codigo_ibge, inicio, fim, codigo_modalidade, tamanho_pagina
+                )
+                for inicio, fim in self._dividir_janela(
+                    data_inicial, data_final, partes
+                )
+            ])
+            return [c for resultado in subjanelas for c in resultado]
+            
+        if primeira['total_paginas'] > 1:
+            restantes = await asyncio.gather(*[
+                self._buscar_pagina(
+                    codigo_ibge, data_inicial, data_final,
+                    codigo_modalidade, pagina, tamanho_pagina
+                )
+                for pagina in range(2, primeira['total_paginas'] + 1)
+            ])
+            for resultado in restantes:
+                contratacoes.extend(resultado['contratacoes'])
+                
+        return contratacoes
+        
+    async def _buscar_pagina(
+        self,
+        codigo_ibge: str,
+        data_inicial: datetime,
+        data_final: datetime,
+        codigo_modalidade: int,
+        pagina: int = 1,
+        tamanho_pagina: int = 50
+    ) -> Dict:
+        """
+        Busca uma única página de contratações
+        
+        Returns:
+            Dicionário com 'contratacoes', 'total_paginas' e 'total_registros'
+            
+        Raises:
+            PNCPErroConsulta: Se a página não puder ser obtida
+        """
+        url = f"{self.BASE_URL}/contratacoes/publicacao"
+        
+        params = {
+            "dataInicial": data_inicial.strftime("%Y%m%d"),
+            "dataFinal": data_final.strftime("%Y%m%d"),
+            "codigoMunicipioIbge": codigo_ibge,
+            "codigoModalidadeContratacao": codigo_modalidade,
+            "pagina": pagina,
+            "tamanhoPagina": tamanho_pagina
+        }
+        
+        vazia = {'contratacoes': [], 'total_paginas': 0, 'total_registros': 0}
+        session = self._obter_sessao()
+        
+        for tentativa in range(self.retry_attempts):
+            try:
+                async with self._semaforo:
+                    await self._aguardar_limitador()
+                    async with session.get(url, params=params) as response:
+                        self._registrar_resposta(response)
+                        status = response.status
+                        
+                        if status == 200:
+                            data = await response.json(content_type=None)
+                        else:
+                            texto = await response.text()
+                            
+                if status == 200:
+                    contratacoes = self._extrair_contratacoes(data)
+                    total_paginas, total_registros = self._extrair_paginacao(
+                        data, contratacoes
+                    )
+                    return {
+                        'contratacoes': contratacoes,
+                        'total_paginas': total_paginas,
+                        'total_registros': total_registros
+                    }
+                    
+                elif status == 204:
+                    return vazia
+                    
+                elif status == 422:
+                    logger.warning(f"Código IBGE inválido: {codigo_ibge}")
+                    return vazia
+                    
+                elif status == 404:
+                    logger.warning("Endpoint não encontrado")
+                    return vazia
+                    
+                elif status in LimitadorTaxa.STATUS_SOBRECARGA:
+                    # O limitador já reduziu a taxa e aplica o Retry-After
+                    logger.warning(f"Status {status} na tentativa {tentativa + 1}")
+                    
+                else:
+                    logger.warning(f"Status {status}: {texto[:200]}")
+                    
+            except asyncio.TimeoutError:
+                logger.warning(f"Timeout na tentativa {tentativa + 1}")
+                if tentativa < self.retry_attempts - 1:
+                    await asyncio.sleep(2 ** tentativa)  # Backoff exponencial
+                    
+            except aiohttp.ClientError as e:
+                logger.error(f"Erro na requisição: {e}")
+                if tentativa < self.retry_attempts - 1:
+                    await asyncio.sleep(2 ** tentativa)
+                    
+        raise PNCPErroConsulta(
+            f"Falha ao buscar página {pagina} da modalidade "
+            f"{codigo_modalidade} após {self.retry_attempts} tentativas"
+        )
+        
+    async def buscar_detalhes_contratacao(
+        self,
+        cnpj: str,
+        ano: int,
+        sequencial: int
+    ) -> Optional[Dict]:
+        """
+        Busca detalhes de uma contratação específica
+        
+        Args:
+            cnpj: CNPJ do órgão
+            ano: Ano da compra
+            sequencial: Número sequencial da compra
+            
+        Returns:
+            Detalhes da contratação ou None
+        """
+        url = f"{self.BASE_URL}/orgaos/{cnpj}/compras/{ano}/{sequencial}"
+        
+        try:
+            async with self._uso_sessao() as session, self._semaforo:
+                await self._aguardar_limitador()
+                async with session.get(url) as response:
+                    self._registrar_resposta(response)
+                    if response.status == 200:
+                        return await response.json(content_type=None)
+                        
+                    logger.warning(
+                        f"Erro ao buscar detalhes: {response.status}"
+                    )
+                    return None
+                    
+        except Exception as e:
+            logger.error(f"Erro ao buscar detalhes: {e}")
+            return None
@@ -0,0 +1,572 @@
+"""
+API HTTP somente leitura para o dashboard
+Lista, detalhe e estatísticas das contratações, com ETag e compressão,
+e fluxo de eventos (SSE/WebSocket) das contratações novas ou alteradas
+"""
+
+import argparse
+import asyncio
+import contextlib
+import functools
+import gzip
+import json
+import logging
+import sys
+from pathlib import Path
+from typing import Callable, Optional
+
+from aiohttp import web
+
+# Adicionar diretório atual ao path
+sys.path.insert(0, str(Path(__file__).parent))
+
+from armazenamento import Armazenamento, _para_epoch, abrir_armazenamento
+from eventos import RECARREGAR, CanalEventos, carregar_eventos
+
+logger = logging.getLogger(__name__)
+
+# Respostas menores que isso não compensam a compressão
+TAMANHO_MINIMO_COMPRESSAO = 1024
+
+# Registros por página nas listagens
+LIMITE_PADRAO = 50
+LIMITE_MAXIMO = 500
+
+# Intervalo entre comentários de keep-alive no fluxo SSE (segundos)
+INTERVALO_KEEPALIVE = 15
+
+CHAVE_DB = web.AppKey("db", Armazenamento)
+CHAVE_CORS = web.AppKey("origem_cors", str)
+CHAVE_CANAL = web.AppKey("canal_eventos", CanalEventos)
+CHAVE_INTERVALO = web.AppKey("intervalo_eventos", float)
+
+
+@functools.lru_cache(maxsize=None)
+def _brotli():
+    """Módulo brotli, se instalado (compressão opcional)"""
+    try:
+        import brotli
+        return brotli
+    except ImportError:
+        return None
+
+
+def _codificacao(request: web.Request) -> Optional[str]:
+    """Escolhe a compressão aceita pelo cliente: br, gzip ou nenhuma"""
+    aceitas = set()
+    for parte in request.headers.get("Accept-Encoding", "").split(","):
+        nome, _, parametros = parte.partition(";")
+        if parametros.replace(" ", "") in ("q=0", "q=0.0"):
+            continue
+        aceitas.add(nome.strip().lower())
+        
+    if "br" in aceitas and _brotli() is not None:
+        return "br"
+    if "gzip" in aceitas:
+        return "gzip"
+    return None
+
+
+def _parametro_invalido(mensagem: str) -> web.HTTPBadRequest:
+    """Erro 400 com corpo JSON, no mesmo formato das demais respostas de erro"""
+    return web.HTTPBadRequest(
+        text=json.dumps({'erro': mensagem}, ensure_ascii=False),
+        content_type="application/json"
+    )
+
+
+def _inteiro(
+    request: web.Request,
+    nome: str,
+    padrao: Optional[int] = None,
+    minimo: Optional[int] = None,
+    maximo: Optional[int] = None
+) -> Optional[int]:
+    """Lê um parâmetro inteiro da query string (HTTPBadRequest se inválido)"""
+    valor = request.query.get(nome)
+    if valor in (None, ""):
+        return padrao
+        
+    try:
+        numero = int(valor)
+    except ValueError:
+        raise _parametro_invalido(f"Parâmetro '{nome}' deve ser inteiro: {valor}") from None
+        
+    if minimo is not None and numero < minimo:
+        raise _parametro_invalido(f"Parâmetro '{nome}' deve ser no mínimo {minimo}")
+    if maximo is not None and numero > maximo:
+        raise _parametro_invalido(f"Parâmetro '{nome}' deve ser no máximo {maximo}")
+    return numero
+
+
+def _data(request: web.Request, nome: str) -> Optional[str]:
+    """Lê um parâmetro de data ISO da query string (HTTPBadRequest se inválido)"""
+    valor = request.query.get(nome) or None
+    if valor is not None and _para_epoch(valor) is None:
+        raise _parametro_invalido(f"Parâmetro '{nome}' deve ser uma data ISO: {valor}")
+    return valor
+
+
+def _opcao(request: web.Request, nome: str, opcoes, padrao: Optional[str] = None) -> Optional[str]:
+    """Lê um parâmetro restrito a um conjunto de valores (HTTPBadRequest se inválido)"""
+    valor = request.query.get(nome) or padrao
+    if valor is not None and valor not in opcoes:
+        raise _parametro_invalido(
+            f"Parâmetro '{nome}' deve ser um de: {', '.join(sorted(opcoes))}"
+        )
+    return valor
+
+
+def _cursor(request: web.Request) -> Optional[str]:
+    """Lê o cursor de paginação devolvido pela página anterior"""
+    valor = request.query.get("cursor") or None
+    if valor is not None:
+        try:
+            Armazenamento._decodificar_cursor(valor)
+        except ValueError:
+            raise _parametro_invalido(f"Cursor de paginação inválido: {valor}") from None
+    return valor
+
+
+def _json(dados, status: int = 200) -> web.Response:
+    """Resposta JSON sem cache (erros)"""
+    return web.json_response(
+        dados, status=status, dumps=functools.partial(json.dumps, ensure_ascii=False)
+    )
+
+
+async def _responder(request: web.Request, consulta: Callable) -> web.Response:
+    """
+    Executa uma consulta e monta a resposta com ETag e compressão
+    
+    O ETag é a geração atual do banco, que muda a cada gravação,
+    notificação ou arquivamento de contratações: se o cliente já tem a
+    mesma geração (If-None-Match), a resposta é 304 sem executar a consulta.
+    
+    Args:
+        request: Requisição
+        consulta: Função sem argumentos que consulta o banco (None = 404)
+        
+    Returns:
+        Resposta HTTP
+    """
+    db = request.app[CHAVE_DB]
+    loop = asyncio.get_running_loop()
+    
+    codificacao = _codificacao(request)
+    geracao = await loop.run_in_executor(None, db.obter_geracao)
+    etag = f'"g{geracao}-{codificacao}"' if codificacao else f'"g{geracao}"'
+    
+    cabecalhos = {
+        "ETag": etag,
+        "Cache-Control": "no-cache",
+        "Vary": "Accept-Encoding"
+    }
+    
+    recebidos = request.headers.get("If-None-Match", "")
+    if etag in (valor.strip() for valor in recebidos.split(",")) or recebidos.strip() == "*":
+        return web.Response(status=304, headers=cabecalhos)
+        
+    dados = await loop.run_in_executor(None, consulta)
+    if dados is None:
+        return _json({'erro': "Não encontrado"}, status=404)
+        
+    corpo = json.dumps(dados, ensure_ascii=False, default=str).encode("utf-8")
+    
+    if codificacao and len(corpo) >= TAMANHO_MINIMO_COMPRESSAO:
+        if codificacao == "br":
+            corpo = _brotli().compress(corpo, quality=5)
+        else:
+            corpo = gzip.compress(corpo, compresslevel=6)
+        cabecalhos["Content-Encoding"] = codificacao
+        
+    return web.Response(
+        body=corpo,
+        content_type="application/json",
+        charset="utf-8",
+        headers=cabecalhos
+    )
+
+
+@web.middleware
+async def _middleware_erros(request: web.Request, handler) -> web.StreamResponse:
+    """Converte falhas inesperadas em 500 (erros HTTP, como 400, seguem adiante)"""
+    try:
+        return await handler(request)
+    except web.HTTPException:
+        raise
+    except Exception:
+        logger.exception(f"Erro em {request.method} {request.path_qs}")
+        return _json({'erro': "Erro interno"}, status=500)
+
+
+def _aplicar_cors(request: web.Request, resposta: web.StreamResponse):
+    """Adiciona os cabeçalhos CORS (antes de a resposta ser enviada)"""
+    origem = request.app[CHAVE_CORS]
+    if origem and not resposta.prepared:
+        resposta.headers["Access-Control-Allow-Origin"] = origem
+        resposta.headers["Access-Control-Expose-Headers"] = "ETag"
+
+
+@web.middleware
+async def _middleware_cors(request: web.Request, handler) -> web.StreamResponse:
+    """Permite que o dashboard (outra origem) consulte a API"""
+    if request.method == "OPTIONS":
+        resposta = web.Response(status=204)
+        resposta.headers["Access-Control-Allow-Methods"] = "GET, OPTIONS"
+        resposta.headers["Access-Control-Allow-Headers"] = "If-None-Match, Last-Event-ID"
+        resposta.headers["Access-Control-Max-Age"] = "86400"
+    else:
+        try:
+            resposta = await handler(request)
+        except web.HTTPException as e:
+            # O dashboard também precisa ler as respostas de erro
+            _aplicar_cors(request, e)
+            raise
+            
+    _aplicar_cors(request, resposta)
+    return resposta
+
+
+async def listar_contratacoes(request: web.Request) -> web.Response:
+    """GET /api/contratacoes?limite=&cursor=&modalidade=&data_inicio=&data_fim="""
+    db = request.app[CHAVE_DB]
+    parametros = dict(
+        limite=_inteiro(request, "limite", LIMITE_PADRAO, 1, LIMITE_MAXIMO),
+        cursor_pagina=_cursor(request),
+        modalidade=_inteiro(request, "modalidade"),
+        data_inicio=_data(request, "data_inicio"),
+        data_fim=_data(request, "data_fim")
+    )
+    return await _responder(
+        request, functools.partial(db.buscar_contratacoes_cursor, **parametros)
+    )
+
+
+async def detalhar_contratacao(request: web.Request) -> web.Response:
+    """GET /api/contratacoes/{id}: resumo, JSON original e versões"""
+    db = request.app[CHAVE_DB]
+    contratacao_id = int(request.match_info["id"])
+    
+    def consulta():
+        contratacao = db.obter_contratacao(contratacao_id)
+        if contratacao is None:
+            return None
+        return {
+            'contratacao': contratacao,
+            'dados_completos': db.obter_dados_completos([contratacao_id]).get(contratacao_id),
+            'versoes': db.obter_versoes(contratacao_id)
+        }
+        
+    return await _responder(request, consulta)
+
+
+async def pesquisar(request: web.Request) -> web.Response:
+    """GET /api/busca?q=&limite=&offset=&modalidade="""
+    db = request.app[CHAVE_DB]
+    if not db.busca_disponivel:
+        return _json({'erro': "Busca textual indisponível"}, status=503)
+        
+    termo = request.query.get("q", "").strip()
+    if not termo:
+        raise _parametro_invalido("Parâmetro 'q' é obrigatório")
+        
+    parametros = dict(
+        limite=_inteiro(request, "limite", 20, 1, LIMITE_MAXIMO),
+        offset=_inteiro(request, "offset", 0, 0),
+        modalidade=_inteiro(request, "modalidade")
+    )
+    return await _responder(
+        request, functools.partial(db.pesquisar, termo, **parametros)
+    )
+
+
+async def estatisticas(request: web.Request) -> web.Response:
+    """GET /api/estatisticas"""
+    return await _responder(request, request.app[CHAVE_DB].obter_estatisticas)
+
+
+async def serie_temporal(request: web.Request) -> web.Response:
+    """GET /api/estatisticas/serie?granularidade=&agrupar_por=&...filtros"""
+    db = request.app[CHAVE_DB]
+    parametros = dict(
+        granularidade=_opcao(request, "granularidade", db.SERIES, "mes"),
+        data_inicio=_data(request, "data_inicio"),
+        data_fim=_data(request, "data_fim"),
+        modalidade=_inteiro(request, "modalidade"),
+        cnpj_orgao=request.query.get("cnpj_orgao") or None,
+        codigo_ibge=request.query.get("codigo_ibge") or None,
+        agrupar_por=_opcao(request, "agrupar_por", db.DIMENSOES_SERIE)
+    )
+    return await _responder(
+        request, functools.partial(db.obter_serie_temporal, **parametros)
+    )
+
+
+async def totais_por_orgao(request: web.Request) -> web.Response:
+    """GET /api/estatisticas/orgaos?limite=&...filtros"""
+    db = request.app[CHAVE_DB]
+    parametros = dict(
+        data_inicio=_data(request, "data_inicio"),
+        data_fim=_data(request, "data_fim"),
+        modalidade=_inteiro(request, "modalidade"),
+        codigo_ibge=request.query.get("codigo_ibge") or None,
+        limite=_inteiro(request, "limite", 20, 1, LIMITE_MAXIMO)
+    )
+    return await _responder(
+        request, functools.partial(db.obter_totais_por_orgao, **parametros)
+    )
+
+
+def _desde(request: web.Request) -> Optional[int]:
+    """Última geração recebida pelo cliente (Last-Event-ID ou ?desde=)"""
+    valor = request.headers.get("Last-Event-ID") or request.query.get("desde")
+    if not valor:
+        return None
+    try:
+        return int(valor)
+    except ValueError:
+        raise _parametro_invalido(f"Geração inválida: {valor}") from None
+
+
+async def _fluxo_eventos(request: web.Request, desde: Optional[int]):
+    """
+    Gera os eventos de um assinante como tuplas (tipo, geração, contratações)
+    
+    Tipos: "contratacoes" (uma geração), "recarregar" (eventos perdidos; o
+    cliente deve recarregar a listagem) e "keepalive" (fila ociosa). Com
+    `desde`, as gerações perdidas são reenviadas do banco antes das novas.
+    """
+    db = request.app[CHAVE_DB]
+    canal = request.app[CHAVE_CANAL]
+    loop = asyncio.get_running_loop()
+    
+    fila, geracao = canal.assinar()
+    try:
+        if desde is not None and desde < geracao:
+            eventos = await loop.run_in_executor(None, carregar_eventos, db, desde, geracao)
+            if eventos is None:
+                yield "recarregar", geracao, None
+                return
+            for evento_geracao, contratacoes in eventos:
+                yield "contratacoes", evento_geracao, contratacoes
+                
+        while True:
+            try:
+                evento = await asyncio.wait_for(fila.get(), INTERVALO_KEEPALIVE)
+            except asyncio.TimeoutError:
+                yield "keepalive", None, None
+                continue
+                
+            if evento is RECARREGAR:
+                yield "recarregar", canal.geracao, None
+                return
+                
+            # Gerações até a da assinatura já foram enviadas
+            if evento[0] <= geracao:
+                continue
+            geracao = evento[0]
+            yield "contratacoes", geracao, evento[1]
+    finally:
+        canal.cancelar(fila)
+
+
+async def eventos_sse(request: web.Request) -> web.StreamResponse:
+    """
+    GET /api/eventos: Server-Sent Events das contratações gravadas
+    
+    Cada contratação é um evento "contratacao" com as colunas de resumo; o
+    último evento de cada geração leva `id: <geração>`, então o navegador
+    retoma (Last-Event-ID) sem perder nem repetir gerações.
+    """
+    desde = _desde(request)
+    resposta = web.StreamResponse(headers={
+        "Content-Type": "text/event-stream; charset=utf-8",
+        "Cache-Control": "no-cache",
+        "X-Accel-Buffering": "no"
+    })
+    _aplicar_cors(request, resposta)
+    await resposta.prepare(request)
+    
+    try:
+        await resposta.write(b"retry: 3000\n\n")
+        async with contextlib.aclosing(_fluxo_eventos(request, desde)) as fluxo:
+            async for tipo, geracao, contratacoes in fluxo:
+                if tipo == "keepalive":
+                    texto = ": keepalive\n\n"
+                elif tipo == "recarregar":
+                    texto = (
+                        f"event: recarregar\nid: {geracao}\n"
+                        f"data: {json.dumps({'geracao': geracao})}\n\n"
+                    )
+                else:
+                    partes = []
+                    for contratacao in contratacoes:
+                        dados = json.dumps(contratacao, ensure_ascii=False, default=str)
+                        partes.append(f"event: contratacao\ndata: {dados}\n\n")
+                    partes[-1] = partes[-1][:-1] + f"id: {geracao}\n\n"
+                    texto = "".join(partes)
+                await resposta.write(texto.encode("utf-8"))
+    except ConnectionResetError:
+        pass
+    except Exception:
+        # A resposta já começou: não há como devolver um erro HTTP
+        logger.exception("Erro no fluxo de eventos")
+        
+    return resposta
+
+
+async def eventos_ws(request: web.Request) -> web.WebSocketResponse:
+    """
+    GET /api/eventos/ws: os mesmos eventos em WebSocket (retoma com ?desde=)
+    
+    Mensagens JSON {"evento": "contratacao", "geracao", "contratacao"} ou
+    {"evento": "recarregar", "geracao"}; mensagens do cliente são ignoradas.
+    """
+    desde = _desde(request)
+    ws = web.WebSocketResponse(heartbeat=30)
+    await ws.prepare(request)
+    dumps = functools.partial(json.dumps, ensure_ascii=False, default=str)
+    
+    async def enviar():
+        try:
+            async with contextlib.aclosing(_fluxo_eventos(request, desde)) as fluxo:
+                async for tipo, geracao, contratacoes in fluxo:
+                    if tipo == "recarregar":
+                        await ws.send_json({'evento': tipo, 'geracao': geracao}, dumps=dumps)
+                    elif tipo == "contratacoes":
+                        for contratacao in contratacoes:
+                            await ws.send_json({
+                                'evento': "contratacao",
+                                'geracao': geracao,
+                                'contratacao': contratacao
+                            }, dumps=dumps)
+        except ConnectionResetError:
+            pass
+        except Exception:
+            logger.exception("Erro no fluxo de eventos (WebSocket)")
+        finally:
+            await ws.close()
+            
+    tarefa = asyncio.create_task(enviar())
+    try:
+        # A leitura mantém o ping/pong e detecta o fechamento pelo cliente
+        async for _ in ws:
+            pass
+    finally:
+        tarefa.cancel()
+        with contextlib.suppress(asyncio.CancelledError):
+            await tarefa
+            
+    return ws
+
+
+async def _vigiar_banco(app: web.Application):
+    """Publica no canal, periodicamente, o que o monitor (outro processo) gravou"""
+    canal = app[CHAVE_CANAL]
+    db = app[CHAVE_DB]
+    intervalo = app[CHAVE_INTERVALO]
+    
+    async def vigiar():
+        loop = asyncio.get_running_loop()
+        while True:
+            await asyncio.sleep(intervalo)
+            try:
+                await loop.run_in_executor(None, canal.verificar, db)
+            except Exception as e:
+                logger.warning(f"Falha ao verificar novas contratações: {e}")
+                
+    tarefa = asyncio.create_task(vigiar()) if intervalo > 0 else None
+    yield
+    if tarefa is not None:
+        tarefa.cancel()
+        with contextlib.suppress(asyncio.CancelledError):
+            await tarefa
+
+
+def criar_aplicacao(
+    db: Armazenamento,
+    origem_cors: str = "*",
+    canal_eventos: Optional[CanalEventos] = None,
+    intervalo_eventos: float = 2.0
+) -> web.Application:
+    """
+    Cria a aplicação aiohttp da API
+    
+    As consultas rodam em threads (executor padrão); abra o banco em modo
+    WAL para que várias requisições leiam ao mesmo tempo.
+    
+    O fluxo de eventos vigia a geração do banco a cada `intervalo_eventos`
+    segundos: uma única consulta leve atende todos os clientes conectados.
+    Um monitor no mesmo processo pode publicar direto no canal
+    (PNCPMonitor(canal_eventos=...)), sem esperar a vigilância.
+    
+    Args:
+        db: Banco de dados consultado
+        origem_cors: Valor de Access-Control-Allow-Origin ("" = sem CORS)
+        canal_eventos: Canal compartilhado com um monitor (None = cria um)
+        intervalo_eventos: Segundos entre verificações do banco (0 = não vigiar)
+        
+    Returns:
+        Aplicação pronta para web.run_app
+    """
+    app = web.Application(middlewares=[_middleware_cors, _middleware_erros])
+    app[CHAVE_DB] = db
+    app[CHAVE_CORS] = origem_cors
+    app[CHAVE_CANAL] = canal_eventos or CanalEventos(db.obter_geracao())
+    app[CHAVE_INTERVALO] = intervalo_eventos
+    app.cleanup_ctx.append(_vigiar_banco)
+    
+    app.router.add_get("/api/contratacoes", listar_contratacoes)
+    app.router.add_get(r"/api/contratacoes/{id:\d+}", detalhar_contratacao)
+    app.router.add_get("/api/busca", pesquisar)
+    app.router.add_get("/api/estatisticas", estatisticas)
+    app.router.add_get("/api/estatisticas/serie", serie_temporal)
+    app.router.add_get("/api/estatisticas/orgaos", totais_por_orgao)
+    app.router.add_get("/api/eventos", eventos_sse)
+    app.router.add_get("/api/eventos/ws", eventos_ws)
+    return app
+
+
+def main():
+    """Função principal para execução via linha de comando"""
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s'
+    )
+    
+    parser = argparse.ArgumentParser(description="API HTTP do monitor PNCP")
+    parser.add_argument(
+        "--db", default="pncp_monitor.db",
+        help="Banco de dados (arquivo SQLite ou URL postgresql://)"
+    )
+    parser.add_argument("--host", default="127.0.0.1", help="Endereço de escuta")
+    parser.add_argument("--porta", type=int, default=8080, help="Porta de escuta")
+    parser.add_argument("--leitores", type=int, default=8, help="Conexões de leitura")
+    parser.add_argument(
+        "--cors", default="*",
+        help="Origem permitida para o dashboard (vazio = sem CORS)"
+    )
+    parser.add_argument(
+        "--intervalo-eventos", type=float, default=2.0,
+        help="Segundos entre verificações de novas contratações (eventos)"
+    )
+    args = parser.parse_args()
+    
+    db = abrir_armazenamento(args.db, modo_wal=True, max_leitores=args.leitores)
+    try:
+        web.run_app(
+            criar_aplicacao(
+                db,
+                origem_cors=args.cors,
+                intervalo_eventos=args.intervalo_eventos
+            ),
+            host=args.host,
+            port=args.porta
+        )
+    finally:
+        db.fechar()
+
+
+if __name__ == "__main__":
+    main()
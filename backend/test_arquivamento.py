@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""
+Testes do arquivamento anual de contratações
+Consultas por período e regravação de contratações já arquivadas
+"""
+
+import shutil
+import sqlite3
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+# Adicionar diretório atual ao path
+sys.path.insert(0, str(Path(__file__).parent))
+
+from database import Database
+
+
+def contratacao(sequencial: int, data: str, objeto: str = "Aquisição de material") -> dict:
+    """Contratação mínima no formato da API"""
+    return {
+        'orgaoEntidade': {'cnpj': '12345678000199', 'razaoSocial': 'Prefeitura'},
+        'anoCompra': int(data[:4]),
+        'sequencialCompra': sequencial,
+        'numeroCompra': str(sequencial),
+        'objetoCompra': objeto,
+        'valorTotalEstimado': 100.0,
+        'situacaoCompra': 1,
+        'dataPublicacaoPncp': f"{data}T10:00:00",
+        '_modalidade_codigo': 6,
+        '_modalidade_nome': 'Pregão - Eletrônico'
+    }
+
+
+class TestArquivamento(unittest.TestCase):
+    """Banco com 3 contratações de 2019 arquivadas e 2 recentes"""
+    
+    def setUp(self):
+        self.diretorio = tempfile.mkdtemp()
+        self.db = Database(str(Path(self.diretorio) / "pncp_monitor.db"))
+        
+        self.antigas = [contratacao(i, f"2019-05-0{i}") for i in (1, 2, 3)]
+        self.recentes = [contratacao(i, "2099-01-01") for i in (4, 5)]
+        self.db.salvar_contratacoes(self.antigas + self.recentes)
+        self.assertEqual(self.db.arquivar(idade_dias=365), {2019: 3})
+        
+    def tearDown(self):
+        self.db.fechar()
+        shutil.rmtree(self.diretorio)
+        
+    def test_periodo_so_com_data_final_le_arquivos(self):
+        self.assertEqual(self.db.contar_contratacoes(data_fim="2020-01-01"), 3)
+        self.assertEqual(self.db.contar_contratacoes(data_fim="2099-12-31"), 5)
+        self.assertEqual(self.db.contar_contratacoes(data_inicio="2018-01-01"), 5)
+        
+    def test_arquivada_inalterada_nao_e_inserida_de_novo(self):
+        self.assertEqual(self.db.salvar_contratacoes([self.antigas[0]]), 0)
+        
+        self.assertEqual(self.db.contar_contratacoes(data_inicio="2018-01-01"), 5)
+        self.assertEqual(self.db.obter_estatisticas()['total_contratacoes'], 5)
+        
+    def test_arquivada_alterada_volta_ao_principal(self):
+        geracao = self.db.obter_geracao()
+        alterada = contratacao(1, "2019-05-01", objeto="Aquisição de material escolar")
+        
+        self.assertEqual(self.db.salvar_contratacoes([alterada]), 0)
+        
+        self.assertEqual(self.db.contar_contratacoes(data_inicio="2018-01-01"), 5)
+        self.assertEqual(self.db.contar_contratacoes(data_fim="2020-01-01"), 3)
+        self.assertEqual(self.db.obter_estatisticas()['total_contratacoes'], 5)
+        self.assertGreater(self.db.obter_geracao(), geracao)
+        
+        serie = self.db.obter_serie_temporal("mes", data_fim="2019-12-31")
+        self.assertEqual([item['quantidade'] for item in serie], [3])
+        
+        contratacoes = self.db.buscar_contratacoes(data_fim="2019-05-01")
+        self.assertEqual([c['objeto'] for c in contratacoes], [alterada['objetoCompra']])
+        
+        versoes = self.db.obter_versoes(contratacoes[0]['id'])
+        self.assertEqual(list(versoes[-1]['alteracoes']), ['objeto'])
+        
+        # Os totais mantidos pelos gatilhos conferem com uma reconstrução
+        estatisticas = self.db.obter_estatisticas()
+        self.db.reconstruir_estatisticas()
+        self.assertEqual(self.db.obter_estatisticas(), estatisticas)
+
+        
+    def test_falha_na_gravacao_desfaz_restauracao(self):
+        alterada = contratacao(1, "2019-05-01", objeto="Aquisição de material escolar")
+        estatisticas = self.db.obter_estatisticas()
+        
+        with mock.patch.object(
+            self.db, '_avancar_geracao', side_effect=sqlite3.OperationalError("falha")
+        ):
+            with self.assertRaises(sqlite3.OperationalError):
+                self.db.salvar_contratacoes([alterada])
+                
+        # Nada mudou: a contratação continua só no arquivo, com o conteúdo antigo
+        self.assertEqual(self.db.contar_contratacoes(), 2)
+        self.assertEqual(self.db.contar_contratacoes(data_fim="2020-01-01"), 3)
+        self.assertEqual(self.db.obter_estatisticas(), estatisticas)
+        objetos = [c['objeto'] for c in self.db.buscar_contratacoes(data_fim="2019-05-01")]
+        self.assertEqual(objetos, [self.antigas[0]['objetoCompra']])
+        
+    def test_rearquivar_substitui_copia_antiga(self):
+        # Sem o limite, a gravação não confere os arquivos (como em versões
+        # anteriores) e a contratação volta duplicada ao principal
+        self.db.conn.execute("DELETE FROM configuracoes WHERE chave = 'arquivo_limite_ts'")
+        self.db.conn.commit()
+        alterada = contratacao(1, "2019-05-01", objeto="Aquisição de material escolar")
+        self.assertEqual(self.db.salvar_contratacoes([alterada]), 1)
+        
+        self.assertEqual(self.db.arquivar(idade_dias=365), {2019: 1})
+        
+        self.assertEqual(self.db.contar_contratacoes(), 2)
+        self.assertEqual(self.db.contar_contratacoes(data_fim="2020-01-01"), 3)
+        self.assertEqual(self.db.obter_estatisticas()['total_contratacoes'], 5)
+        objetos = [c['objeto'] for c in self.db.buscar_contratacoes(data_fim="2019-05-01")]
+        self.assertEqual(objetos, [alterada['objetoCompra']])
+        
+        estatisticas = self.db.obter_estatisticas()
+        self.db.reconstruir_estatisticas()
+        self.assertEqual(self.db.obter_estatisticas(), estatisticas)
+
+
+if __name__ == "__main__":
+    unittest.main()
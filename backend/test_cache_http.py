@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""
+Testes do cache HTTP
+TTL conforme o período consultado e ordem LRU gravada em lotes
+"""
+
+import os
+import shutil
+import sqlite3
+import sys
+import tempfile
+import unittest
+from datetime import date, timedelta
+from pathlib import Path
+
+# Adicionar diretório atual ao path
+sys.path.insert(0, str(Path(__file__).parent))
+
+from cache_http import CacheHTTP
+
+
+def periodo(dias_atras: int) -> dict:
+    """Parâmetros de consulta cujo período termina há dias_atras dias"""
+    fim = date.today() - timedelta(days=dias_atras)
+    return {
+        'dataInicial': (fim - timedelta(days=30)).strftime("%Y%m%d"),
+        'dataFinal': fim.strftime("%Y%m%d")
+    }
+
+
+class TestCacheHTTP(unittest.TestCase):
+    """Cache em arquivo temporário"""
+    
+    def setUp(self):
+        self.dir = tempfile.mkdtemp()
+        self.caminho = str(Path(self.dir) / "cache.db")
+        self.cache = CacheHTTP(self.caminho)
+        
+    def tearDown(self):
+        self.cache.fechar()
+        shutil.rmtree(self.dir, ignore_errors=True)
+        
+    def ultimo_acesso(self, chave: str) -> float:
+        """Lê o último acesso gravado no disco, por outra conexão"""
+        with sqlite3.connect(self.caminho) as conn:
+            return conn.execute(
+                "SELECT ultimo_acesso FROM respostas WHERE chave = ?", (chave,)
+            ).fetchone()[0]
+            
+    def test_ttl_por_periodo(self):
+        self.assertEqual(self.cache.calcular_ttl(periodo(0)), self.cache.ttl_janela_aberta)
+        self.assertEqual(self.cache.calcular_ttl(periodo(-3)), self.cache.ttl_janela_aberta)
+        self.assertEqual(self.cache.calcular_ttl(periodo(1)), self.cache.ttl_janela_recente)
+        self.assertEqual(self.cache.calcular_ttl(periodo(90)), self.cache.ttl_janela_recente)
+        self.assertEqual(self.cache.calcular_ttl(periodo(91)), self.cache.ttl_janela_fechada)
+        self.assertEqual(self.cache.calcular_ttl({}), self.cache.ttl_padrao)
+        
+        # Encerrados há pouco ainda mudam: expiram bem antes dos antigos
+        self.assertLessEqual(self.cache.ttl_janela_recente * 24, self.cache.ttl_janela_fechada)
+        
+    def test_expiracao_e_renovacao(self):
+        self.cache.salvar("a", "/x", 200, b"corpo", ttl=-1, etag='"1"')
+        entrada = self.cache.obter("a")
+        self.assertTrue(entrada['expirada'])
+        self.assertEqual(entrada['corpo'], b"corpo")
+        
+        self.cache.renovar("a", ttl=60)
+        self.assertFalse(self.cache.obter("a")['expirada'])
+        
+    def test_acerto_nao_grava_no_disco(self):
+        self.cache.salvar("a", "/x", 200, b"corpo", ttl=60)
+        gravado = self.ultimo_acesso("a")
+        
+        for _ in range(10):
+            self.assertIsNotNone(self.cache.obter("a"))
+        self.assertEqual(self.ultimo_acesso("a"), gravado)
+        
+        # Fechar grava os acessos pendentes
+        self.cache.fechar()
+        self.assertGreater(self.ultimo_acesso("a"), gravado)
+        self.cache = CacheHTTP(self.caminho)
+        
+    def test_remocao_respeita_acessos_pendentes(self):
+        self.cache.fechar()
+        self.cache = CacheHTTP(self.caminho, tamanho_maximo_mb=2500 / (1024 * 1024))
+        corpo = os.urandom(1000)
+        
+        self.cache.salvar("antiga", "/x", 200, corpo, ttl=60)
+        self.cache.salvar("nova", "/x", 200, corpo, ttl=60)
+        
+        # O acesso ainda em memória torna "antiga" a mais recente
+        self.assertIsNotNone(self.cache.obter("antiga"))
+        self.cache.salvar("terceira", "/x", 200, corpo, ttl=60)
+        
+        self.assertIsNotNone(self.cache.obter("antiga"))
+        self.assertIsNone(self.cache.obter("nova"))
+        self.assertIsNotNone(self.cache.obter("terceira"))
+
+
+if __name__ == "__main__":
+    unittest.main()
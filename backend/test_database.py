@@ -0,0 +1,289 @@
+#!/usr/bin/env python3
+"""
+Testes do banco SQLite
+Paginação por cursor, busca textual, notificações em lote e versões
+"""
+
+import shutil
+import sys
+import tempfile
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+# Adicionar diretório atual ao path
+sys.path.insert(0, str(Path(__file__).parent))
+
+from database import Database
+from test_arquivamento import contratacao
+
+
+def sem_data(sequencial: int) -> dict:
+    """Contratação sem data de publicação"""
+    registro = contratacao(sequencial, "2024-01-01")
+    registro['dataPublicacaoPncp'] = None
+    return registro
+
+
+class BancoTemporario(unittest.TestCase):
+    """Banco SQLite em diretório temporário"""
+    
+    def setUp(self):
+        self.diretorio = tempfile.mkdtemp()
+        self.db = Database(str(Path(self.diretorio) / "pncp_monitor.db"))
+        
+    def tearDown(self):
+        self.db.fechar()
+        shutil.rmtree(self.diretorio)
+
+
+class TestPaginacaoCursor(BancoTemporario):
+    """buscar_contratacoes_cursor com datas nulas e gravações entre páginas"""
+    
+    def setUp(self):
+        super().setUp()
+        self.db.salvar_contratacoes(
+            [contratacao(i, f"2024-01-0{i}") for i in (1, 2, 3)] + [sem_data(8), sem_data(9)]
+        )
+        
+    def paginar(self, limite: int, **filtros) -> list:
+        """Percorre todas as páginas e devolve os sequenciais na ordem recebida"""
+        sequenciais, cursor_pagina = [], None
+        while True:
+            pagina = self.db.buscar_contratacoes_cursor(
+                limite=limite, cursor_pagina=cursor_pagina, **filtros
+            )
+            sequenciais.extend(c['sequencial_compra'] for c in pagina['contratacoes'])
+            cursor_pagina = pagina['proximo_cursor']
+            if cursor_pagina is None:
+                return sequenciais
+                
+    def test_datas_nulas_por_ultimo(self):
+        # Mais recentes primeiro; as sem data depois, por id decrescente
+        for limite in (1, 2, 3, 5, 10):
+            with self.subTest(limite=limite):
+                self.assertEqual(self.paginar(limite), [3, 2, 1, 9, 8])
+                
+    def test_ultima_pagina_cheia_sem_proximo_cursor(self):
+        pagina = self.db.buscar_contratacoes_cursor(limite=5)
+        self.assertEqual(len(pagina['contratacoes']), 5)
+        self.assertIsNone(pagina['proximo_cursor'])
+        
+    def test_gravacao_entre_paginas_nao_desloca(self):
+        pagina = self.db.buscar_contratacoes_cursor(limite=2)
+        self.db.salvar_contratacoes([contratacao(4, "2024-01-04"), sem_data(10)])
+        
+        restantes = []
+        cursor_pagina = pagina['proximo_cursor']
+        while cursor_pagina is not None:
+            pagina = self.db.buscar_contratacoes_cursor(limite=2, cursor_pagina=cursor_pagina)
+            restantes.extend(c['sequencial_compra'] for c in pagina['contratacoes'])
+            cursor_pagina = pagina['proximo_cursor']
+            
+        # A nova com data fica antes do cursor; a nova sem data tem id maior
+        self.assertEqual(restantes, [1, 10, 9, 8])
+        
+    def test_filtro_de_data_exclui_nulas(self):
+        self.assertEqual(self.paginar(2, data_inicio="2024-01-02"), [3, 2])
+        self.assertEqual(self.paginar(2, modalidade=6), [3, 2, 1, 9, 8])
+        self.assertEqual(self.paginar(2, modalidade=7), [])
+        
+    def test_cursor_invalido(self):
+        with self.assertRaises(ValueError):
+            self.db.buscar_contratacoes_cursor(cursor_pagina="xyz")
+
+
+
+class TestBuscaTextual(BancoTemporario):
+    """Índice FTS5 mantido pelos gatilhos de contratacoes"""
+    
+    def setUp(self):
+        super().setUp()
+        if not self.db.busca_disponivel:
+            self.skipTest("SQLite sem FTS5")
+            
+        self.db.salvar_contratacoes([
+            contratacao(1, "2024-01-01", objeto="Manutenção de veículos da frota"),
+            contratacao(2, "2024-01-02", objeto="Aquisição de material de limpeza"),
+            contratacao(3, "2019-01-03", objeto="Manutenção predial")
+        ])
+        
+    def pesquisar(self, termo: str, **filtros) -> list:
+        """Sequenciais encontrados, em ordem crescente"""
+        return sorted(c['sequencial_compra'] for c in self.db.pesquisar(termo, **filtros))
+        
+    def conferir_indice(self):
+        """O índice externo deve corresponder exatamente à tabela"""
+        self.db.conn.execute(
+            "INSERT INTO contratacoes_fts (contratacoes_fts) VALUES ('integrity-check')"
+        )
+        
+    def test_insercao_indexada_sem_acentos(self):
+        self.assertEqual(self.pesquisar("manutencao"), [1, 3])
+        self.assertEqual(self.pesquisar("VEICULOS manutenção"), [1])
+        self.assertEqual(self.pesquisar("prefeitura"), [1, 2, 3])
+        self.assertEqual(self.pesquisar("limp"), [2])
+        self.assertEqual(self.pesquisar("manutencao", modalidade=7), [])
+        self.conferir_indice()
+        
+    def test_sintaxe_fts_no_termo_e_literal(self):
+        self.assertEqual(self.pesquisar('"material" OR NEAR(frota)'), [])
+        self.assertEqual(self.pesquisar("material-limpeza"), [2])
+        self.assertEqual(self.pesquisar("!!"), [])
+        
+    def test_alteracao_reindexada(self):
+        self.db.salvar_contratacoes([
+            contratacao(2, "2024-01-02", objeto="Aquisição de combustível")
+        ])
+        self.assertEqual(self.pesquisar("limpeza"), [])
+        self.assertEqual(self.pesquisar("combustivel"), [2])
+        self.conferir_indice()
+        
+    def test_remocao_sai_do_indice(self):
+        self.assertEqual(self.db.arquivar(idade_dias=1500), {2019: 1})
+        self.assertEqual(self.pesquisar("manutencao"), [1])
+        self.conferir_indice()
+        
+        self.db.reconstruir_busca()
+        self.assertEqual(self.pesquisar("manutencao"), [1])
+
+
+
+class TestNotificacoesEmLote(BancoTemporario):
+    """reservar_notificacoes, marcar_lote_notificado e liberar_reserva_notificacoes"""
+    
+    def setUp(self):
+        super().setUp()
+        self.db.salvar_contratacoes([contratacao(i, "2024-01-01") for i in range(1, 11)])
+        
+    def test_reservas_nao_se_sobrepoem(self):
+        token_1, lote_1 = self.db.reservar_notificacoes(limite=4)
+        token_2, lote_2 = self.db.reservar_notificacoes(limite=4)
+        token_3, lote_3 = self.db.reservar_notificacoes(limite=4)
+        
+        self.assertEqual([len(lote_1), len(lote_2), len(lote_3)], [4, 4, 2])
+        ids = [c['id'] for lote in (lote_1, lote_2, lote_3) for c in lote]
+        self.assertEqual(len(set(ids)), 10)
+        self.assertEqual(self.db.reservar_notificacoes(limite=4)[1], [])
+        
+    def test_reservas_em_outra_conexao(self):
+        # Outra instância no mesmo arquivo (como outro processo do monitor)
+        outro = Database(self.db.db_path)
+        self.addCleanup(outro.fechar)
+        
+        ids = []
+        with ThreadPoolExecutor(max_workers=4) as executor:
+            for _, lote in executor.map(
+                lambda db: db.reservar_notificacoes(limite=2), [self.db, outro] * 5
+            ):
+                ids.extend(c['id'] for c in lote)
+                
+        self.assertEqual(sorted(ids), sorted(set(ids)))
+        self.assertEqual(len(ids), 10)
+        
+    def test_marcar_lote_avanca_geracao_uma_vez(self):
+        token, lote = self.db.reservar_notificacoes(limite=3)
+        geracao = self.db.obter_geracao()
+        
+        self.assertEqual(self.db.marcar_lote_notificado(token), 3)
+        self.assertEqual(self.db.obter_geracao(), geracao + 1)
+        self.assertEqual(len(self.db.buscar_contratacoes_nao_notificadas()), 7)
+        
+        # Repetir a marcação não altera nada
+        self.assertEqual(self.db.marcar_lote_notificado(token), 0)
+        self.assertEqual(self.db.obter_geracao(), geracao + 1)
+        
+    def test_liberar_devolve_a_fila(self):
+        token, lote = self.db.reservar_notificacoes(limite=10)
+        self.assertEqual(self.db.liberar_reserva_notificacoes(token), 10)
+        self.assertEqual(self.db.marcar_lote_notificado(token), 0)
+        
+        _, novo_lote = self.db.reservar_notificacoes(limite=10)
+        self.assertEqual({c['id'] for c in novo_lote}, {c['id'] for c in lote})
+        
+    def test_reserva_expirada_pode_ser_retomada(self):
+        token_antigo, lote = self.db.reservar_notificacoes(limite=10)
+        self.assertEqual(self.db.reservar_notificacoes(limite=10)[1], [])
+        
+        # Reserva abandonada: outra execução a retoma e o token antigo perde efeito
+        token_novo, retomado = self.db.reservar_notificacoes(limite=10, validade_reserva=-1)
+        self.assertEqual(len(retomado), 10)
+        self.assertEqual(self.db.marcar_lote_notificado(token_antigo), 0)
+        self.assertEqual(self.db.marcar_lote_notificado(token_novo), 10)
+
+
+
+class TestVersoes(BancoTemporario):
+    """Detecção de alterações pelo hash do conteúdo em salvar_contratacoes"""
+    
+    def setUp(self):
+        super().setUp()
+        self.db.salvar_contratacoes([contratacao(1, "2024-01-01"), contratacao(2, "2024-01-02")])
+        self.geracao = self.db.obter_geracao()
+        self.id_1 = self.db.buscar_contratacoes(data_fim="2024-01-01")[0]['id']
+        
+    def test_inalterada_nao_grava(self):
+        reordenada = dict(reversed(list(contratacao(1, "2024-01-01").items())))
+        
+        self.assertEqual(
+            self.db.salvar_contratacoes([reordenada, contratacao(2, "2024-01-02")]), 0
+        )
+        self.assertEqual(self.db.obter_geracao(), self.geracao)
+        self.assertEqual(self.db.obter_versoes(self.id_1), [])
+        self.assertEqual(list(self.db.iter_contratacoes_alteradas(self.geracao)), [])
+        
+    def test_alterada_registra_versao(self):
+        alterada = contratacao(1, "2024-01-01", objeto="Aquisição de material escolar")
+        alterada['valorTotalEstimado'] = 250.0
+        
+        self.assertEqual(self.db.salvar_contratacoes([alterada]), 0)
+        self.assertEqual(self.db.obter_geracao(), self.geracao + 1)
+        self.assertEqual(self.db.contar_contratacoes(), 2)
+        
+        versoes = self.db.obter_versoes(self.id_1)
+        self.assertEqual(len(versoes), 1)
+        self.assertEqual(versoes[0]['geracao'], self.geracao + 1)
+        self.assertNotEqual(versoes[0]['hash_anterior'], versoes[0]['hash_novo'])
+        self.assertEqual(versoes[0]['alteracoes'], {
+            'objeto': ["Aquisição de material", "Aquisição de material escolar"],
+            'valor_estimado': [100.0, 250.0]
+        })
+        
+        # Resumo, estatísticas e dados completos refletem a nova versão
+        self.assertEqual(self.db.obter_contratacao(self.id_1)['valor_estimado'], 250.0)
+        self.assertEqual(self.db.obter_estatisticas()['valor_total_estimado'], 350.0)
+        self.assertEqual(
+            self.db.obter_dados_completos([self.id_1])[self.id_1]['objetoCompra'],
+            "Aquisição de material escolar"
+        )
+        
+        alteradas = [
+            c['id'] for lote in self.db.iter_contratacoes_alteradas(self.geracao) for c in lote
+        ]
+        self.assertEqual(alteradas, [self.id_1])
+        
+    def test_alteracao_fora_das_colunas(self):
+        alterada = contratacao(1, "2024-01-01")
+        alterada['informacaoComplementar'] = "Edital retificado"
+        
+        self.db.salvar_contratacoes([alterada])
+        versoes = self.db.obter_versoes(self.id_1)
+        self.assertEqual([v['alteracoes'] for v in versoes], [{}])
+        self.assertEqual(
+            self.db.obter_dados_completos([self.id_1])[self.id_1]['informacaoComplementar'],
+            "Edital retificado"
+        )
+        
+    def test_repetida_no_lote_vale_a_ultima(self):
+        primeira = contratacao(3, "2024-01-03", objeto="Primeira versão")
+        ultima = contratacao(3, "2024-01-03", objeto="Última versão")
+        
+        self.assertEqual(self.db.salvar_contratacoes([primeira, ultima]), 1)
+        registro = self.db.buscar_contratacoes(data_inicio="2024-01-03")[0]
+        self.assertEqual(registro['objeto'], "Última versão")
+        self.assertEqual(self.db.obter_versoes(registro['id']), [])
+        self.assertEqual(self.db.obter_geracao(), self.geracao + 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
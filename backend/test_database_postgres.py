@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+"""
+Testes do banco PostgreSQL
+Executados apenas com PNCP_TEST_PG_DSN definido (ex.: postgresql://localhost/teste);
+cada teste usa um esquema próprio, removido ao final
+"""
+
+import os
+import sys
+import unittest
+import uuid
+from pathlib import Path
+
+# Adicionar diretório atual ao path
+sys.path.insert(0, str(Path(__file__).parent))
+
+from test_arquivamento import contratacao
+
+DSN = os.environ.get("PNCP_TEST_PG_DSN")
+
+if DSN:
+    import psycopg
+    from psycopg.conninfo import make_conninfo
+    from database_postgres import DatabasePostgres
+
+
+@unittest.skipUnless(DSN, "PNCP_TEST_PG_DSN não definido")
+class TestDatabasePostgres(unittest.TestCase):
+    """Gravação, versões, notificações e consultas do servidor"""
+    
+    def setUp(self):
+        self.esquema = f"teste_{uuid.uuid4().hex[:12]}"
+        self.admin = psycopg.connect(DSN, autocommit=True)
+        self.admin.execute(f"CREATE SCHEMA {self.esquema}")
+        self.dsn = make_conninfo(DSN, options=f"-c search_path={self.esquema}")
+        self.db = DatabasePostgres(self.dsn)
+        
+    def tearDown(self):
+        self.db.fechar()
+        self.admin.execute(f"DROP SCHEMA {self.esquema} CASCADE")
+        self.admin.close()
+        
+    def test_upsert_e_versoes(self):
+        self.assertEqual(self.db.salvar_contratacoes([
+            contratacao(1, "2024-01-01"), contratacao(2, "2024-01-02")
+        ]), 2)
+        geracao = self.db.obter_geracao()
+        
+        # Inalterada: nada gravado, geração mantida
+        self.assertEqual(self.db.salvar_contratacoes([contratacao(1, "2024-01-01")]), 0)
+        self.assertEqual(self.db.obter_geracao(), geracao)
+        
+        alterada = contratacao(1, "2024-01-01", objeto="Aquisição de material escolar")
+        self.assertEqual(self.db.salvar_contratacoes([alterada]), 0)
+        self.assertEqual(self.db.obter_geracao(), geracao + 1)
+        self.assertEqual(self.db.contar_contratacoes(), 2)
+        
+        registro = self.db.buscar_contratacoes(data_fim="2024-01-01")[0]
+        self.assertEqual(registro['objeto'], alterada['objetoCompra'])
+        self.assertEqual(registro['situacao'], '1')
+        
+        versoes = self.db.obter_versoes(registro['id'])
+        self.assertEqual(len(versoes), 1)
+        self.assertEqual(versoes[0]['geracao'], geracao + 1)
+        self.assertEqual(list(versoes[0]['alteracoes']), ['objeto'])
+        
+        alteradas = [
+            c['id'] for lote in self.db.iter_contratacoes_alteradas(geracao)
+            for c in lote
+        ]
+        self.assertEqual(alteradas, [registro['id']])
+        
+    def test_reserva_ignora_linhas_travadas(self):
+        self.db.salvar_contratacoes([contratacao(i, "2024-01-01") for i in range(1, 5)])
+        
+        # Outra transação trava as duas primeiras: a reserva não espera por elas
+        with psycopg.connect(self.dsn) as outra:
+            outra.execute("SELECT id FROM contratacoes ORDER BY id LIMIT 2 FOR UPDATE")
+            token, reservadas = self.db.reservar_notificacoes(limite=10)
+            outra.rollback()
+            
+        self.assertEqual(len(reservadas), 2)
+        token_2, restantes = self.db.reservar_notificacoes(limite=10)
+        self.assertEqual(len(restantes), 2)
+        self.assertFalse({c['id'] for c in reservadas} & {c['id'] for c in restantes})
+        
+        geracao = self.db.obter_geracao()
+        self.assertEqual(self.db.marcar_lote_notificado(token), 2)
+        self.assertEqual(self.db.obter_geracao(), geracao + 1)
+        self.assertEqual(self.db.liberar_reserva_notificacoes(token_2), 2)
+        self.assertEqual(len(self.db.buscar_contratacoes_nao_notificadas()), 2)
+        
+    def test_estatisticas_e_series(self):
+        self.db.salvar_contratacoes([
+            contratacao(1, "2024-01-01"), contratacao(2, "2024-01-31"),
+            contratacao(3, "2024-02-10")
+        ])
+        
+        estatisticas = self.db.obter_estatisticas()
+        self.assertEqual(estatisticas['total_contratacoes'], 3)
+        self.assertEqual(estatisticas['valor_total_estimado'], 300.0)
+        
+        serie = self.db.obter_serie_temporal("mes")
+        self.assertEqual(
+            [(item['periodo'], item['quantidade']) for item in serie],
+            [("2024-01", 2), ("2024-02", 1)]
+        )
+        serie = self.db.obter_serie_temporal(
+            "dia", data_inicio="2024-01-31", data_fim="2024-02-10", agrupar_por="modalidade"
+        )
+        self.assertEqual([item['periodo'] for item in serie], ["2024-01-31", "2024-02-10"])
+        self.assertEqual(serie[0]['modalidade_nome'], 'Pregão - Eletrônico')
+        
+        orgaos = self.db.obter_totais_por_orgao(data_inicio="2024-01-15")
+        self.assertEqual(
+            [(o['cnpj_orgao'], o['quantidade'], o['valor_estimado']) for o in orgaos],
+            [('12345678000199', 2, 200.0)]
+        )
+        
+    def test_cursor_com_datas_nulas(self):
+        sem_data = contratacao(9, "2024-01-01")
+        sem_data['dataPublicacaoPncp'] = None
+        self.db.salvar_contratacoes(
+            [contratacao(i, f"2024-01-0{i}") for i in (1, 2, 3)] + [sem_data]
+        )
+        
+        ids, cursor_pagina = [], None
+        while True:
+            pagina = self.db.buscar_contratacoes_cursor(limite=2, cursor_pagina=cursor_pagina)
+            ids.extend(c['sequencial_compra'] for c in pagina['contratacoes'])
+            cursor_pagina = pagina['proximo_cursor']
+            if cursor_pagina is None:
+                break
+                
+        self.assertEqual(ids, [3, 2, 1, 9])
+        
+    def test_pesquisa_sem_acentos(self):
+        self.db.salvar_contratacoes([
+            contratacao(1, "2024-01-01", objeto="Manutenção de veículos"),
+            contratacao(2, "2024-01-02", objeto="Aquisição de material")
+        ])
+        
+        resultados = self.db.pesquisar("manutencao veic")
+        self.assertEqual([c['sequencial_compra'] for c in resultados], [1])
+        self.assertEqual(self.db.pesquisar("!!"), [])
+        
+        contratacao_id = resultados[0]['id']
+        self.assertEqual(self.db.obter_contratacao(contratacao_id)['sequencial_compra'], 1)
+        self.assertIsNone(self.db.obter_contratacao(contratacao_id + 100))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""
+Testes da exportação colunar incremental
+Marca de geração, partições por ano/mês e falhas no meio da exportação
+"""
+
+import csv
+import shutil
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+# Adicionar diretório atual ao path
+sys.path.insert(0, str(Path(__file__).parent))
+
+from database import Database
+from exportacao import CHAVE_MARCA, ExportadorColunar
+from test_arquivamento import contratacao
+
+try:
+    import pyarrow.parquet
+except ImportError:
+    pyarrow = None
+
+
+class TestExportadorColunar(unittest.TestCase):
+    """Exportação em CSV de um banco temporário"""
+    
+    def setUp(self):
+        self.diretorio = Path(tempfile.mkdtemp())
+        self.db = Database(str(self.diretorio / "pncp_monitor.db"))
+        self.db.salvar_contratacoes([
+            contratacao(1, "2024-01-05"), contratacao(2, "2024-01-20"),
+            contratacao(3, "2024-02-01")
+        ])
+        self.exportador = ExportadorColunar(
+            self.db, str(self.diretorio / "exportacao"), formato="csv"
+        )
+        
+    def tearDown(self):
+        self.db.fechar()
+        shutil.rmtree(self.diretorio)
+        
+    def ler(self, arquivos: list) -> list:
+        """Linhas de todos os arquivos CSV, em ordem de sequencial"""
+        linhas = []
+        for arquivo in arquivos:
+            with open(arquivo, newline="", encoding="utf-8") as entrada:
+                linhas.extend(csv.DictReader(entrada))
+        return sorted(linhas, key=lambda linha: int(linha['sequencial_compra']))
+        
+    def marca(self) -> int:
+        """Geração até a qual a exportação já avançou"""
+        return int(self.db.obter_configuracao(CHAVE_MARCA, "0"))
+        
+    def test_primeira_exportacao_particionada(self):
+        resultado = self.exportador.exportar()
+        
+        self.assertEqual(resultado['registros'], 3)
+        self.assertEqual(resultado['geracao'], self.db.obter_geracao())
+        self.assertEqual(self.marca(), resultado['geracao'])
+        self.assertEqual(
+            sorted(Path(a).parent.relative_to(self.exportador.diretorio).as_posix()
+                   for a in resultado['arquivos']),
+            ["ano=2024/mes=01", "ano=2024/mes=02"]
+        )
+        
+        linhas = self.ler(resultado['arquivos'])
+        self.assertEqual([linha['sequencial_compra'] for linha in linhas], ["1", "2", "3"])
+        self.assertEqual(linhas[0]['orgao_razao_social'], "Prefeitura")
+        self.assertEqual(linhas[0]['situacao_codigo'], "1")
+        self.assertEqual(linhas[0]['processo'], "")
+        self.assertEqual(list(self.diretorio.rglob("*.tmp")), [])
+        
+    def test_apenas_alteracoes_desde_a_marca(self):
+        self.exportador.exportar()
+        
+        vazio = self.exportador.exportar()
+        self.assertEqual((vazio['registros'], vazio['arquivos']), (0, []))
+        
+        self.db.salvar_contratacoes([
+            contratacao(2, "2024-01-20", objeto="Aquisição de material escolar"),
+            contratacao(4, "2024-03-10")
+        ])
+        resultado = self.exportador.exportar()
+        
+        linhas = self.ler(resultado['arquivos'])
+        self.assertEqual([linha['sequencial_compra'] for linha in linhas], ["2", "4"])
+        self.assertEqual(linhas[0]['objeto'], "Aquisição de material escolar")
+        self.assertEqual(self.marca(), self.db.obter_geracao())
+        
+    def test_notificacao_avanca_marca_sem_arquivos(self):
+        self.exportador.exportar()
+        token, _ = self.db.reservar_notificacoes()
+        self.db.marcar_lote_notificado(token)
+        
+        resultado = self.exportador.exportar()
+        self.assertEqual((resultado['registros'], resultado['arquivos']), (0, []))
+        self.assertEqual(self.marca(), self.db.obter_geracao())
+        
+    def test_falha_nao_avanca_marca(self):
+        with mock.patch.object(
+            ExportadorColunar, "_gravar_csv", side_effect=OSError("disco cheio")
+        ), self.assertRaises(OSError):
+            self.exportador.exportar()
+        self.assertEqual(self.marca(), 0)
+        
+        # A próxima execução exporta tudo de novo
+        self.assertEqual(self.exportador.exportar()['registros'], 3)
+        
+    def test_linhas_por_arquivo(self):
+        exportador = ExportadorColunar(
+            self.db, str(self.diretorio / "pequena"), formato="csv", linhas_por_arquivo=1
+        )
+        resultado = exportador.exportar()
+        
+        self.assertEqual(len(resultado['arquivos']), 3)
+        self.assertEqual(len(set(resultado['arquivos'])), 3)
+        
+    def test_formato_invalido(self):
+        with self.assertRaises(ValueError):
+            ExportadorColunar(self.db, formato="xlsx")
+            
+    @unittest.skipIf(pyarrow is None, "pyarrow não instalado")
+    def test_parquet(self):
+        exportador = ExportadorColunar(self.db, str(self.diretorio / "parquet"))
+        resultado = exportador.exportar()
+        
+        tabelas = [pyarrow.parquet.read_table(arquivo) for arquivo in resultado['arquivos']]
+        self.assertEqual(sum(tabela.num_rows for tabela in tabelas), 3)
+        self.assertEqual(str(tabelas[0].schema.field("valor_estimado").type), "double")
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,97 @@
+#!/usr/bin/env python3
+"""
+Testes do limitador de taxa adaptativo
+Ajuste AIMD por intervalo e suspensão por Retry-After, com relógio simulado
+"""
+
+import sys
+import unittest
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
+from pathlib import Path
+from unittest import mock
+
+# Adicionar diretório atual ao path
+sys.path.insert(0, str(Path(__file__).parent))
+
+from limitador import LimitadorTaxa
+
+
+class TestLimitadorTaxa(unittest.TestCase):
+    """Limitador com relógio monotônico controlado pelo teste"""
+    
+    def setUp(self):
+        self.agora = 1000.0
+        relogio = mock.patch("limitador.time.monotonic", side_effect=lambda: self.agora)
+        relogio.start()
+        self.addCleanup(relogio.stop)
+        
+        self.limitador = LimitadorTaxa(
+            taxa_inicial=2.0, taxa_minima=0.5, taxa_maxima=3.0, capacidade=2.0,
+            incremento=0.5, fator_reducao=0.5, intervalo_reducao=1.0
+        )
+        
+    def test_aumento_uma_vez_por_intervalo(self):
+        # Várias respostas no mesmo intervalo (vários workers) valem um aumento
+        for _ in range(10):
+            self.limitador.registrar_resposta(200)
+        self.assertEqual(self.limitador.taxa, 2.5)
+        
+        self.agora += 1.0
+        self.limitador.registrar_resposta(204)
+        self.assertEqual(self.limitador.taxa, 3.0)
+        
+        self.agora += 1.0
+        self.limitador.registrar_resposta(200)
+        self.assertEqual(self.limitador.taxa, 3.0)
+        
+    def test_4xx_e_5xx_nao_aumentam(self):
+        for status in (304, 400, 404, 422, 500, 502):
+            self.agora += 1.0
+            self.limitador.registrar_resposta(status)
+        self.assertEqual(self.limitador.taxa, 2.0)
+        
+    def test_reducao_multiplicativa(self):
+        self.limitador.registrar_resposta(429)
+        self.limitador.registrar_resposta(503)
+        self.assertEqual(self.limitador.taxa, 1.0)
+        
+        # Logo após a redução, respostas 2xx não voltam a subir a taxa
+        self.limitador.registrar_resposta(200)
+        self.assertEqual(self.limitador.taxa, 1.0)
+        
+        self.agora += 1.0
+        self.limitador.registrar_resposta(429)
+        self.agora += 1.0
+        self.limitador.registrar_resposta(429)
+        self.assertEqual(self.limitador.taxa, 0.5)
+        
+        self.agora += 1.0
+        self.limitador.registrar_resposta(200)
+        self.assertEqual(self.limitador.taxa, 1.0)
+        
+    def test_balde_e_espera(self):
+        self.assertEqual(self.limitador.reservar(), 0.0)
+        self.assertEqual(self.limitador.reservar(), 0.0)
+        self.assertEqual(self.limitador.reservar(), 0.5)
+        self.assertEqual(self.limitador.reservar(), 1.0)
+        
+    def test_retry_after_em_segundos(self):
+        self.limitador.registrar_resposta(429, retry_after="30")
+        self.assertEqual(self.limitador.reservar(), 30.0)
+        
+        self.agora += 10.0
+        self.assertEqual(self.limitador.reservar(), 20.0)
+        
+    def test_retry_after_em_data(self):
+        data = format_datetime(datetime.now(timezone.utc) + timedelta(seconds=120), usegmt=True)
+        self.limitador.registrar_resposta(503, retry_after=data)
+        self.assertGreater(self.limitador.reservar(), 100.0)
+        
+    def test_retry_after_invalido(self):
+        self.limitador.registrar_resposta(429, retry_after="amanhã")
+        self.assertEqual(self.limitador.reservar(), 0.0)
+
+
+if __name__ == "__main__":
+    unittest.main()
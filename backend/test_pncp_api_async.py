@@ -0,0 +1,133 @@
+#!/usr/bin/env python3
+"""
+Testes do cliente assíncrono da API do PNCP
+Usa um servidor HTTP local que imita o endpoint de publicações
+"""
+
+import asyncio
+import json
+import sys
+import threading
+import unittest
+import warnings
+from datetime import datetime
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import urlparse, parse_qs
+
+# Adicionar diretório atual ao path
+sys.path.insert(0, str(Path(__file__).parent))
+
+try:
+    import aiohttp
+except ImportError:
+    aiohttp = None
+
+if aiohttp is not None:
+    from limitador import LimitadorTaxa
+    from pncp_api_async import AsyncPNCPClient
+
+REGISTROS_POR_PAGINA = 2
+PAGINAS = 3
+
+
+class ServidorPNCPFalso(BaseHTTPRequestHandler):
+    """Responde cada modalidade com PAGINAS páginas de REGISTROS_POR_PAGINA"""
+    
+    def do_GET(self):
+        params = {k: v[0] for k, v in parse_qs(urlparse(self.path).query).items()}
+        modalidade = int(params['codigoModalidadeContratacao'])
+        pagina = int(params['pagina'])
+        
+        corpo = json.dumps({
+            'data': [
+                {
+                    'orgaoEntidade': {'cnpj': f"{modalidade:014d}"},
+                    'anoCompra': 2024,
+                    'sequencialCompra': pagina * 100 + i
+                }
+                for i in range(REGISTROS_POR_PAGINA)
+            ],
+            'totalPaginas': PAGINAS,
+            'totalRegistros': PAGINAS * REGISTROS_POR_PAGINA
+        }).encode()
+        
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(corpo)))
+        self.end_headers()
+        self.wfile.write(corpo)
+        
+    def log_message(self, *args):
+        pass
+
+
+@unittest.skipIf(aiohttp is None, "aiohttp não instalado")
+class TestAsyncPNCPClient(unittest.TestCase):
+    """Chamadas públicas em loops de eventos diferentes"""
+    
+    @classmethod
+    def setUpClass(cls):
+        cls.servidor = ThreadingHTTPServer(('127.0.0.1', 0), ServidorPNCPFalso)
+        threading.Thread(target=cls.servidor.serve_forever, daemon=True).start()
+        
+    @classmethod
+    def tearDownClass(cls):
+        cls.servidor.shutdown()
+        cls.servidor.server_close()
+        
+    def setUp(self):
+        self.client = AsyncPNCPClient(
+            limitador=LimitadorTaxa(taxa_inicial=1000, taxa_maxima=1000, capacidade=1000)
+        )
+        self.client.BASE_URL = f"http://127.0.0.1:{self.servidor.server_port}"
+        
+    def buscar(self):
+        return asyncio.run(self.client.buscar_contratacoes_por_municipio(
+            "3304554", datetime(2024, 1, 1), datetime(2024, 1, 31), modalidades=[6, 8]
+        ))
+        
+    def test_reuso_em_dois_asyncio_run(self):
+        esperado = 2 * PAGINAS * REGISTROS_POR_PAGINA
+        
+        with warnings.catch_warnings(record=True) as avisos:
+            warnings.simplefilter("always")
+            self.assertEqual(len(self.buscar()), esperado)
+            self.assertEqual(len(self.buscar()), esperado)
+            
+        self.assertIsNone(self.client.session)
+        self.assertEqual(
+            [str(a.message) for a in avisos if issubclass(a.category, ResourceWarning)], []
+        )
+        
+    def test_sessao_de_loop_encerrado_e_recriada(self):
+        async def consumir():
+            return [
+                pagina async for pagina in self.client.iter_contratacoes(
+                    "3304554", datetime(2024, 1, 1), datetime(2024, 1, 31), modalidades=[6]
+                )
+            ]
+            
+        # iter_contratacoes não fecha a sessão: o próximo loop a recria
+        self.assertEqual(len(asyncio.run(consumir())), PAGINAS)
+        self.assertEqual(len(asyncio.run(consumir())), PAGINAS)
+        asyncio.run(self.client.fechar())
+        
+    def test_context_manager_mantem_a_sessao(self):
+        async def duas_buscas():
+            async with self.client:
+                await self.client.buscar_contratacoes_por_municipio(
+                    "3304554", datetime(2024, 1, 1), datetime(2024, 1, 31), modalidades=[6]
+                )
+                sessao = self.client.session
+                await self.client.buscar_contratacoes_por_municipio(
+                    "3304554", datetime(2024, 1, 1), datetime(2024, 1, 31), modalidades=[6]
+                )
+                return sessao is self.client.session
+                
+        self.assertTrue(asyncio.run(duas_buscas()))
+        self.assertIsNone(self.client.session)
+
+
+if __name__ == "__main__":
+    unittest.main()
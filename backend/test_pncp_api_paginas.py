@@ -0,0 +1,214 @@
+#!/usr/bin/env python3
+"""
+Testes da paginação do cliente da API do PNCP
+As páginas vêm de uma API simulada em memória (sem rede)
+"""
+
+import sys
+import threading
+import unittest
+import warnings
+from datetime import datetime, timedelta
+from pathlib import Path
+
+# Adicionar diretório atual ao path
+sys.path.insert(0, str(Path(__file__).parent))
+
+from limitador import LimitadorTaxa
+from pncp_api import PNCPClient
+
+INICIO = datetime(2024, 1, 1)
+FIM = datetime(2024, 1, 10)
+
+
+class APISimulada:
+    """Publicações por modalidade, filtradas por período e paginadas como na API"""
+    
+    def __init__(self, registros_por_dia: dict):
+        """
+        Args:
+            registros_por_dia: Modalidade -> quantidade de publicações por dia
+        """
+        self.registros = {
+            modalidade: [
+                {
+                    'orgaoEntidade': {'cnpj': f"{modalidade:014d}"},
+                    'anoCompra': 2024,
+                    'sequencialCompra': dia * 1000 + i,
+                    'dataPublicacaoPncp': (INICIO + timedelta(days=dia)).isoformat()
+                }
+                for dia in range((FIM - INICIO).days + 1)
+                for i in range(quantidade)
+            ]
+            for modalidade, quantidade in registros_por_dia.items()
+        }
+        self.requisicoes = []
+        self._lock = threading.Lock()
+        
+    def buscar_pagina(self, codigo_ibge, data_inicial, data_final, codigo_modalidade,
+                      pagina, tamanho_pagina):
+        """Substitui PNCPClient._buscar_pagina"""
+        with self._lock:
+            self.requisicoes.append((codigo_modalidade, data_inicial, data_final, pagina))
+            
+        fim = data_final.replace(hour=23, minute=59, second=59)
+        encontrados = [
+            registro for registro in self.registros[codigo_modalidade]
+            if data_inicial <= datetime.fromisoformat(registro['dataPublicacaoPncp']) <= fim
+        ]
+        inicio_pagina = (pagina - 1) * tamanho_pagina
+        pagina_atual = encontrados[inicio_pagina:inicio_pagina + tamanho_pagina]
+        return {
+            'contratacoes': [dict(registro) for registro in pagina_atual],
+            'total_paginas': -(-len(encontrados) // tamanho_pagina),
+            'total_registros': len(encontrados)
+        }
+
+
+def cliente(api: APISimulada, **kwargs) -> PNCPClient:
+    """PNCPClient sem limite de taxa que consulta a API simulada"""
+    client = PNCPClient(
+        limitador=LimitadorTaxa(taxa_inicial=1000, taxa_maxima=1000, capacidade=1000),
+        **kwargs
+    )
+    client._buscar_pagina = api.buscar_pagina
+    return client
+
+
+def chaves(contratacoes: list) -> list:
+    """Chaves das contratações, para comparar resultados sem depender da ordem"""
+    return sorted(PNCPClient._chave_contratacao(c) for c in contratacoes)
+
+
+class TestBuscaPorModalidades(unittest.TestCase):
+    """buscar_contratacoes_por_modalidades e buscar_contratacoes_por_municipio"""
+    
+    def test_modalidades_compartilham_o_executor(self):
+        api = APISimulada({6: 3, 8: 3})
+        segunda_iniciada = threading.Event()
+        buscar_pagina = api.buscar_pagina
+        
+        def buscar(codigo_ibge, data_inicial, data_final, codigo_modalidade, pagina,
+                   tamanho_pagina):
+            # A modalidade 6 só responde depois que a 8 começou: em série, falharia
+            if codigo_modalidade == 8:
+                segunda_iniciada.set()
+            elif not segunda_iniciada.wait(timeout=5):
+                raise TimeoutError("modalidades buscadas uma de cada vez")
+            return buscar_pagina(codigo_ibge, data_inicial, data_final, codigo_modalidade,
+                                 pagina, tamanho_pagina)
+        
+        client = cliente(api)
+        client._buscar_pagina = buscar
+        resultados = client.buscar_contratacoes_por_modalidades(
+            "3304554", {6: INICIO, 8: INICIO}, FIM, tamanho_pagina=4
+        )
+        
+        self.assertEqual(set(resultados), {6, 8})
+        for modalidade in (6, 8):
+            self.assertEqual(chaves(resultados[modalidade]), chaves(api.registros[modalidade]))
+            self.assertEqual(
+                {c['_modalidade_codigo'] for c in resultados[modalidade]}, {modalidade}
+            )
+            
+    def test_falha_marca_apenas_a_modalidade(self):
+        api = APISimulada({6: 2, 8: 2})
+        buscar_pagina = api.buscar_pagina
+        
+        def buscar(codigo_ibge, data_inicial, data_final, codigo_modalidade, pagina,
+                   tamanho_pagina):
+            if codigo_modalidade == 8 and pagina == 2:
+                raise ConnectionError("falha simulada")
+            return buscar_pagina(codigo_ibge, data_inicial, data_final, codigo_modalidade,
+                                 pagina, tamanho_pagina)
+        
+        client = cliente(api)
+        client._buscar_pagina = buscar
+        with self.assertLogs("pncp_api", level="ERROR"):
+            resultados = client.buscar_contratacoes_por_modalidades(
+                "3304554", {6: INICIO, 8: INICIO}, FIM, tamanho_pagina=5
+            )
+            
+        self.assertIsNone(resultados[8])
+        self.assertEqual(chaves(resultados[6]), chaves(api.registros[6]))
+        
+    def test_modalidade_sem_resultados(self):
+        api = APISimulada({6: 1, 8: 0})
+        resultados = cliente(api).buscar_contratacoes_por_modalidades(
+            "3304554", {6: INICIO, 8: INICIO}, FIM
+        )
+        self.assertEqual(resultados[8], [])
+        self.assertEqual(len(resultados[6]), 10)
+        
+    def test_parametro_pagina_obsoleto(self):
+        api = APISimulada({6: 1})
+        client = cliente(api)
+        
+        with warnings.catch_warnings(record=True) as avisos:
+            warnings.simplefilter("always")
+            contratacoes = client.buscar_contratacoes_por_municipio(
+                "3304554", INICIO, FIM, [6], 2, tamanho_pagina=3
+            )
+            
+        # A página é ignorada: todas as páginas são buscadas
+        self.assertEqual(chaves(contratacoes), chaves(api.registros[6]))
+        self.assertEqual([a.category for a in avisos], [DeprecationWarning])
+        
+        with warnings.catch_warnings(record=True) as avisos:
+            warnings.simplefilter("always")
+            client.buscar_contratacoes_por_municipio("3304554", INICIO, FIM, [6])
+        self.assertEqual(avisos, [])
+
+
+
+class TestDivisaoJanela(unittest.TestCase):
+    """Divisão de períodos acima de limite_registros_janela"""
+    
+    def buscar(self, api: APISimulada, inicio: datetime = INICIO, fim: datetime = FIM) -> list:
+        client = cliente(api, limite_registros_janela=20)
+        return [
+            contratacao
+            for pagina in client.iter_contratacoes("3304554", inicio, fim, [6], tamanho_pagina=4)
+            for contratacao in pagina
+        ]
+        
+    def test_dividir_janela(self):
+        janelas = PNCPClient._dividir_janela(INICIO, FIM.replace(hour=23), 3)
+        self.assertEqual(
+            [(inicio.day, fim.day) for inicio, fim in janelas], [(1, 4), (5, 7), (8, 10)]
+        )
+        
+        # Nunca mais subperíodos que dias
+        self.assertEqual(len(PNCPClient._dividir_janela(INICIO, INICIO + timedelta(days=1), 5)), 2)
+        
+    def test_periodo_grande_dividido_sem_repetir_registros(self):
+        api = APISimulada({6: 3})
+        contratacoes = self.buscar(api)
+        
+        # A primeira página do período inteiro é entregue e não se repete
+        self.assertEqual(len(contratacoes), 30)
+        self.assertEqual(chaves(contratacoes), chaves(api.registros[6]))
+        
+        # 30 registros com limite 20: dois subperíodos de 5 dias
+        subperiodos = {
+            (inicio.day, fim.day) for _, inicio, fim, pagina in api.requisicoes if pagina == 1
+        }
+        self.assertEqual(subperiodos, {(1, 10), (1, 5), (6, 10)})
+        
+    def test_periodo_pequeno_apenas_paginado(self):
+        api = APISimulada({6: 1})
+        self.assertEqual(chaves(self.buscar(api)), chaves(api.registros[6]))
+        self.assertEqual({(i.day, f.day) for _, i, f, _ in api.requisicoes}, {(1, 10)})
+        self.assertEqual(sorted(p for *_, p in api.requisicoes), [1, 2, 3])
+        
+    def test_dia_isolado_nao_e_dividido(self):
+        api = APISimulada({6: 25})
+        contratacoes = self.buscar(api, INICIO, INICIO)
+        
+        self.assertEqual(len(contratacoes), 25)
+        self.assertEqual(len(api.requisicoes), 7)
+        self.assertEqual({(i.day, f.day) for _, i, f, _ in api.requisicoes}, {(1, 1)})
+
+
+if __name__ == "__main__":
+    unittest.main()
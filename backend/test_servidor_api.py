@@ -0,0 +1,112 @@
+#!/usr/bin/env python3
+"""
+Testes da API HTTP do dashboard
+ETag/304 pela geração do banco e mapeamento de erros (400/404/500)
+"""
+
+import shutil
+import sys
+import tempfile
+import unittest
+from pathlib import Path
+from unittest import mock
+
+# Adicionar diretório atual ao path
+sys.path.insert(0, str(Path(__file__).parent))
+
+from test_arquivamento import contratacao
+
+try:
+    from aiohttp.test_utils import AioHTTPTestCase
+except ImportError:
+    AioHTTPTestCase = None
+
+if AioHTTPTestCase is not None:
+    from database import Database
+    from servidor_api import criar_aplicacao
+else:
+    AioHTTPTestCase = unittest.TestCase
+
+
+@unittest.skipIf(AioHTTPTestCase is unittest.TestCase, "aiohttp não instalado")
+class TestServidorAPI(AioHTTPTestCase):
+    """Servidor com banco SQLite temporário e 2 contratações"""
+    
+    async def get_application(self):
+        self.dir = tempfile.mkdtemp()
+        self.db = Database(str(Path(self.dir) / "teste.db"), modo_wal=True)
+        self.db.salvar_contratacoes([
+            contratacao(1, "2024-01-01"), contratacao(2, "2024-01-02")
+        ])
+        return criar_aplicacao(self.db, intervalo_eventos=0)
+        
+    async def asyncTearDown(self):
+        await super().asyncTearDown()
+        self.db.fechar()
+        shutil.rmtree(self.dir, ignore_errors=True)
+        
+    async def test_etag_e_304(self):
+        resposta = await self.client.get(
+            "/api/estatisticas", headers={"Accept-Encoding": "identity"}
+        )
+        self.assertEqual(resposta.status, 200)
+        etag = resposta.headers["ETag"]
+        self.assertEqual(etag, f'"g{self.db.obter_geracao()}"')
+        
+        resposta = await self.client.get("/api/estatisticas", headers={
+            "Accept-Encoding": "identity", "If-None-Match": etag
+        })
+        self.assertEqual(resposta.status, 304)
+        self.assertEqual(resposta.headers["ETag"], etag)
+        
+        # Uma gravação muda a geração e invalida o ETag
+        self.db.salvar_contratacoes([contratacao(3, "2024-01-03")])
+        resposta = await self.client.get("/api/estatisticas", headers={
+            "Accept-Encoding": "identity", "If-None-Match": etag
+        })
+        self.assertEqual(resposta.status, 200)
+        self.assertNotEqual(resposta.headers["ETag"], etag)
+        self.assertEqual((await resposta.json())['total_contratacoes'], 3)
+        
+    async def test_etag_por_compressao(self):
+        resposta = await self.client.get(
+            "/api/contratacoes", headers={"Accept-Encoding": "gzip"}
+        )
+        self.assertEqual(resposta.status, 200)
+        self.assertTrue(resposta.headers["ETag"].endswith('-gzip"'))
+        self.assertEqual(len((await resposta.json())['contratacoes']), 2)
+        
+    async def test_parametros_invalidos_400(self):
+        for caminho in (
+            "/api/contratacoes?limite=abc",
+            "/api/contratacoes?limite=0",
+            "/api/contratacoes?data_inicio=ontem",
+            "/api/contratacoes?cursor=xyz",
+            "/api/estatisticas/serie?granularidade=ano",
+            "/api/estatisticas/serie?agrupar_por=cor",
+            "/api/estatisticas/orgaos?data_fim=2024-13-01",
+            "/api/busca",
+            "/api/eventos?desde=x",
+        ):
+            with self.subTest(caminho=caminho):
+                resposta = await self.client.get(caminho)
+                self.assertEqual(resposta.status, 400)
+                self.assertIn('erro', await resposta.json())
+                self.assertEqual(resposta.headers["Access-Control-Allow-Origin"], "*")
+                
+    async def test_nao_encontrado_404(self):
+        resposta = await self.client.get("/api/contratacoes/999")
+        self.assertEqual(resposta.status, 404)
+        
+    async def test_erro_interno_500_sem_detalhes(self):
+        falha = ValueError("detalhe interno")
+        with mock.patch.object(self.db, "obter_estatisticas", side_effect=falha), \
+                self.assertLogs("servidor_api", level="ERROR"):
+            resposta = await self.client.get("/api/estatisticas")
+            
+        self.assertEqual(resposta.status, 500)
+        self.assertEqual(await resposta.json(), {'erro': "Erro interno"})
+
+
+if __name__ == "__main__":
+    unittest.main()